@@ -0,0 +1,198 @@
+"""A data-oriented World for the ants game, which keeps the location,
+destination, speed, type and state of every entity in parallel NumPy arrays
+and moves them all in a single vectorized pass each tick.
+
+Entities are still GameEntity objects, so the states work unchanged. Their
+location and destination are Vector2s that are views of a row in the
+arrays, and changes made through the entity are written to the arrays.
+Requires NumPy.
+
+"""
+
+import numpy
+
+from gameobjects.vector2 import Vector2
+
+from ants_game import World
+
+
+class ArrayWorld(World):
+
+    def __init__(self, capacity=256, group_states=False, think_scheduler=None,
+                 think_pool=None, random_service=None, pheromones=None):
+
+        World.__init__(self, group_states, think_scheduler, think_pool, random_service,
+                       pheromones)
+
+        self.count = 0
+        self.slot_entities = []
+        self.type_codes = {}
+        self.state_codes = {None: -1}
+
+        self.locations = numpy.zeros((capacity, 2))
+        self.destinations = numpy.zeros((capacity, 2))
+        self.speeds = numpy.zeros(capacity)
+        self.types = numpy.zeros(capacity, dtype=int)
+        self.states = numpy.zeros(capacity, dtype=int)
+
+    def _grow(self):
+
+        def grow(array):
+            new_array = numpy.zeros((len(array) * 2,) + array.shape[1:], dtype=array.dtype)
+            new_array[:len(array)] = array
+            return new_array
+
+        self.locations = grow(self.locations)
+        self.destinations = grow(self.destinations)
+        self.speeds = grow(self.speeds)
+        self.types = grow(self.types)
+        self.states = grow(self.states)
+
+        # The entities' vectors still refer to the old arrays
+        for slot, entity in enumerate(self.slot_entities):
+            self._attach(entity, slot)
+
+    def _attach(self, entity, slot):
+
+        # A memoryview reads and writes the row with plain Python floats,
+        # which are quicker to do arithmetic with than NumPy scalars
+        entity.slot = slot
+        entity._location._v = memoryview(self.locations[slot])
+        entity._destination._v = memoryview(self.destinations[slot])
+
+    def add_entity(self, entity):
+
+        slot = self.count
+        if slot == len(self.locations):
+            self._grow()
+        self.count += 1
+        self.slot_entities.append(entity)
+
+        self.locations[slot] = tuple(entity.location)
+        self.destinations[slot] = tuple(entity.destination)
+        self.speeds[slot] = entity.speed
+        self.types[slot] = self.type_codes.setdefault(entity.name, len(self.type_codes))
+        self.states[slot] = self._get_state_code(entity)
+
+        # Replace the entity's vectors with views of its row
+        entity._location = Vector2.from_floats(0., 0.)
+        entity._destination = Vector2.from_floats(0., 0.)
+        self._attach(entity, slot)
+
+        World.add_entity(self, entity)
+
+    def remove_entity(self, entity):
+
+        if self.defer(entity, self.remove_entity, entity):
+            return
+
+        World.remove_entity(self, entity)
+
+        # Detach the vectors, in case something still refers to them
+        slot = entity.slot
+        entity._location._v = self.locations[slot].tolist()
+        entity._destination._v = self.destinations[slot].tolist()
+        entity.slot = None
+
+        # Move the last entity in to the free slot to keep the arrays packed
+        last = self.count - 1
+        last_entity = self.slot_entities.pop()
+        if slot != last:
+            for array in (self.locations, self.destinations,
+                          self.speeds, self.types, self.states):
+                array[slot] = array[last]
+            self.slot_entities[slot] = last_entity
+            self._attach(last_entity, slot)
+        self.count = last
+
+    def set_entity_location(self, entity, location):
+
+        slot = getattr(entity, "slot", None)
+        if slot is None:
+            World.set_entity_location(self, entity, location)
+            return
+        self.locations[slot] = tuple(location)
+        self.spatial_index.update(entity)
+
+    def set_entity_destination(self, entity, destination):
+
+        slot = getattr(entity, "slot", None)
+        if slot is None:
+            World.set_entity_destination(self, entity, destination)
+            return
+        self.destinations[slot] = tuple(destination)
+
+    def set_entity_speed(self, entity, speed):
+
+        entity._speed = speed
+        slot = getattr(entity, "slot", None)
+        if slot is not None:
+            self.speeds[slot] = speed
+
+    def _get_state_code(self, entity):
+
+        state = entity.brain.active_state
+        name = state.name if state is not None else None
+        codes = self.state_codes
+        if name not in codes:
+            codes[name] = len(codes) - 1
+        return codes[name]
+
+    def think(self):
+
+        World.think(self)
+        get_state_code = self._get_state_code
+        self.states[:self.count] = [get_state_code(entity) for entity in self.slot_entities]
+
+    def move(self, time_passed_seconds):
+
+        self.update_pheromones()
+
+        count = self.count
+        if not count:
+            return
+        locations = self.locations[:count]
+        destinations = self.destinations[:count]
+        speeds = self.speeds[:count]
+        cell_size = self.spatial_index.cell_size
+
+        offsets = destinations - locations
+        distances = numpy.hypot(offsets[:, 0], offsets[:, 1])
+        moving = numpy.nonzero((speeds > 0.) & (distances > 0.))[0]
+        if not len(moving):
+            return
+
+        offsets = offsets[moving]
+        distances = distances[moving]
+        travel = numpy.minimum(distances, time_passed_seconds * speeds[moving])
+        old_cells = numpy.floor_divide(locations[moving], cell_size)
+
+        # Entities that arrive are placed exactly on their destination
+        arrived = travel >= distances
+        new_locations = locations[moving] + offsets * (travel / distances)[:, numpy.newaxis]
+        new_locations[arrived] = destinations[moving[arrived]]
+        locations[moving] = new_locations
+
+        # Only the entities that changed cell need to be re-indexed
+        new_cells = numpy.floor_divide(new_locations, cell_size)
+        changed = moving[(new_cells != old_cells).any(axis=1)]
+        update = self.spatial_index.update
+        slot_entities = self.slot_entities
+        for slot in changed.tolist():
+            update(slot_entities[slot])
+
+    def get_type_mask(self, name):
+
+        """Returns a boolean array that is True for the packed slots that
+        contain entities with the given name."""
+
+        code = self.type_codes.get(name, -1)
+        return self.types[:self.count] == code
+
+    def get_state_mask(self, state_name):
+
+        """Returns a boolean array that is True for the packed slots that
+        contain entities in a given state."""
+
+        code = self.state_codes.get(state_name, -2)
+        return self.states[:self.count] == code
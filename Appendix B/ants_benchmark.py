@@ -0,0 +1,336 @@
+"""Runs the ants simulation without a window, as fast as it will go, and
+writes the timings as JSON so that runs can be compared.
+
+    python ants_benchmark.py --ants 1000 --ticks 500 --seed 1 -o before.json
+
+The simulation uses a fixed time step in place of the frame clock, and a
+seeded random number generator, so the same arguments always simulate the
+same world.
+
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import sys
+import json
+import time
+import random
+import platform
+from argparse import ArgumentParser
+
+import pygame
+
+import ants_game
+from ants_game import World, ThinkScheduler, DirtyRenderer, SCREEN_SIZE, \
+                      add_ants, spawn_entities
+from ants_parallel import is_free_threaded
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def get_peak_rss():
+
+    """Returns the peak resident memory of the process in bytes, or None if
+    it is not available on this platform."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+def load_images():
+
+    path = os.path.dirname(os.path.abspath(__file__))
+    load = lambda name: pygame.image.load(os.path.join(path, name)).convert_alpha()
+    return load("ant.png"), load("leaf.png"), load("spider.png")
+
+
+def run_benchmark(ants=ants_game.ANT_COUNT, ticks=1000, seed=0, step=1000./30.,
+                  render=False, trace_memory=False, arrays=False,
+                  group_states=False, lod=False, think_budget=None,
+                  parallel=None, shards=None, dirty=False, random_streams=False,
+                  pheromones=None, checkpoint=None, profiler=None):
+
+    """Simulates a world and returns a dictionary of the results.
+
+    ants -- Number of ants to start with
+    ticks -- Number of ticks to simulate
+    seed -- Seed for the random number generator
+    step -- Time passed per tick, in milliseconds
+    render -- If True, the world is also rendered to an offscreen surface
+    trace_memory -- If True, the peak memory allocated by Python is also
+    measured (this slows the simulation down)
+    arrays -- If True, use the NumPy backed ArrayWorld
+    group_states -- If True, entities think a whole state at a time
+    lod -- If True, entities think at intervals that depend on their state
+    think_budget -- Maximum number of entities that think per tick (implies
+    lod)
+    parallel -- Number of workers to think with, in parallel batches, or
+    None to think on one thread (the batches only run at the same time on
+    free-threaded builds, see ants_parallel)
+    shards -- Number of worker processes to split the world between, or None
+    for a single World
+    dirty -- If True, render with a DirtyRenderer (implies render)
+    random_streams -- If True, every entity draws random numbers from its
+    own NumPy backed stream
+    pheromones -- Number of ticks between updates of a pheromone field that
+    ants lay and follow trails in, or None for no field
+    checkpoint -- Number of ticks between snapshots of the world, which are
+    timed separately from the ticks, or None for no snapshots
+    profiler -- An ants_profiler.Profiler to record the ticks to, or None
+
+    Every tick is timed in phases: spawning leaves and spiders, the world's
+    process and rendering. Process is also split in to the think and move
+    phases that World.process times, which are None for a sharded world.
+
+    """
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    ant_image, leaf_image, spider_image = load_images()
+
+    random.seed(seed)
+    scheduler = None
+    if lod or think_budget is not None:
+        scheduler = ThinkScheduler(think_budget)
+    think_pool = None
+    if parallel is not None:
+        from ants_parallel import ThinkPool
+        think_pool = ThinkPool(parallel, seed=seed)
+    random_service = None
+    if random_streams:
+        from ants_random import RandomService
+        random_service = RandomService(seed)
+    pheromone_field = None
+    if pheromones is not None:
+        from ants_pheromones import PheromoneField
+        pheromone_field = PheromoneField(interval=pheromones)
+    if shards is not None:
+        from ants_sharded import ShardedWorld
+        world = ShardedWorld(shards, seed=seed)
+    elif arrays:
+        from ants_arrays import ArrayWorld
+        world = ArrayWorld(group_states=group_states, think_scheduler=scheduler,
+                           think_pool=think_pool, random_service=random_service,
+                           pheromones=pheromone_field)
+    else:
+        world = World(group_states=group_states, think_scheduler=scheduler,
+                      think_pool=think_pool, random_service=random_service,
+                      pheromones=pheromone_field)
+    add_ants(world, ant_image, ants)
+
+    renderer = None
+    if dirty:
+        render = True
+        renderer = DirtyRenderer(world)
+    updated_pixels = 0
+
+    if checkpoint is not None:
+        import ants_snapshot
+        images = {"ant": ant_image, "leaf": leaf_image, "spider": spider_image}
+    checkpoint_times = []
+    checkpoint_bytes = 0
+
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    timer = time.perf_counter
+    spawn_time = process_time = render_time = 0.
+    think_time = move_time = 0.
+    slowest_tick = 0.
+
+    if profiler is not None:
+        profiler.start()
+
+    start = timer()
+    for tick_no in range(ticks):
+
+        tick_start = timer()
+        spawn_entities(world, leaf_image, spider_image)
+
+        process_start = timer()
+        world.process(step)
+
+        render_start = timer()
+        if renderer is not None:
+            for rect in renderer.render(screen):
+                updated_pixels += rect.w * rect.h
+        elif render:
+            world.render(screen)
+            updated_pixels += SCREEN_SIZE[0] * SCREEN_SIZE[1]
+        tick_end = timer()
+
+        spawn_time += process_start - tick_start
+        process_time += render_start - process_start
+        if shards is None:
+            think_time += world.think_seconds
+            move_time += world.move_seconds
+        render_time += tick_end - render_start
+        slowest_tick = max(slowest_tick, tick_end - tick_start)
+
+        if checkpoint is not None and (tick_no + 1) % checkpoint == 0:
+            checkpoint_start = timer()
+            checkpoint_bytes = len(ants_snapshot.dumps(world, images))
+            checkpoint_times.append(timer() - checkpoint_start)
+
+    total_time = timer() - start - sum(checkpoint_times)
+
+    if profiler is not None:
+        profiler.stop()
+
+    python_peak = None
+    if trace_memory:
+        python_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if shards is not None:
+        entity_counts = world.get_entity_counts()
+        world.close()
+    else:
+        entity_counts = {}
+        for entity in world.entities.values():
+            entity_counts[entity.name] = entity_counts.get(entity.name, 0) + 1
+
+    if think_pool is not None:
+        think_pool.close()
+    pygame.quit()
+
+    per_tick = lambda seconds: seconds * 1000. / max(ticks, 1)
+    return {
+        "config": { "ants": ants,
+                    "ticks": ticks,
+                    "seed": seed,
+                    "step_ms": step,
+                    "render": render,
+                    "dirty": dirty,
+                    "arrays": arrays,
+                    "group_states": group_states,
+                    "lod": scheduler is not None,
+                    "think_budget": think_budget,
+                    "parallel": parallel,
+                    "parallel_threads": think_pool is not None and
+                                        think_pool.executor is not None,
+                    "free_threaded": is_free_threaded(),
+                    "shards": shards,
+                    "random_streams": random_streams,
+                    "pheromones": pheromones,
+                    "checkpoint": checkpoint },
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "total_seconds": total_time,
+        "ticks_per_second": ticks / total_time if total_time else None,
+        "slowest_tick_ms": slowest_tick * 1000.,
+        "phases_ms_per_tick": { "spawn": per_tick(spawn_time),
+                                "process": per_tick(process_time),
+                                "think": per_tick(think_time) if shards is None else None,
+                                "move": per_tick(move_time) if shards is None else None,
+                                "render": per_tick(render_time) },
+        "updated_pixels_per_tick": updated_pixels / max(ticks, 1),
+        "checkpoints": { "count": len(checkpoint_times),
+                         "mean_ms": sum(checkpoint_times) * 1000. / max(len(checkpoint_times), 1),
+                         "max_ms": max(checkpoint_times) * 1000. if checkpoint_times else 0.,
+                         "bytes": checkpoint_bytes },
+        "peak_rss_bytes": get_peak_rss(),
+        "peak_python_bytes": python_peak,
+        "final_entities": entity_counts,
+    }
+
+
+def main(args=None):
+
+    parser = ArgumentParser(description="Headless ants simulation benchmark")
+    parser.add_argument("--ants", type=int, default=ants_game.ANT_COUNT,
+                        help="number of ants (default %(default)s)")
+    parser.add_argument("--ticks", type=int, default=1000,
+                        help="number of ticks to simulate (default %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+    parser.add_argument("--step", type=float, default=1000./30.,
+                        help="milliseconds per tick (default %(default).2f)")
+    parser.add_argument("--render", action="store_true",
+                        help="render each tick to an offscreen surface")
+    parser.add_argument("--dirty", action="store_true",
+                        help="render only the changed areas (implies --render)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="measure peak Python allocations (slower)")
+    parser.add_argument("--arrays", action="store_true",
+                        help="use the NumPy structure-of-arrays world")
+    parser.add_argument("--group-states", action="store_true",
+                        help="think a whole state at a time")
+    parser.add_argument("--lod", action="store_true",
+                        help="think at intervals that depend on the state")
+    parser.add_argument("--think-budget", type=int,
+                        help="maximum entities that think per tick (implies --lod)")
+    parser.add_argument("--parallel", type=int, metavar="WORKERS",
+                        help="think in parallel batches with this many workers "
+                             "(only in parallel on free-threaded builds)")
+    parser.add_argument("--shards", type=int,
+                        help="split the world between this many processes")
+    parser.add_argument("--random-streams", action="store_true",
+                        help="give every entity its own random number stream")
+    parser.add_argument("--pheromones", type=int, nargs="?", const=1, metavar="INTERVAL",
+                        help="lay and follow pheromone trails, updating the field "
+                             "every INTERVAL ticks (default 1)")
+    parser.add_argument("--checkpoint", type=int, metavar="TICKS",
+                        help="time a snapshot of the world every TICKS ticks")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every state, entity and phase, and print a table "
+                             "of the times to stderr")
+    parser.add_argument("--profile-csv", metavar="FILE",
+                        help="write the times to a CSV file (implies --profile)")
+    parser.add_argument("-o", "--output",
+                        help="JSON file to write (default is stdout)")
+    options = parser.parse_args(args)
+
+    if options.parallel is not None and not is_free_threaded():
+        sys.stderr.write("This Python has the GIL, so the --parallel batches "
+                         "think one at a time on the main thread\n")
+
+    profiler = None
+    if options.profile or options.profile_csv:
+        from ants_profiler import Profiler
+        profiler = Profiler()
+
+    results = run_benchmark(ants=options.ants,
+                            ticks=options.ticks,
+                            seed=options.seed,
+                            step=options.step,
+                            render=options.render,
+                            dirty=options.dirty,
+                            trace_memory=options.trace_memory,
+                            arrays=options.arrays,
+                            group_states=options.group_states,
+                            lod=options.lod,
+                            think_budget=options.think_budget,
+                            parallel=options.parallel,
+                            shards=options.shards,
+                            random_streams=options.random_streams,
+                            pheromones=options.pheromones,
+                            checkpoint=options.checkpoint,
+                            profiler=profiler)
+
+    if profiler is not None:
+        sys.stderr.write(profiler.format_table() + "\n")
+        if options.profile_csv:
+            profiler.write_csv(options.profile_csv)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,101 @@
 import pygame
 from pygame.locals import *
 
-from random import randint, choice
+import random
+from math import hypot
+from time import perf_counter
+from heapq import nsmallest, heappush, heappop
+from itertools import chain, repeat
 from gameobjects.vector2 import Vector2
 
 SCREEN_SIZE = (640, 480)
 NEST_POSITION = (320, 240)
 ANT_COUNT = 20
 NEST_SIZE = 100
+GRID_CELL_SIZE = 100
+
+# Redraw the whole screen when more than this fraction of it has changed
+MAX_DIRTY_FRACTION = 0.5
+
+# Draw lists are drawn from the lowest layer up
+LAYER_GROUND = 0
+LAYER_CREATURES = 1
+LAYER_CARRIED = 2
+LAYER_OVERLAY = 3
+
+# Pheromone laid by an ant that has just found food, and the fraction that
+# is left for the next deposit on the way home
+TRAIL_DEPOSIT = 1.
+TRAIL_FADE = 0.97
+# Exploring ants follow a trail that is steeper than this (per pixel), and
+# walk this far up it at a time
+TRAIL_THRESHOLD = 0.0005
+TRAIL_STEP = 30.
+
+# The Profiler (see ants_profiler) that thinking, changes of state,
+# processing and rendering are recorded to, or None to record nothing
+_profiler = None
+
+def set_profiler(profiler):
+    
+    """Starts recording to a profiler, or stops recording if profiler is
+    None."""
+    
+    global _profiler
+    _profiler = profiler
+    
+def get_profiler():
+    
+    return _profiler
+
+_sprite_metrics = {}
+
+def get_sprite_metrics(image):
+    
+    """Returns (width, height, half width, half height) for an image. These
+    are only worked out once per image."""
+    
+    metrics = _sprite_metrics.get(image)
+    if metrics is None:
+        w, h = image.get_size()
+        metrics = _sprite_metrics[image] = (w, h, w/2., h/2.)
+    return metrics
+
+_dead_images = {}
+
+def get_dead_image(image):
+    
+    """Returns an image flipped upside down, which is shared by every
+    entity that has died with the same image."""
+    
+    dead_image = _dead_images.get(image)
+    if dead_image is None:
+        dead_image = _dead_images[image] = pygame.transform.flip(image, 0, 1)
+    return dead_image
+
+def get_image_names(images):
+    
+    """Returns a dictionary of image to name, for a dictionary of name to
+    image. The dead version of each image is named with "_dead" on the end,
+    unless it is already in images."""
+    
+    image_names = {}
+    for name, image in images.items():
+        image_names.setdefault(get_dead_image(image), name + "_dead")
+    for name, image in images.items():
+        image_names[image] = name
+    return image_names
+
+def get_named_image(images, name):
+    
+    """Returns the image with a name given by get_image_names, or raises
+    KeyError."""
+    
+    if name in images:
+        return images[name]
+    if name.endswith("_dead") and name[:-5] in images:
+        return get_dead_image(images[name[:-5]])
+    raise KeyError(name)
 
 class State(object):
     
@@ -45,79 +133,964 @@ class StateMachine(object):
         if self.active_state is None:
             return
         
+        profiler = _profiler
+        if profiler is not None:
+            state = self.active_state
+            start = profiler.timer()
+        
         self.active_state.do_actions()        
 
         new_state_name = self.active_state.check_conditions()
+        
+        if profiler is not None:
+            profiler.add_time("state", state.name, profiler.timer() - start)
+        
         if new_state_name is not None:
             self.set_state(new_state_name)
         
     
     def set_state(self, new_state_name):
         
+        old_state = self.active_state
         if self.active_state is not None:
             self.active_state.exit_actions()
             
         self.active_state = self.states[new_state_name]        
         self.active_state.entry_actions()
         
+        if _profiler is not None:
+            _profiler.add_transition(old_state and old_state.name, new_state_name)
+        
       
     
-class World(object):
+class SharedState(object):
+    
+    """A state that is shared by every entity that uses it. The state holds
+    no per-entity data, the entity is passed to each method and any data is
+    kept on the entity."""
+    
+    # Ticks between thinks for an entity in this state, when the world has
+    # a ThinkScheduler
+    think_interval = 1
+    
+    def __init__(self, name):
+        self.name = name
+        
+    def get_think_interval(self, entity):
+        return self.think_interval
+        
+    def do_actions(self, entity):
+        pass
+        
+    def check_conditions(self, entity):
+        pass
+    
+    def entry_actions(self, entity):
+        pass
+    
+    def exit_actions(self, entity):
+        pass
+    
+    def do_group_actions(self, entities):
+        
+        # Override to do the actions for a whole group more efficiently
+        do_actions = self.do_actions
+        for entity in entities:
+            do_actions(entity)
+            
+    def check_group_conditions(self, entities):
+        
+        """Returns a list of (entity, new state name) for the entities in
+        the group that should change state."""
+        
+        check_conditions = self.check_conditions
+        transitions = []
+        for entity in entities:
+            new_state_name = check_conditions(entity)
+            if new_state_name is not None:
+                transitions.append((entity, new_state_name))
+        return transitions
+    
+    
+def make_state_table(*states):
+    
+    return dict((state.name, state) for state in states)
+    
+    
+class SharedStateMachine(object):
+    
+    """The brain of an entity that uses shared states. Only the active
+    state is stored per entity, the states themselves are in a table shared
+    by all entities of the same kind."""
+    
+    __slots__ = ('entity', 'states', 'active_state')
+    
+    def __init__(self, entity, states):
+        
+        self.entity = entity
+        self.states = states
+        self.active_state = None
+        
+    def think(self):
+        
+        state = self.active_state
+        if state is None:
+            return
+        
+        entity = self.entity
+        profiler = _profiler
+        if profiler is not None:
+            start = profiler.timer()
+        
+        state.do_actions(entity)
+        
+        new_state_name = state.check_conditions(entity)
+        
+        if profiler is not None:
+            profiler.add_time("state", state.name, profiler.timer() - start)
+        
+        if new_state_name is not None:
+            self.set_state(new_state_name)
+            
+    def set_state(self, new_state_name):
+        
+        entity = self.entity
+        old_state = self.active_state
+        if old_state is not None:
+            old_state.exit_actions(entity)
+            
+        self.active_state = self.states[new_state_name]
+        self.active_state.entry_actions(entity)
+        entity.world.state_changed(entity, old_state, self.active_state)
+        
+        if _profiler is not None:
+            _profiler.add_transition(old_state and old_state.name, new_state_name)
+        
+        
+class SpatialGrid(object):
+    
+    """Buckets entities by name and by the square cell of a uniform grid
+    that contains them, so that range queries only look at nearby cells."""
+    
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        
+        self.cell_size = float(cell_size)
+        self.buckets = {}
+        self.entity_cells = {}
+        
+    def get_cell(self, location):
+        
+        x, y = location
+        cell_size = self.cell_size
+        return (int(x // cell_size), int(y // cell_size))
+    
+    def insert(self, entity):
+        
+        cell = self.get_cell(entity.location)
+        cells = self.buckets.setdefault(entity.name, {})
+        cells.setdefault(cell, {})[entity] = None
+        self.entity_cells[entity] = cell
+        
+    def remove(self, entity):
+        
+        cell = self.entity_cells.pop(entity)
+        cells = self.buckets[entity.name]
+        bucket = cells[cell]
+        del bucket[entity]
+        if not bucket:
+            del cells[cell]
+            
+    def update(self, entity):
+        
+        # Called when an entity moves, only entities in the grid are tracked
+        old_cell = self.entity_cells.get(entity)
+        if old_cell is None:
+            return
+        cell = self.get_cell(entity.location)
+        if cell != old_cell:
+            cells = self.buckets[entity.name]
+            bucket = cells[old_cell]
+            del bucket[entity]
+            if not bucket:
+                del cells[old_cell]
+            cells.setdefault(cell, {})[entity] = None
+            self.entity_cells[entity] = cell
+            
+    def query_range(self, name, location, e_range):
+        
+        """Returns a list of (distance squared, entity) for the entities
+        with the given name that are closer than e_range."""
+        
+        cells = self.buckets.get(name)
+        if not cells:
+            return []
+        x, y = location
+        cell_size = self.cell_size
+        min_cx = int((x - e_range) // cell_size)
+        max_cx = int((x + e_range) // cell_size)
+        min_cy = int((y - e_range) // cell_size)
+        max_cy = int((y + e_range) // cell_size)
+        range_squared = e_range * e_range
+        
+        found = []
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) < len(cells):
+            buckets = [cells.get((cx, cy)) for cx in range(min_cx, max_cx + 1)
+                                           for cy in range(min_cy, max_cy + 1)]
+        else:
+            buckets = cells.values()
+        for bucket in buckets:
+            if not bucket:
+                continue
+            for entity in bucket:
+                ex, ey = entity.location
+                dx = ex - x
+                dy = ey - y
+                distance_squared = dx*dx + dy*dy
+                if distance_squared < range_squared:
+                    found.append((distance_squared, entity))
+        return found
+    
+    def query_nearest(self, name, location, count, e_range=None):
+        
+        """Returns a list of up to count (distance squared, entity) for the
+        closest entities with the given name, nearest first."""
+        
+        if e_range is None:
+            # Without a range every entity of this type is a candidate
+            x, y = location
+            found = []
+            for bucket in self.buckets.get(name, {}).values():
+                for entity in bucket:
+                    ex, ey = entity.location
+                    dx = ex - x
+                    dy = ey - y
+                    found.append((dx*dx + dy*dy, entity))
+        else:
+            found = self.query_range(name, location, e_range)
+        return nsmallest(count, found, key=lambda item: item[0])
+    
+
+class EntityRegistry(object):
+    
+    """Stores the live entities packed in to a list, and gives out ids that
+    combine a slot number and a generation. The generation changes when an
+    entity is removed, so an old id resolves to None even once the slot has
+    been reused.
+    
+    While the registry is locked (i.e. while the world is iterating over the
+    entities) additions and removals to the packed list are held back and
+    applied when it is unlocked.
+    
+    """
+    
+    SLOT_BITS = 24
+    SLOT_MASK = (1 << SLOT_BITS) - 1
     
     def __init__(self):
         
-        self.entities = {}
-        self.entity_id = 0        
+        self.dense = []
+        self.slots = []
+        self.generations = []
+        self.free_slots = []
+        self.added = []
+        self.removed = []
+        self.locks = 0
+        
+    def __len__(self):
+        
+        return len(self.dense) + len(self.added) - len(self.removed)
+    
+    def __iter__(self):
+        
+        return iter(self.values())
+    
+    def values(self):
+        
+        """Returns the packed list of entities. This is not a copy, and while
+        the registry is locked it may contain entities that have been
+        removed."""
+        
+        return self.dense
+    
+    def add(self, entity):
+        
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.slots)
+            self.slots.append(None)
+            self.generations.append(0)
+        self.slots[slot] = entity
+        entity.id = (self.generations[slot] << self.SLOT_BITS) | slot
+        
+        if self.locks:
+            self.added.append(entity)
+        else:
+            entity.dense_index = len(self.dense)
+            self.dense.append(entity)
+        return entity.id
+    
+    def remove(self, entity):
+        
+        # The entity is gone as far as get is concerned straight away
+        slot = entity.id & self.SLOT_MASK
+        if self.slots[slot] is not entity:
+            raise KeyError("Entity is not in the registry")
+        self.slots[slot] = None
+        self.generations[slot] += 1
+        self.free_slots.append(slot)
+        
+        if self.locks:
+            self.removed.append(entity)
+        else:
+            self._remove_dense(entity)
+            
+    def _remove_dense(self, entity):
+        
+        dense = self.dense
+        index = entity.dense_index
+        last_entity = dense.pop()
+        if last_entity is not entity:
+            dense[index] = last_entity
+            last_entity.dense_index = index
+            
+    def get(self, entity_id):
+        
+        if entity_id is None:
+            return None
+        slot = entity_id & self.SLOT_MASK
+        if slot < len(self.slots) and \
+           self.generations[slot] == entity_id >> self.SLOT_BITS:
+            return self.slots[slot]
+        return None
+    
+    def is_alive(self, entity):
+        
+        return self.slots[entity.id & self.SLOT_MASK] is entity
+        
+    def restore(self, generations, free_slots, entity_ids):
+        
+        """Prepares an empty registry to take back entities from a snapshot.
+        generations and free_slots are as they were when the snapshot was
+        taken, and the entities must then be added in the order of
+        entity_ids, which gives each one the id it had."""
+        
+        if self.slots:
+            raise ValueError("Only an empty registry can be restored")
+        self.generations = list(generations)
+        self.slots = [None] * len(self.generations)
+        # add takes the last free slot first
+        slot_mask = self.SLOT_MASK
+        self.free_slots = list(free_slots)
+        self.free_slots.extend(entity_id & slot_mask for entity_id in reversed(entity_ids))
+    
+    def lock(self):
+        
+        self.locks += 1
+        
+    def unlock(self):
+        
+        self.locks -= 1
+        if self.locks:
+            return
+        
+        if self.removed:
+            for entity in self.removed:
+                # Entities added and removed in the same pass never made it
+                # in to the packed list
+                if entity in self.added:
+                    self.added.remove(entity)
+                else:
+                    self._remove_dense(entity)
+            self.removed = []
+        if self.added:
+            dense = self.dense
+            is_alive = self.is_alive
+            for entity in self.added:
+                if is_alive(entity):
+                    entity.dense_index = len(dense)
+                    dense.append(entity)
+            self.added = []
+            
+            
+class ThinkScheduler(object):
+    
+    """Decides which entities think on each tick. An entity thinks every
+    get_think_interval() ticks, and if a budget is given no more than that
+    many entities think in one tick. Entities that miss out are first in
+    line on the next tick."""
+    
+    def __init__(self, budget=None):
+        
+        self.budget = budget
+        self.tick = 0
+        self.queue = []
+        self.scheduled = {}
+        self.order = 0
+        
+    def schedule(self, entity, due_tick):
+        
+        # Entries in the queue that no longer match scheduled are ignored
+        self.order += 1
+        self.scheduled[entity] = self.order
+        heappush(self.queue, (due_tick, self.order, entity))
+        
+    def add(self, entity):
+        
+        # Stagger the first think, so that entities added together do not
+        # all think on the same ticks
+        interval = entity.get_think_interval()
+        self.schedule(entity, self.tick + self.order % interval)
+        
+    def remove(self, entity):
+        
+        self.scheduled.pop(entity, None)
+        
+    def get_thinkers(self):
+        
+        """Returns the entities that should think this tick."""
+        
+        tick = self.tick
+        self.tick += 1
+        queue = self.queue
+        scheduled = self.scheduled
+        budget = self.budget
+        if budget is None:
+            budget = len(queue)
+            
+        thinkers = []
+        while queue and queue[0][0] <= tick and len(thinkers) < budget:
+            due_tick, order, entity = heappop(queue)
+            if scheduled.get(entity) == order:
+                thinkers.append(entity)
+        return thinkers
+    
+    def reschedule(self, thinkers):
+        
+        """Schedules the next think for entities that have just thought."""
+        
+        tick = self.tick
+        scheduled = self.scheduled
+        for entity in thinkers:
+            if entity in scheduled:
+                self.schedule(entity, tick - 1 + entity.get_think_interval())
+    
+    
+class World(object):
+    
+    def __init__(self, group_states=False, think_scheduler=None, think_pool=None,
+                 random_service=None, pheromones=None):
+        
+        if group_states and think_pool is not None:
+            raise ValueError("A think pool can not be used with group_states")
+        
+        self.entities = EntityRegistry()
+        self.spatial_index = SpatialGrid()
+        
+        # Without a scheduler every entity thinks every tick
+        self.think_scheduler = think_scheduler
+        
+        # When grouping states, entities with shared states think a whole
+        # state at a time, and everything else thinks one entity at a time
+        self.group_states = group_states
+        self.state_groups = {}
+        self.entity_states = {}
+        self.solo_entities = {}
+        
+        # With a think pool, entities think in batches on several threads
+        self.think_pool = think_pool
+        
+        # Without one, the changes buffered while thinking (see defer)
+        self.commands = None
+        
+        # With a random service, each entity has its own stream of numbers
+        self.random_service = random_service
+        
+        # With a pheromone field, ants lay trails for other ants to follow
+        self.pheromones = pheromones
+        
+        # How long the think and move phases of the last process took, in
+        # seconds
+        self.think_seconds = 0.
+        self.move_seconds = 0.
+        
+        # If this is a list, images drawn on to the background for good
+        # (dropped leaves) are also recorded in it, e.g. to send to replicas
+        self.stamps = None
+        
+        self.draw_list = DrawList()
+        
         self.background = pygame.surface.Surface(SCREEN_SIZE).convert()
         self.background.fill((255, 255, 255))
         pygame.draw.circle(self.background, (200, 255, 200), NEST_POSITION, int(NEST_SIZE))
         
     def add_entity(self, entity):
         
-        self.entities[self.entity_id] = entity
-        entity.id = self.entity_id
-        self.entity_id += 1
+        self.entities.add(entity)
+        self.spatial_index.insert(entity)
+        if self.think_scheduler is not None:
+            self.think_scheduler.add(entity)
+        
+        if self.group_states:
+            if isinstance(entity.brain, SharedStateMachine):
+                state = entity.brain.active_state
+                self.entity_states[entity] = state
+                self.state_groups.setdefault(state, {})[entity] = None
+            else:
+                self.solo_entities[entity] = None
         
     def remove_entity(self, entity):
         
-        del self.entities[entity.id]
+        if self.defer(entity, self.remove_entity, entity):
+            return
+        
+        self.entities.remove(entity)
+        self.spatial_index.remove(entity)
+        if self.think_scheduler is not None:
+            self.think_scheduler.remove(entity)
+        
+        if self.group_states:
+            if entity in self.entity_states:
+                state = self.entity_states.pop(entity)
+                del self.state_groups[state][entity]
+            else:
+                del self.solo_entities[entity]
+                
+    def defer(self, entity, method, *args):
+        
+        """While entities think, a change that reaches outside of the
+        entity that is thinking is buffered and made once every entity has
+        finished, so no entity sees what another did on the same tick and
+        the result is the same with or without a think pool. Returns True
+        if the call was buffered, in which case the caller should not make
+        the change now. A buffered change is dropped if entity has left the
+        world before it is made."""
+        
+        pool = self.think_pool
+        if pool is not None:
+            return pool.defer(entity, method, args)
+        commands = self.commands
+        if commands is None:
+            return False
+        commands.append((entity, method, args))
+        return True
+    
+    def run_commands(self, commands):
+        
+        """Makes the changes buffered by defer, in the order they were
+        buffered."""
+        
+        is_alive = self.entities.is_alive
+        for entity, method, args in commands:
+            if is_alive(entity):
+                method(*args)
+    
+    def get_random(self, entity=None):
+        
+        """Returns the random number generator for an entity to use (or
+        for the world if entity is None). With a random service each entity
+        has its own, otherwise each batch of a think pool has its own."""
+        
+        random_service = self.random_service
+        if random_service is not None:
+            # Most calls are for an entity that already has a stream
+            stream = entity is not None and entity.random_stream
+            if stream:
+                return stream
+            return random_service.get_entity_stream(entity)
+        pool = self.think_pool
+        if pool is None:
+            return random
+        return pool.get_random()
+        
+    def state_changed(self, entity, old_state, new_state):
+        
+        if entity in self.entity_states:
+            del self.state_groups[old_state][entity]
+            self.entity_states[entity] = new_state
+            self.state_groups.setdefault(new_state, {})[entity] = None
+        
+    def set_entity_location(self, entity, location):
+        
+        entity._location = location
+        self.spatial_index.update(entity)
+        
+    def set_entity_destination(self, entity, destination):
+        
+        entity._destination = destination
+        
+    def set_entity_speed(self, entity, speed):
+        
+        entity._speed = speed
                 
     def get(self, entity_id):
         
-        if entity_id in self.entities:
-            return self.entities[entity_id]
-        else:
-            return None
+        return self.entities.get(entity_id)
         
     def process(self, time_passed):
                 
+        # Entities added or removed during the tick are added to or removed
+        # from the packed list at the end of the tick
         time_passed_seconds = time_passed / 1000.0        
-        for entity in list(self.entities.values()):
-            entity.process(time_passed_seconds)
+        profiler = _profiler
+        timer = perf_counter if profiler is None else profiler.timer
+        self.entities.lock()
+        try:
+            start = timer()
+            self.think()
+            think_end = timer()
+            self.move(time_passed_seconds)
+            move_end = timer()
+        finally:
+            self.entities.unlock()
+        
+        self.think_seconds = think_end - start
+        self.move_seconds = move_end - think_end
+        if profiler is not None:
+            profiler.add_time("world", "think", self.think_seconds)
+            profiler.add_time("world", "move", self.move_seconds)
+        
+    def think(self):
+        
+        # Every entity decides what to do before any of them move
+        scheduler = self.think_scheduler
+        if scheduler is None:
+            thinkers = None
+        else:
+            thinkers = scheduler.get_thinkers()
+            
+        entities = self.entities
+        entities.lock()
+        try:
+            if self.think_pool is not None:
+                if thinkers is None:
+                    thinkers = entities.values()
+                self.think_pool.think(self, thinkers)
+            else:
+                # One batch, with the same buffered changes as a think pool
+                self.commands = []
+                try:
+                    if self.group_states:
+                        self.think_groups(thinkers)
+                    else:
+                        if thinkers is None:
+                            thinkers = entities.values()
+                        if _profiler is not None:
+                            self.think_profiled(thinkers)
+                        else:
+                            is_alive = entities.is_alive
+                            for entity in thinkers:
+                                if is_alive(entity):
+                                    entity.think()
+                finally:
+                    commands = self.commands
+                    self.commands = None
+                self.run_commands(commands)
+        finally:
+            entities.unlock()
+                
+        if scheduler is not None:
+            scheduler.reschedule(thinkers)
+            
+    def think_profiled(self, thinkers):
+        
+        # The same as thinking one entity at a time, but timing each of them
+        profiler = _profiler
+        timer = profiler.timer
+        add_time = profiler.add_time
+        is_alive = self.entities.is_alive
+        for entity in thinkers:
+            if is_alive(entity):
+                start = timer()
+                entity.think()
+                add_time("think", entity.name, timer() - start)
+            
+    def think_groups(self, thinkers=None):
+        
+        if thinkers is None:
+            solo_entities = list(self.solo_entities)
+            state_groups = self.state_groups
+        else:
+            solo_entities = []
+            state_groups = {}
+            entity_states = self.entity_states
+            for entity in thinkers:
+                if entity in entity_states:
+                    state_groups.setdefault(entity_states[entity], {})[entity] = None
+                else:
+                    solo_entities.append(entity)
+                    
+        profiler = _profiler
+        if profiler is not None:
+            self.think_profiled(solo_entities)
+        else:
+            is_alive = self.entities.is_alive
+            for entity in solo_entities:
+                if is_alive(entity):
+                    entity.think()
+            
+        # Each state runs for its whole group, and the changes of state are
+        # made once every group has had its turn
+        transitions = []
+        for state, group in list(state_groups.items()):
+            if state is None or not group:
+                continue
+            entities = list(group)
+            if profiler is not None:
+                start = profiler.timer()
+            state.do_group_actions(entities)
+            transitions.extend(state.check_group_conditions(entities))
+            if profiler is not None:
+                profiler.add_time("state", state.name, profiler.timer() - start,
+                                  len(entities))
+            
+        entity_states = self.entity_states
+        for entity, new_state_name in transitions:
+            if entity in entity_states:
+                entity.brain.set_state(new_state_name)
+            
+    def move(self, time_passed_seconds):
+        
+        self.update_pheromones()
+        
+        entities = self.entities
+        entities.lock()
+        try:
+            is_alive = entities.is_alive
+            for entity in entities.values():
+                if is_alive(entity):
+                    entity.move(time_passed_seconds)
+        finally:
+            entities.unlock()
+            
+    def stamp(self, image, position):
+        
+        """Draws an image on to the background for good."""
+        
+        self.background.blit(image, position)
+        if self.stamps is not None:
+            self.stamps.append((image, position))
+            
+    def update_pheromones(self):
+        
+        # Trails spread out and fade once per tick
+        if self.pheromones is not None:
+            self.pheromones.update()
             
     def render(self, surface):
         
+        if _profiler is not None:
+            self.render_profiled(surface)
+            return
+        
         surface.blit(self.background, (0, 0))
+        draw_list = self.draw_list
         for entity in self.entities.values():
-            entity.render(surface)
+            entity.draw(draw_list)
+        draw_list.flush(surface)
+        
+    def render_profiled(self, surface):
+        
+        # The same as render, but timing the whole of it and each entity
+        profiler = _profiler
+        timer = profiler.timer
+        add_time = profiler.add_time
+        render_start = timer()
+        
+        surface.blit(self.background, (0, 0))
+        draw_list = self.draw_list
+        for entity in self.entities.values():
+            start = timer()
+            entity.draw(draw_list)
+            add_time("draw", entity.name, timer() - start)
+        draw_list.flush(surface)
+        
+        add_time("world", "render", timer() - render_start)
             
             
     def get_close_entity(self, name, location, e_range=100):
         
-        location = Vector2(*location)
-
-        
-        for entity in self.entities.values():
-
-            if entity.name == name:                
-                distance = location.get_distance_to(entity.location)
-                if distance < e_range:
-                    return entity        
+        nearest = self.spatial_index.query_nearest(name, location, 1, e_range)
+        if nearest:
+            return nearest[0][1]
         return None
+    
+    def get_entities_in_range(self, name, location, e_range):
+        
+        return [entity for distance_squared, entity in
+                self.spatial_index.query_range(name, location, e_range)]
+    
+    def get_nearest_entities(self, name, location, count, e_range=None):
+        
+        return [entity for distance_squared, entity in
+                self.spatial_index.query_nearest(name, location, count, e_range)]
   
 
+class DrawList(object):
+    
+    """Collects what is to be drawn in a frame. Entities add their sprites
+    and fills while rendering, and flush draws them sorted by layer and then
+    by image, with all of the sprites of a layer drawn by a single
+    Surface.blits call. Fills are drawn over the sprites of their layer."""
+    
+    def __init__(self):
+        
+        # The positions of the sprites, in a list per layer and image, so
+        # they are already sorted when it comes to drawing them
+        self.sprites = {}
+        self.fills = {}
+        
+    def __len__(self):
+        
+        return sum(map(len, self.sprites.values())) + \
+               sum(map(len, self.fills.values()))
+        
+    def add(self, image, position, layer=LAYER_CREATURES):
+        
+        try:
+            self.sprites[layer, image].append(position)
+        except KeyError:
+            self.sprites[layer, image] = [position]
+        
+    def fill(self, color, rect, layer=LAYER_OVERLAY):
+        
+        self.fills.setdefault(layer, []).append((color, rect))
+        
+    def clear(self):
+        
+        self.sprites = {}
+        self.fills = {}
+        
+    def flush(self, surface):
+        
+        """Draws everything in the list to a surface, and empties it."""
+        
+        layers = {}
+        for key in sorted(self.sprites, key=_draw_order):
+            layer, image = key
+            layers.setdefault(layer, []).append(zip(repeat(image), self.sprites[key]))
+            
+        fills = self.fills
+        for layer in sorted(set(layers) | set(fills)):
+            if layer in layers:
+                surface.blits(chain.from_iterable(layers[layer]), doreturn=False)
+            if layer in fills:
+                self._fill(surface, fills[layer])
+        self.clear()
+        
+    def _fill(self, surface, fills):
+        
+        # Clipped first, as fill moves a rect that is partly off the left
+        # of the surface rather than clipping it
+        clip_rect = surface.get_rect()
+        for color, rect in fills:
+            surface.fill(color, pygame.Rect(rect).clip(clip_rect))
+            
+            
+def _draw_order(key):
+    
+    layer, image = key
+    return (layer, id(image))
+            
+            
+class DirtyRenderer(object):
+    
+    """Draws a World by only restoring the background under the entities
+    that have moved or changed since the last frame, and redrawing the
+    entities there. render returns the rectangles of the screen that
+    changed, to pass to pygame.display.update."""
+    
+    def __init__(self, world, max_dirty_fraction=MAX_DIRTY_FRACTION):
+        
+        self.world = world
+        self.max_dirty_fraction = max_dirty_fraction
+        self.drawn = {}
+        self.full_redraw = True
+        
+    def invalidate(self):
+        
+        """Redraws everything on the next frame, e.g. if the screen has been
+        drawn over."""
+        
+        self.full_redraw = True
+        
+    def render(self, surface):
+        
+        profiler = _profiler
+        if profiler is None:
+            return self.render_changes(surface)
+        
+        start = profiler.timer()
+        dirty = self.render_changes(surface)
+        profiler.add_time("world", "dirty render", profiler.timer() - start)
+        return dirty
+        
+    def render_changes(self, surface):
+        
+        entities = self.world.entities.values()
+        drawn = self.drawn
+        new_drawn = {}
+        dirty = []
+        dirty_area = 0
+        
+        for entity in entities:
+            rect = entity.get_rect()
+            # Any movement counts, as blit rounds to the nearest pixel
+            look = (tuple(entity.location), entity.get_look())
+            new_drawn[entity] = (rect, look)
+            old = drawn.pop(entity, None)
+            if old is None:
+                changed = rect
+            else:
+                old_rect, old_look = old
+                if old_look == look:
+                    continue
+                # A sprite that has moved a little is one rectangle
+                if old_rect.colliderect(rect):
+                    changed = old_rect.union(rect)
+                else:
+                    dirty.append(old_rect)
+                    dirty_area += old_rect.w * old_rect.h
+                    changed = rect
+            dirty.append(changed)
+            dirty_area += changed.w * changed.h
+            
+        # Anything left over was removed from the world
+        for rect, look in drawn.values():
+            dirty.append(rect)
+            dirty_area += rect.w * rect.h
+        self.drawn = new_drawn
+        
+        screen_rect = surface.get_rect()
+        if self.full_redraw or \
+           dirty_area > screen_rect.w * screen_rect.h * self.max_dirty_fraction:
+            self.full_redraw = False
+            self.world.render(surface)
+            return [screen_rect]
+        if not dirty:
+            return []
+        
+        # Each area is restored and the entities that overlap it are redrawn
+        # in the usual order, clipped so that nothing outside it is touched
+        background = self.world.background
+        draw_list = self.world.draw_list
+        rects = [new_drawn[entity][0] for entity in entities]
+        old_clip = surface.get_clip()
+        for rect in dirty:
+            surface.set_clip(rect)
+            surface.blit(background, rect, rect)
+            for index in rect.collidelistall(rects):
+                entities[index].draw(draw_list)
+            draw_list.flush(surface)
+        surface.set_clip(old_clip)
+        return dirty
+                    
+
 class GameEntity(object):
     
+    think_interval = 1
+    layer = LAYER_CREATURES
+    
     def __init__(self, world, name, image):
         
         self.world = world
@@ -129,18 +1102,93 @@ class GameEntity(object):
         
         self.brain = StateMachine()
         
-        self.id = 0
+        self.id = None
+        self.random_stream = None
+        
+    # Changes go through the world, which keeps its spatial index (and any
+    # other per-entity storage) up to date
+    
+    def get_location(self):
+        
+        return self._location
+    
+    def set_location(self, location):
+        
+        self.world.set_entity_location(self, location)
+        
+    location = property(get_location, set_location)
+    
+    def get_destination(self):
+        
+        return self._destination
+    
+    def set_destination(self, destination):
+        
+        self.world.set_entity_destination(self, destination)
+        
+    destination = property(get_destination, set_destination)
+    
+    def get_speed(self):
+        
+        return self._speed
+    
+    def set_speed(self, speed):
+        
+        self.world.set_entity_speed(self, speed)
+        
+    speed = property(get_speed, set_speed)
+    
+    def get_image(self):
+        
+        return self._image
+    
+    def set_image(self, image):
+        
+        self._image = image
+        self.sprite_metrics = get_sprite_metrics(image)
+        
+    image = property(get_image, set_image)
         
     def render(self, surface):
         
+        draw_list = DrawList()
+        self.draw(draw_list)
+        draw_list.flush(surface)
+        
+    def draw(self, draw_list):
+        
+        x, y = self.location
+        w, h, half_w, half_h = self.sprite_metrics
+        draw_list.add(self._image, (x-half_w, y-half_h), self.layer)
+        
+    def get_rect(self):
+        
+        # The area of the screen that render draws to, with a pixel to
+        # spare for rounding
         x, y = self.location
-        w, h = self.image.get_size()
-        surface.blit(self.image, (x-w/2, y-h/2))   
+        w, h, half_w, half_h = self.sprite_metrics
+        return pygame.Rect(int(x-half_w) - 1, int(y-half_h) - 1, w + 2, h + 2)
+    
+    def get_look(self):
+        
+        # Changes when the entity would be drawn differently in the same place
+        return self.image
         
     def process(self, time_passed):
         
+        self.think()
+        self.move(time_passed)
+        
+    def think(self):
+        
         self.brain.think()
         
+    def get_think_interval(self):
+        
+        return self.think_interval
+        
+    def move(self, time_passed):
+        
         if self.speed > 0 and self.location != self.destination:
             
             vec_to_destination = self.destination - self.location        
@@ -152,45 +1200,64 @@ class GameEntity(object):
 
 class Leaf(GameEntity):
     
+    # Leaves have nothing to think about
+    think_interval = 30
+    layer = LAYER_GROUND
+    
     def __init__(self, world, image):
         GameEntity.__init__(self, world, "leaf", image)
         
         
 class Spider(GameEntity):
     
+    # Only needs to check if it has left the screen
+    think_interval = 5
+    
     def __init__(self, world, image):
         GameEntity.__init__(self, world, "spider", image)
-        self.dead_image = pygame.transform.flip(image, 0, 1)
+        self.dead_image = get_dead_image(image)
         self.health = 25
-        self.speed = 50 + randint(-20, 20)
+        self.speed = 50 + world.get_random().randint(-20, 20)
         
     def bitten(self):
         
+        if self.world.defer(self, self.bitten):
+            return
+        
         self.health -= 1
         if self.health <= 0:
             self.speed = 0
             self.image = self.dead_image
         self.speed = 140
         
-    def render(self, surface):
+    def draw(self, draw_list):
         
-        GameEntity.render(self, surface)
+        GameEntity.draw(self, draw_list)
                 
         x, y = self.location
-        w, h = self.image.get_size()
         bar_x = x - 12
-        bar_y = y + h/2
-        surface.fill( (255, 0, 0), (bar_x, bar_y, 25, 4))
-        surface.fill( (0, 255, 0), (bar_x, bar_y, self.health, 4))
+        bar_y = y + self.sprite_metrics[3]
+        draw_list.fill( (255, 0, 0), (bar_x, bar_y, 25, 4))
+        draw_list.fill( (0, 255, 0), (bar_x, bar_y, max(self.health, 0), 4))
         
-    def process(self, time_passed):
+    def get_rect(self):
+        
+        x, y = self.location
+        bar_rect = pygame.Rect(int(x - 12) - 1, int(y + self.sprite_metrics[3]) - 1, 27, 6)
+        return GameEntity.get_rect(self).union(bar_rect)
+    
+    def get_look(self):
+        
+        return (self.image, self.health)
+        
+    def think(self):
         
         x, y = self.location
         if x > SCREEN_SIZE[0] + 2:
             self.world.remove_entity(self)
             return
         
-        GameEntity.process(self, time_passed)
+        GameEntity.think(self)
         
     
 class Ant(GameEntity):
@@ -199,167 +1266,270 @@ class Ant(GameEntity):
         
         GameEntity.__init__(self, world, "ant", image)
         
-        exploring_state = AntStateExploring(self)
-        seeking_state = AntStateSeeking(self)
-        delivering_state = AntStateDelivering(self)
-        hunting_state = AntStateHunting(self)
-        
-        self.brain.add_state(exploring_state)
-        self.brain.add_state(seeking_state)
-        self.brain.add_state(delivering_state)
-        self.brain.add_state(hunting_state)
+        # The states are shared by every ant, this ant's data is kept here
+        self.brain = SharedStateMachine(self, ANT_STATES)
         
         self.carry_image = None
+        self.leaf_id = None
+        self.spider_id = None
+        self.got_kill = False
+        self.trail_strength = 0.
+        
+    def get_think_interval(self):
+        
+        state = self.brain.active_state
+        if state is None:
+            return self.think_interval
+        return state.get_think_interval(self)
         
     def carry(self, image):
         
         self.carry_image = image
+        if image is not None:
+            self.carry_metrics = get_sprite_metrics(image)
+        
+    def pick_up(self, entity, new_state_name=None):
+        
+        # Carries an entity off, removing it from the world, then changes
+        # to new_state_name (if given). When two ants pick up the same
+        # entity on one tick, only the first gets it and changes state
+        if self.world.defer(entity, self.pick_up, entity, new_state_name):
+            return
+        
+        self.carry(entity.image)
+        self.world.remove_entity(entity)
+        if new_state_name is not None:
+            self.brain.set_state(new_state_name)
+        
+    def bite(self, spider):
+        
+        if self.world.defer(spider, self.bite, spider):
+            return
+        
+        spider.bitten()
+        if spider.health <= 0:
+            self.pick_up(spider)
+            self.got_kill = True
         
     def drop(self, surface):
         
+        if self.world.defer(self, self.drop, surface):
+            return
+        
         if self.carry_image:
             x, y = self.location
-            w, h = self.carry_image.get_size()
-            surface.blit(self.carry_image, (x-w, y-h/2))
+            w, h, half_w, half_h = self.carry_metrics
+            if surface is self.world.background:
+                self.world.stamp(self.carry_image, (x-w, y-half_h))
+            else:
+                surface.blit(self.carry_image, (x-w, y-half_h))
             self.carry_image = None
         
-    def render(self, surface):
+    def lay_trail(self):
+        
+        # Deposits pheromone where the ant is, a little less every time
+        if self.world.defer(self, self.lay_trail):
+            return
+        
+        self.world.pheromones.deposit(self.location, self.trail_strength)
+        self.trail_strength *= TRAIL_FADE
+        
+    def draw(self, draw_list):
         
-        GameEntity.render(self, surface)
+        GameEntity.draw(self, draw_list)
         
         if self.carry_image:
             x, y = self.location
-            w, h = self.carry_image.get_size()
-            surface.blit(self.carry_image, (x-w, y-h/2))
+            w, h, half_w, half_h = self.carry_metrics
+            draw_list.add(self.carry_image, (x-w, y-half_h), LAYER_CARRIED)
+            
+    def get_rect(self):
+        
+        rect = GameEntity.get_rect(self)
+        if self.carry_image:
+            x, y = self.location
+            w, h, half_w, half_h = self.carry_metrics
+            rect.union_ip((int(x-w) - 1, int(y-half_h) - 1, w + 2, h + 2))
+        return rect
+    
+    def get_look(self):
+        
+        return (self.image, self.carry_image)
         
 
-class AntStateExploring(State):
+class AntStateExploring(SharedState):
     
-    def __init__(self, ant):
+    def __init__(self):
+        
+        SharedState.__init__(self, "exploring")
         
-        State.__init__(self, "exploring")
-        self.ant = ant
+    def get_think_interval(self, ant):
         
-    def random_destination(self):
+        # Spiders are only hunted near the nest, away from it the ant only
+        # needs to notice leaves
+        if ant.location.get_distance_to(NEST_POSITION) < NEST_SIZE * 2:
+            return 2
+        return 4
+        
+    def random_destination(self, ant):
         
         w, h = SCREEN_SIZE
-        self.ant.destination = Vector2(randint(0, w), randint(0, h))    
+        randint = ant.world.get_random(ant).randint
+        ant.destination = Vector2(randint(0, w), randint(0, h))    
     
-    def do_actions(self):
+    def follow_trail(self, ant, pheromones):
+        
+        # Walks up the trail, if there is one where the ant is
+        gradient_x, gradient_y = pheromones.sample_gradient(ant.location)
+        gradient = hypot(gradient_x, gradient_y)
+        if gradient < TRAIL_THRESHOLD:
+            return False
+        x, y = ant.location
+        scale = TRAIL_STEP / gradient
+        ant.destination = Vector2(x + gradient_x * scale, y + gradient_y * scale)
+        return True
+    
+    def do_actions(self, ant):
         
-        if randint(1, 20) == 1:
-            self.random_destination()
+        pheromones = ant.world.pheromones
+        if pheromones is not None and self.follow_trail(ant, pheromones):
+            return
+        
+        if ant.world.get_random(ant).randint(1, 20) == 1:
+            self.random_destination(ant)
             
-    def check_conditions(self):
+    def check_conditions(self, ant):
                         
-        leaf = self.ant.world.get_close_entity("leaf", self.ant.location)        
+        leaf = ant.world.get_close_entity("leaf", ant.location)        
         if leaf is not None:
-            self.ant.leaf_id = leaf.id
+            ant.leaf_id = leaf.id
             return "seeking"        
                 
-        spider = self.ant.world.get_close_entity("spider", NEST_POSITION, NEST_SIZE)        
+        spider = ant.world.get_close_entity("spider", NEST_POSITION, NEST_SIZE)        
         if spider is not None:
-            if self.ant.location.get_distance_to(spider.location) < 100:
-                self.ant.spider_id = spider.id
+            if ant.location.get_distance_to(spider.location) < 100:
+                ant.spider_id = spider.id
                 return "hunting"
         
         return None
     
-    def entry_actions(self):
+    def check_group_conditions(self, ants):
+        
+        # The spider near the nest is the same for every ant, so only look
+        # for it once per group
+        world = ants[0].world
+        spider = world.get_close_entity("spider", NEST_POSITION, NEST_SIZE)
+        
+        transitions = []
+        for ant in ants:
+            leaf = world.get_close_entity("leaf", ant.location)
+            if leaf is not None:
+                ant.leaf_id = leaf.id
+                transitions.append((ant, "seeking"))
+            elif spider is not None and \
+                 ant.location.get_distance_to(spider.location) < 100:
+                ant.spider_id = spider.id
+                transitions.append((ant, "hunting"))
+        return transitions
+    
+    def entry_actions(self, ant):
         
-        self.ant.speed = 120. + randint(-30, 30)
-        self.random_destination()
+        ant.speed = 120. + ant.world.get_random(ant).randint(-30, 30)
+        self.random_destination(ant)
         
         
-class AntStateSeeking(State):
+class AntStateSeeking(SharedState):
     
-    def __init__(self, ant):
+    def __init__(self):
         
-        State.__init__(self, "seeking")
-        self.ant = ant
-        self.leaf_id = None
+        SharedState.__init__(self, "seeking")
     
-    def check_conditions(self):
+    def check_conditions(self, ant):
         
-        leaf = self.ant.world.get(self.ant.leaf_id)
+        leaf = ant.world.get(ant.leaf_id)
         if leaf is None:
             return "exploring"
         
-        if self.ant.location.get_distance_to(leaf.location) < 5:
+        if ant.location.get_distance_to(leaf.location) < 5:
         
-            self.ant.carry(leaf.image)
-            self.ant.world.remove_entity(leaf)
-            return "delivering"
+            # Starts delivering once the leaf has been picked up, which is
+            # after every ant has thought
+            ant.pick_up(leaf, "delivering")
         
         return None
     
-    def entry_actions(self):
+    def entry_actions(self, ant):
     
-        leaf = self.ant.world.get(self.ant.leaf_id)
+        leaf = ant.world.get(ant.leaf_id)
         if leaf is not None:                        
-            self.ant.destination = leaf.location
-            self.ant.speed = 160 + randint(-20, 20)
+            ant.destination = leaf.location
+            ant.speed = 160 + ant.world.get_random(ant).randint(-20, 20)
         
         
-class AntStateDelivering(State):
+class AntStateDelivering(SharedState):
     
-    def __init__(self, ant):
+    def __init__(self):
+        
+        SharedState.__init__(self, "delivering")
+        
+    def get_think_interval(self, ant):
         
-        State.__init__(self, "delivering")
-        self.ant = ant
+        # Nothing happens until the ant gets close to the nest
+        if ant.location.get_distance_to(NEST_POSITION) < NEST_SIZE * 1.5:
+            return 1
+        return 4
         
+    def do_actions(self, ant):
         
-    def check_conditions(self):
+        if ant.world.pheromones is not None:
+            ant.lay_trail()
+        
+    def check_conditions(self, ant):
                 
-        if Vector2(*NEST_POSITION).get_distance_to(self.ant.location) < NEST_SIZE:
-            if (randint(1, 10) == 1):
-                self.ant.drop(self.ant.world.background)
+        if ant.location.get_distance_to(NEST_POSITION) < NEST_SIZE:
+            if (ant.world.get_random(ant).randint(1, 10) == 1):
+                ant.drop(ant.world.background)
                 return "exploring"
             
         return None
         
         
-    def entry_actions(self):
+    def entry_actions(self, ant):
         
-        self.ant.speed = 60.        
+        ant.speed = 60.        
+        ant.trail_strength = TRAIL_DEPOSIT
+        randint = ant.world.get_random(ant).randint
         random_offset = Vector2(randint(-20, 20), randint(-20, 20))
-        self.ant.destination = Vector2(*NEST_POSITION) + random_offset       
+        ant.destination = Vector2(*NEST_POSITION) + random_offset       
        
         
-class AntStateHunting(State):
+class AntStateHunting(SharedState):
     
-    def __init__(self, ant):
+    def __init__(self):
         
-        State.__init__(self, "hunting")
-        self.ant = ant
-        self.got_kill = False
+        SharedState.__init__(self, "hunting")
         
-    def do_actions(self):
+    def do_actions(self, ant):
         
-        spider = self.ant.world.get(self.ant.spider_id)
+        spider = ant.world.get(ant.spider_id)
         
         if spider is None:
             return
             
-        self.ant.destination = spider.location
+        ant.destination = spider.location
             
-        if self.ant.location.get_distance_to(spider.location) < 15:
+        if ant.location.get_distance_to(spider.location) < 15:
             
-            if randint(1, 5) == 1:
-                spider.bitten()
-                
-                if spider.health <= 0:
-                    self.ant.carry(spider.image)                
-                    self.ant.world.remove_entity(spider)
-                    self.got_kill = True
+            if ant.world.get_random(ant).randint(1, 5) == 1:
+                ant.bite(spider)
                             
         
-    def check_conditions(self):
+    def check_conditions(self, ant):
         
-        if self.got_kill:
+        if ant.got_kill:
             return "delivering"
         
-        spider = self.ant.world.get(self.ant.spider_id)
+        spider = ant.world.get(ant.spider_id)
                         
         if spider is None:
             return "exploring"
@@ -369,15 +1539,49 @@ class AntStateHunting(State):
         
         return None
 
-    def entry_actions(self):
+    def entry_actions(self, ant):
         
-        self.speed = 160 + randint(0, 50)
+        ant.speed = 160 + ant.world.get_random(ant).randint(0, 50)
 
-    def exit_actions(self):
+    def exit_actions(self, ant):
         
-        self.got_kill = False
+        ant.got_kill = False
 
 
+ANT_STATES = make_state_table(AntStateExploring(),
+                              AntStateSeeking(),
+                              AntStateDelivering(),
+                              AntStateHunting())
+
+    
+def add_ants(world, ant_image, count=ANT_COUNT):
+    
+    w, h = SCREEN_SIZE
+    randint = world.get_random().randint
+    for ant_no in range(count):
+        
+        ant = Ant(world, ant_image)
+        ant.location = Vector2(randint(0, w), randint(0, h))
+        ant.brain.set_state("exploring")
+        world.add_entity(ant)
+        
+        
+def spawn_entities(world, leaf_image, spider_image):
+    
+    w, h = SCREEN_SIZE
+    randint = world.get_random().randint
+    
+    if randint(1, 10) == 1:
+        leaf = Leaf(world, leaf_image)
+        leaf.location = Vector2(randint(0, w), randint(0, h))
+        world.add_entity(leaf)
+        
+    if randint(1, 100) == 1:
+        spider = Spider(world, spider_image)
+        spider.location = Vector2(-50, randint(0, h))
+        spider.destination = Vector2(w+50, randint(0, h))            
+        world.add_entity(spider)
+        
     
 def run():
     
@@ -385,8 +1589,7 @@ def run():
     screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
     
     world = World()
-    
-    w, h = SCREEN_SIZE
+    renderer = DirtyRenderer(world)
     
     clock = pygame.time.Clock()
     
@@ -394,12 +1597,7 @@ def run():
     leaf_image = pygame.image.load("leaf.png").convert_alpha()
     spider_image = pygame.image.load("spider.png").convert_alpha()
     
-    for ant_no in range(ANT_COUNT):
-        
-        ant = Ant(world, ant_image)
-        ant.location = Vector2(randint(0, w), randint(0, h))
-        ant.brain.set_state("exploring")
-        world.add_entity(ant)
+    add_ants(world, ant_image)
     
     
     while True:
@@ -411,21 +1609,11 @@ def run():
         
         time_passed = clock.tick(30)
         
-        if randint(1, 10) == 1:
-            leaf = Leaf(world, leaf_image)
-            leaf.location = Vector2(randint(0, w), randint(0, h))
-            world.add_entity(leaf)
-            
-        if randint(1, 100) == 1:
-            spider = Spider(world, spider_image)
-            spider.location = Vector2(-50, randint(0, h))
-            spider.destination = Vector2(w+50, randint(0, h))            
-            world.add_entity(spider)
+        spawn_entities(world, leaf_image, spider_image)
         
         world.process(time_passed)
-        world.render(screen)
         
-        pygame.display.update()
+        pygame.display.update(renderer.render(screen))
     
 if __name__ == "__main__":    
     run()
@@ -0,0 +1,133 @@
+"""Runs the think step of the ants World in parallel batches.
+
+    world = World(think_pool=ThinkPool(workers=4, seed=1))
+
+The entities that think on a tick are split in to batches of a fixed size.
+Each batch thinks with its own random number generator, seeded from the
+pool's generator, and changes that reach outside of the thinking entity
+(removing an entity, picking something up, biting a spider, dropping a
+leaf) are written to the batch's command buffer rather than made straight
+away. Once every batch has finished, the buffers are replayed in batch
+order. The result only depends on the seed and the batch size, so it is the
+same for any number of workers and is identical to running the batches one
+after another on a single thread. A World without a pool buffers the same
+changes until every entity has thought, so when the entities draw their
+random numbers from a RandomService (see ants_random) rather than from the
+batches' generators, a pooled world matches one without a pool exactly.
+
+The pool only makes the think step faster on free-threaded builds of
+CPython, where the batches run on a thread pool. With the GIL only one
+thread can think at a time, so the batches are run in turn on the calling
+thread, and the pool is a little slower than thinking without one. Entities
+hold pygame Surfaces and live references to the world and to each other, so
+they can not be sent to worker processes; to think on several CPUs with the
+GIL, split the world between processes with ants_sharded instead.
+
+"""
+
+import os
+import sys
+import random
+import threading
+from random import Random
+from concurrent.futures import ThreadPoolExecutor
+
+
+def is_free_threaded():
+
+    """Returns True if this Python runs threads without the GIL."""
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def make_executor(workers=None):
+
+    """Returns a thread pool to think on, or None if the threads would not
+    run at the same time."""
+
+    if not is_free_threaded():
+        return None
+    return ThreadPoolExecutor(workers or os.cpu_count())
+
+
+class ThinkPool(object):
+
+    def __init__(self, workers=None, batch_size=256, seed=0, executor=False):
+
+        """Creates a pool to think with.
+
+        workers -- Number of threads (default is one per CPU)
+        batch_size -- Number of entities in a batch
+        seed -- Seed for the random number generators of the batches
+        executor -- A concurrent.futures executor to run the batches on, or
+        None to run them on the calling thread (default is a thread pool on
+        free-threaded builds)
+
+        """
+
+        if executor is False:
+            executor = make_executor(workers)
+        self.executor = executor
+        self.batch_size = batch_size
+        self.random = Random(seed)
+        self.local = threading.local()
+
+    def close(self):
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def defer(self, entity, method, args):
+
+        # Only buffer on threads that are thinking a batch
+        commands = getattr(self.local, "commands", None)
+        if commands is None:
+            return False
+        commands.append((entity, method, args))
+        return True
+
+    def get_random(self):
+
+        generator = getattr(self.local, "random", None)
+        if generator is None:
+            # Not thinking, e.g. when entities are created
+            return random
+        return generator
+
+    def think_batch(self, job):
+
+        world, batch, seed = job
+        local = self.local
+        local.random = Random(seed)
+        local.commands = commands = []
+        try:
+            is_alive = world.entities.is_alive
+            for entity in batch:
+                if is_alive(entity):
+                    entity.think()
+        finally:
+            local.random = None
+            local.commands = None
+        return commands
+
+    def think(self, world, thinkers):
+
+        """Thinks every entity in thinkers, then makes the changes that
+        were buffered."""
+
+        thinkers = list(thinkers)
+        batch_size = self.batch_size
+        base_seed = self.random.getrandbits(64)
+        jobs = [(world, thinkers[start:start + batch_size], base_seed + batch_no)
+                for batch_no, start in enumerate(range(0, len(thinkers), batch_size))]
+
+        if self.executor is None:
+            buffers = map(self.think_batch, jobs)
+        else:
+            buffers = self.executor.map(self.think_batch, jobs)
+
+        # Changes are made in batch order, whichever batch finished first
+        for commands in list(buffers):
+            world.run_commands(commands)
@@ -0,0 +1,88 @@
+"""A pheromone field for the ants game, which gives the ants a shared memory
+of where food has been found.
+
+    world = World(pheromones=PheromoneField(interval=2))
+
+The field covers the screen with a ScalarGrid. Ants carrying food home
+deposit pheromone in to it as they go, strongest where they found the food
+and fading on the way to the nest. Once per tick (or once every interval
+ticks) the whole field diffuses and evaporates in one vectorized pass, and
+the gradient of every cell is worked out. An exploring ant only looks up
+the gradient of the cell it is in, so following a trail costs the same for
+any number of ants. Requires NumPy.
+
+"""
+
+from math import ceil
+
+from gameobjects.locals import WRAP_CLAMP
+from gameobjects.scalargrid import ScalarGrid
+
+from ants_game import SCREEN_SIZE
+
+# Size of a cell in pixels
+CELL_SIZE = 10
+# Fractions of the field that spread to the next cell, and that evaporate,
+# per tick
+DIFFUSION = 0.2
+EVAPORATION = 0.01
+
+
+class PheromoneField(ScalarGrid):
+
+    def __init__(self, cell_size=CELL_SIZE, diffusion=DIFFUSION,
+                 evaporation=EVAPORATION, interval=1):
+
+        """Creates a pheromone field that covers the screen.
+
+        cell_size -- Size of a cell, in pixels
+        diffusion -- Fraction of a cell that is spread to the cells next to it
+        on an update
+        evaporation -- Fraction of the field that evaporates per tick
+        interval -- Number of ticks between updates
+
+        """
+
+        w, h = SCREEN_SIZE
+        ScalarGrid.__init__(self, int(ceil(w / float(cell_size))),
+                                  int(ceil(h / float(cell_size))),
+                                  WRAP_CLAMP, WRAP_CLAMP, cell_size)
+
+        self.diffusion = diffusion
+        self.interval = interval
+        # Evaporate as much on one update as on interval ticks
+        self.update_evaporation = 1. - (1. - evaporation) ** interval
+        self.tick_no = 0
+
+        self.gradient_x = [[0.] * self.width for row in range(self.height)]
+        self.gradient_y = [[0.] * self.width for row in range(self.height)]
+
+    def update(self):
+
+        """Called once per tick, spreads and evaporates the field on every
+        interval'th tick."""
+
+        self.tick_no += 1
+        if self.tick_no % self.interval:
+            return
+
+        self.diffuse(self.diffusion)
+        self.evaporate(self.update_evaporation)
+
+        # Lists are quicker than NumPy to read one cell at a time
+        gradient_x, gradient_y = self.get_gradients()
+        self.gradient_x = gradient_x.tolist()
+        self.gradient_y = gradient_y.tolist()
+
+    def sample_gradient(self, position):
+
+        """Returns the gradient of the cell that contains a position, as it
+        was on the last update."""
+
+        x, y = position
+        cell_size = self.cell_size
+        cell_x = int(x // cell_size)
+        cell_y = int(y // cell_size)
+        if not (0 <= cell_x < self.width and 0 <= cell_y < self.height):
+            cell_x, cell_y = self.get_cell(position)
+        return self.gradient_x[cell_y][cell_x], self.gradient_y[cell_y][cell_x]
@@ -0,0 +1,175 @@
+"""Counts and times what the ants game spends its time on.
+
+    profiler = Profiler()
+    with profiler:
+        for tick in range(1000):
+            world.process(time_passed)
+            world.render(screen)
+    print(profiler.format_table())
+    profiler.write_csv("profile.csv")
+
+While a profiler is active (see ants_game.set_profiler), the game records
+the number of calls, and the total and longest time, for:
+
+  * world -- the think and move phases of World.process, World.render and
+    DirtyRenderer.render (which includes any World.render it falls back on)
+  * state -- the actions and conditions of every state, by state name
+  * think -- the think step of every entity, by entity name
+  * draw -- adding every entity to the draw list, by entity name
+
+It also counts the changes from one state to another. Without an active
+profiler the game only checks a global for None in the places that would
+record something, so profiling costs next to nothing when it is off.
+
+Times include any time spent in the profiler itself, which is small
+compared with a state but not with drawing a single sprite. The counters
+are not locked, so profile with the think step on one thread. Sharded
+worlds think in other processes, and only record their world phases.
+
+"""
+
+import csv
+import time
+
+import ants_game
+
+# The order categories are listed in, any others come after
+CATEGORIES = ("world", "state", "think", "draw")
+
+
+class Profiler(object):
+
+    def __init__(self, timer=time.perf_counter):
+
+        """Creates a profiler with no records.
+
+        timer -- Function that returns a time in seconds
+
+        """
+
+        self.timer = timer
+        # A list of [calls, total seconds, longest seconds] per
+        # (category, name)
+        self.stats = {}
+        # Number of changes per (old state name, new state name), the old
+        # name is None for an entity's first state
+        self.transitions = {}
+
+    def __enter__(self):
+
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.stop()
+
+    def start(self):
+
+        """Makes this the profiler the game records to."""
+
+        ants_game.set_profiler(self)
+
+    def stop(self):
+
+        """Stops the game recording, if it is recording to this profiler."""
+
+        if ants_game.get_profiler() is self:
+            ants_game.set_profiler(None)
+
+    def reset(self):
+
+        """Forgets everything that has been recorded."""
+
+        self.stats.clear()
+        self.transitions.clear()
+
+    def add_time(self, category, name, seconds, calls=1):
+
+        """Records the time taken by one or more calls.
+
+        category -- Kind of thing that was timed (e.g. "state")
+        name -- What was timed (e.g. a state name)
+        seconds -- Time taken, in seconds
+        calls -- Number of calls the time covers, the longest time is
+        for all of them together
+
+        """
+
+        stat = self.stats.get((category, name))
+        if stat is None:
+            self.stats[(category, name)] = [calls, seconds, seconds]
+            return
+        stat[0] += calls
+        stat[1] += seconds
+        if seconds > stat[2]:
+            stat[2] = seconds
+
+    def add_transition(self, old_name, new_name):
+
+        """Counts a change of state."""
+
+        key = (old_name, new_name)
+        transitions = self.transitions
+        transitions[key] = transitions.get(key, 0) + 1
+
+    def get_rows(self):
+
+        """Returns a list of (category, name, calls, total seconds, mean
+        seconds, longest seconds), by category and then the longest total
+        first."""
+
+        def get_order(item):
+            (category, name), (calls, total, longest) = item
+            if category in CATEGORIES:
+                category_order = (CATEGORIES.index(category), "")
+            else:
+                category_order = (len(CATEGORIES), category)
+            return category_order, -total, str(name)
+
+        return [ (category, name, calls, total, total / calls if calls else 0., longest)
+                 for (category, name), (calls, total, longest)
+                 in sorted(self.stats.items(), key=get_order) ]
+
+    def get_transition_rows(self):
+
+        """Returns a list of (old state name, new state name, count), the
+        most common first."""
+
+        return sorted( ((old_name, new_name, count)
+                        for (old_name, new_name), count in self.transitions.items()),
+                       key=lambda row: (-row[2], str(row[0]), str(row[1])) )
+
+    def format_table(self):
+
+        """Returns the records as a table of text."""
+
+        lines = ["%-8s %-20s %10s %12s %10s %10s" %
+                 ("category", "name", "calls", "total ms", "mean us", "max us")]
+        for category, name, calls, total, mean, longest in self.get_rows():
+            lines.append("%-8s %-20s %10i %12.3f %10.2f %10.2f" %
+                         (category, name, calls, total * 1e3, mean * 1e6, longest * 1e6))
+
+        transition_rows = self.get_transition_rows()
+        if transition_rows:
+            lines.append("")
+            lines.append("%-20s %-20s %10s" % ("from state", "to state", "count"))
+            for old_name, new_name, count in transition_rows:
+                lines.append("%-20s %-20s %10i" % (old_name or "-", new_name, count))
+        return "\n".join(lines)
+
+    def write_csv(self, filename):
+
+        """Writes the records to a CSV file, one row per record and then one
+        per transition (with the category "transition", the name "old>new"
+        and only a number of calls)."""
+
+        with open(filename, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(("category", "name", "calls", "total_ms", "mean_us", "max_us"))
+            for category, name, calls, total, mean, longest in self.get_rows():
+                writer.writerow((category, name, calls, "%.6f" % (total * 1e3),
+                                 "%.3f" % (mean * 1e6), "%.3f" % (longest * 1e6)))
+            for old_name, new_name, count in self.get_transition_rows():
+                writer.writerow(("transition", "%s>%s" % (old_name or "", new_name),
+                                 count, "", "", ""))
@@ -0,0 +1,137 @@
+"""Random numbers for the ants game, drawn from NumPy in blocks.
+
+    world = World(random_service=RandomService(seed=1))
+
+Every entity gets its own stream, seeded from the service's seed and the
+entity's id, so the numbers an entity gets do not depend on how many other
+entities there are or the order they think in. A World buffers the changes
+entities make to each other until every entity has thought, so a replay
+with the same seed simulates exactly the same world, with or without a
+ThinkPool (see ants_parallel). Without a service the batches of a ThinkPool
+each draw from their own generator, and the world is different. Shards of a
+world can be given their own service with spawn.
+
+Each stream fills a list of floats with one call to NumPy, and hands them
+out one at a time, which is quicker than calling the random module for
+every number. Requires NumPy.
+
+"""
+
+import numpy
+
+# Floats drawn at a time by an entity's stream, and by the world's stream
+BLOCK_SIZE = 64
+WORLD_BLOCK_SIZE = 4096
+
+
+class RandomStream(object):
+
+    """A seeded source of random numbers with the same randint and random
+    methods as the random module, plus some that draw arrays."""
+
+    __slots__ = ('generator', 'block_size', 'block')
+
+    def __init__(self, seed_sequence, block_size=BLOCK_SIZE):
+
+        """Creates a stream.
+
+        seed_sequence -- A numpy.random.SeedSequence
+        block_size -- Number of floats to draw at a time
+
+        """
+
+        self.generator = numpy.random.Generator(numpy.random.PCG64(seed_sequence))
+        self.block_size = block_size
+        self.block = []
+
+    def _refill(self):
+
+        # Numbers are taken from the end of the block, which is quickest
+        self.block = self.generator.random(self.block_size).tolist()
+        return self.block
+
+    def random(self):
+        """Returns a float in the range [0, 1)."""
+
+        block = self.block or self._refill()
+        return block.pop()
+
+    def randint(self, a, b):
+        """Returns an integer in the range [a, b], including both end points."""
+
+        block = self.block or self._refill()
+        return a + int(block.pop() * (b - a + 1))
+
+    def chance(self, probability):
+        """Returns True with the given probability."""
+
+        block = self.block or self._refill()
+        return block.pop() < probability
+
+    def uniform(self, a, b):
+        """Returns a float in the range [a, b)."""
+
+        block = self.block or self._refill()
+        return a + (b - a) * block.pop()
+
+    def integers(self, a, b, count):
+        """Returns an array of count integers in the range [a, b]."""
+
+        return self.generator.integers(a, b, count, endpoint=True)
+
+    def points(self, count, width, height):
+        """Returns a (count, 2) array of points in a width by height area."""
+
+        return self.generator.random((count, 2)) * (width, height)
+
+
+class RandomService(object):
+
+    def __init__(self, seed=0, block_size=BLOCK_SIZE, spawn_key=()):
+
+        """Creates the random number service for a world.
+
+        seed -- Seed for every stream in the service
+        block_size -- Number of floats an entity's stream draws at a time
+        spawn_key -- Identifies a service made by spawn
+
+        """
+
+        self.seed = seed
+        self.block_size = block_size
+        self.spawn_key = tuple(spawn_key)
+        self.stream = RandomStream(self._get_seed_sequence(), WORLD_BLOCK_SIZE)
+
+    def _get_seed_sequence(self, *key):
+
+        return numpy.random.SeedSequence(self.seed, spawn_key=self.spawn_key + key)
+
+    def spawn(self, key):
+
+        """Returns an independent service, e.g. for a shard.
+
+        key -- A non-negative integer that is different for each service
+        spawned from this one
+
+        """
+
+        return RandomService(self.seed, self.block_size, self.spawn_key + (0, key))
+
+    def get_stream(self, key):
+
+        """Returns a new stream for a non-negative integer key. The same key
+        always gives the same numbers."""
+
+        return RandomStream(self._get_seed_sequence(1, key), self.block_size)
+
+    def get_entity_stream(self, entity):
+
+        """Returns the stream for an entity, or the world's stream if the
+        entity has not been added to the world yet."""
+
+        if entity is None or entity.id is None:
+            return self.stream
+        stream = entity.random_stream
+        if stream is None:
+            stream = entity.random_stream = self.get_stream(entity.id)
+        return stream
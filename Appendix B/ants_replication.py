@@ -0,0 +1,776 @@
+"""Streams the state of an ants World to other processes over local sockets,
+and rebuilds it there as a World that is only drawn.
+
+    # In the process that runs the simulation, on its event loop
+    server = ReplicationServer(world, images, port=9200)
+    await server.start()
+    while True:
+        ...simulate a tick...
+        server.publish()
+
+    # In a spectator process
+    client = ReplicationClient(images, port=9200)
+    await client.connect()
+    asyncio.ensure_future(client.run())
+    while True:
+        client.world.interpolate()
+        client.world.render(screen)
+        await asyncio.sleep(1. / 60.)
+
+Or run both ends from the command line:
+
+    python ants_replication.py server --ants 500 --port 9200 [--udp]
+    python ants_replication.py client --port 9200 [--udp]
+
+Once per tick, publish captures the position of every entity, quantised
+to 1/8 of a pixel, along with its image, carried image and health. The
+changes since the last tick are packed in to a single delta frame that is
+shared by every client: the entities that were added or removed, the new
+positions of the ones that moved, the looks that changed and the leaves
+that were dropped on the background. A client gets a keyframe with the
+whole world, background and all, when it connects and deltas after that.
+
+Clients never hold the simulation up, as publish only hands frames to the
+sockets. A TCP client with more than MAX_BUFFERED bytes still waiting to be
+sent is skipped until it catches up, and is then sent a keyframe. Over UDP
+a frame is split in to datagrams, and a client that misses any part of a
+frame asks for a keyframe, which is also sent every KEYFRAME_INTERVAL ticks.
+
+Requires NumPy.
+
+"""
+
+import os
+import json
+import zlib
+import time
+import struct
+import asyncio
+from itertools import chain
+from argparse import ArgumentParser
+
+import numpy
+import pygame
+from pygame.locals import *
+
+from gameobjects.vector2 import Vector2
+
+from ants_game import (World, Ant, Leaf, Spider, SCREEN_SIZE, get_image_names,
+                       get_named_image, add_ants, spawn_entities)
+
+PORT = 9200
+
+# Positions are sent in fixed point, with this many steps per pixel
+QUANTUM = 8
+
+TICK_SECONDS = 1. / 30.
+KEYFRAME_INTERVAL = 30
+MAX_BUFFERED = 1 << 20
+MAX_DATAGRAM = 60000
+# UDP clients say hello this often, and are dropped if they stop
+HELLO_SECONDS = 1.
+CLIENT_TIMEOUT = 5.
+
+KEYFRAME = 1
+DELTA = 2
+
+ENTITY_TYPES = ("ant", "leaf", "spider")
+ENTITY_CLASSES = (Ant, Leaf, Spider)
+
+# Image codes of -1 are None
+SPAWN_DTYPE = numpy.dtype([ ("id", "<u4"),
+                            ("type", "<u1"),
+                            ("image", "<i1"),
+                            ("carry", "<i1"),
+                            ("health", "<i1"),
+                            ("x", "<i2"),
+                            ("y", "<i2") ])
+MOVE_DTYPE = numpy.dtype([("id", "<u4"), ("x", "<i2"), ("y", "<i2")])
+LOOK_DTYPE = numpy.dtype([ ("id", "<u4"),
+                           ("image", "<i1"),
+                           ("carry", "<i1"),
+                           ("health", "<i1") ])
+# Stamps are in whole pixels, as blit truncates the position
+STAMP_DTYPE = numpy.dtype([("image", "<i1"), ("x", "<i2"), ("y", "<i2")])
+REMOVE_DTYPE = numpy.dtype("<u4")
+
+_frame_header = struct.Struct("<BI")
+_delta_counts = struct.Struct("<5I")
+_size = struct.Struct("<I")
+_fragment_header = struct.Struct("<IHH")
+
+# Messages from UDP clients
+HELLO = b"H"
+SEND_KEYFRAME = b"K"
+GOODBYE = b"B"
+
+
+def quantise(points):
+
+    """Returns an (N, 2) array of points in pixels in fixed point."""
+
+    points = numpy.floor(points * QUANTUM + 0.5)
+    return numpy.clip(points, -32768, 32767).astype(numpy.int16)
+
+
+def _pack(records, dtype):
+
+    return numpy.array(records, dtype=dtype).tobytes()
+
+
+class StateEncoder(object):
+
+    """Captures the state of a World once per tick, and packs it in to
+    frames."""
+
+    def __init__(self, world, images, tick_seconds=TICK_SECONDS):
+
+        self.world = world
+        self.tick_seconds = tick_seconds
+        image_names = get_image_names(images)
+        self.asset_names = sorted(set(image_names.values()))
+        codes = dict((name, code) for code, name in enumerate(self.asset_names))
+        self.asset_codes = dict((image, codes[name]) for image, name in image_names.items())
+        self.asset_codes[None] = -1
+        self.type_codes = dict((name, code) for code, name in enumerate(ENTITY_TYPES))
+
+        # The replicated ids and positions that were last sent, sorted by
+        # id, and (type, look, look codes) by id
+        self.keys = numpy.zeros(0, numpy.int64)
+        self.positions = numpy.zeros((0, 2), numpy.int16)
+        self.looks = {}
+        self.tick = 0
+        self.keyframe = None
+        world.stamps = []
+
+    def _get_look_codes(self, entity):
+
+        asset_codes = self.asset_codes
+        health = getattr(entity, "health", 0)
+        return ( asset_codes[entity.image],
+                 asset_codes[getattr(entity, "carry_image", None)],
+                 min(max(health, -128), 127) )
+
+    def capture(self):
+
+        """Captures the world after a tick, and returns the delta frame of
+        the changes since the last capture."""
+
+        self.tick += 1
+        self.keyframe = None
+
+        entities = list(self.world.entities.values())
+        count = len(entities)
+        keys = numpy.fromiter([entity.id for entity in entities], numpy.int64, count)
+        keys &= 0xFFFFFFFF
+        points = numpy.fromiter(chain.from_iterable([entity.location.as_tuple()
+                                                     for entity in entities]),
+                                float, count * 2)
+        positions = quantise(points.reshape(count, 2))
+
+        # Positions are compared with the last tick's all at once, by
+        # finding each id in the sorted ids of the last tick
+        previous_keys = self.keys
+        if len(previous_keys):
+            index = numpy.searchsorted(previous_keys, keys)
+            index[index == len(previous_keys)] = 0
+            found = previous_keys[index] == keys
+            moved = found & (self.positions[index] != positions).any(axis=1)
+            seen = numpy.zeros(len(previous_keys), bool)
+            seen[index[found]] = True
+            removed = previous_keys[~seen]
+        else:
+            moved = numpy.zeros(count, bool)
+            removed = previous_keys
+
+        # Looks are compared one entity at a time, but only looks that have
+        # changed are turned in to codes
+        previous_looks = self.looks
+        looks = {}
+        spawned = []
+        changed = []
+        type_codes = self.type_codes
+        get_look_codes = self._get_look_codes
+        for slot, (key, entity) in enumerate(zip(keys.tolist(), entities)):
+            look = entity.get_look()
+            state = previous_looks.get(key)
+            if state is None:
+                state = (type_codes[entity.name], look, get_look_codes(entity))
+                spawned.append(slot)
+            elif state[1] != look:
+                state = (state[0], look, get_look_codes(entity))
+                changed.append((key,) + state[2])
+            looks[key] = state
+        self.looks = looks
+
+        spawn_records = numpy.zeros(len(spawned), SPAWN_DTYPE)
+        if spawned:
+            spawn_records["id"] = keys[spawned]
+            spawn_records["x"] = positions[spawned, 0]
+            spawn_records["y"] = positions[spawned, 1]
+            spawn_looks = [looks[key] for key in spawn_records["id"].tolist()]
+            spawn_records["type"] = [state[0] for state in spawn_looks]
+            for field, code in (("image", 0), ("carry", 1), ("health", 2)):
+                spawn_records[field] = [state[2][code] for state in spawn_looks]
+
+        move_records = numpy.zeros(int(moved.sum()), MOVE_DTYPE)
+        move_records["id"] = keys[moved]
+        move_records["x"] = positions[moved, 0]
+        move_records["y"] = positions[moved, 1]
+
+        order = numpy.argsort(keys)
+        self.keys = keys[order]
+        self.positions = positions[order]
+
+        asset_codes = self.asset_codes
+        stamps = [(asset_codes[image], int(x), int(y))
+                  for image, (x, y) in self.world.stamps]
+        del self.world.stamps[:]
+
+        return b"".join(( _frame_header.pack(DELTA, self.tick),
+                          _delta_counts.pack(len(spawn_records), len(removed),
+                                             len(move_records), len(changed), len(stamps)),
+                          spawn_records.tobytes(),
+                          removed.astype(REMOVE_DTYPE).tobytes(),
+                          move_records.tobytes(),
+                          _pack(changed, LOOK_DTYPE),
+                          _pack(stamps, STAMP_DTYPE) ))
+
+    def get_keyframe(self):
+
+        """Returns a keyframe of the world as it was at the last capture.
+        The keyframe is only packed once per tick."""
+
+        if self.keyframe is None:
+            table = json.dumps({ "assets": self.asset_names,
+                                 "types": ENTITY_TYPES,
+                                 "quantum": QUANTUM,
+                                 "tick_seconds": self.tick_seconds }).encode("utf-8")
+            background = self.world.background
+            pixels = zlib.compress(pygame.image.tostring(background, "RGB"), 1)
+            size = background.get_size()
+            looks = self.looks
+            spawned = [(key, looks[key][0]) + looks[key][2] + (x, y)
+                       for key, (x, y) in zip(self.keys.tolist(), self.positions.tolist())]
+            self.keyframe = b"".join(( _frame_header.pack(KEYFRAME, self.tick),
+                                       _size.pack(len(table)), table,
+                                       struct.pack("<HH", *size),
+                                       _size.pack(len(pixels)), pixels,
+                                       _size.pack(len(spawned)),
+                                       _pack(spawned, SPAWN_DTYPE) ))
+        return self.keyframe
+
+
+class _TcpClient(asyncio.Protocol):
+
+    def __init__(self, server):
+
+        self.server = server
+        self.transport = None
+        self.needs_keyframe = True
+
+    def connection_made(self, transport):
+
+        self.transport = transport
+        self.server.clients.append(self)
+
+    def connection_lost(self, exc):
+
+        if self in self.server.clients:
+            self.server.clients.remove(self)
+
+
+class _UdpServer(asyncio.DatagramProtocol):
+
+    def __init__(self, server):
+
+        self.server = server
+
+    def datagram_received(self, data, address):
+
+        clients = self.server.udp_clients
+        if data == GOODBYE:
+            clients.pop(address, None)
+            return
+        client = clients.get(address)
+        if client is None:
+            client = clients[address] = [0., True]
+        client[0] = time.monotonic()
+        if data == SEND_KEYFRAME:
+            client[1] = True
+
+
+class ReplicationServer(object):
+
+    def __init__(self, world, images, host="127.0.0.1", port=PORT, udp=False,
+                 tick_seconds=TICK_SECONDS, keyframe_interval=KEYFRAME_INTERVAL):
+
+        """Creates a server that streams a world to clients.
+
+        world -- The World to stream
+        images -- Dictionary of the images the entities use, by name (the
+        clients need the same names)
+        host -- Address to listen on
+        port -- Port to listen on, or 0 to pick a free port
+        udp -- If True, clients connect over UDP, otherwise TCP
+        tick_seconds -- Time between calls to publish
+        keyframe_interval -- Ticks between keyframes for UDP clients
+
+        """
+
+        self.encoder = StateEncoder(world, images, tick_seconds)
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.keyframe_interval = keyframe_interval
+
+        self.clients = []
+        self.udp_clients = {}
+        self.server = None
+        self.transport = None
+        self.skipped_frames = 0
+
+    async def start(self):
+
+        """Starts listening for clients."""
+
+        loop = asyncio.get_running_loop()
+        if self.udp:
+            self.transport, protocol = await loop.create_datagram_endpoint(
+                lambda: _UdpServer(self), local_addr=(self.host, self.port))
+            self.port = self.transport.get_extra_info("sockname")[1]
+        else:
+            self.server = await loop.create_server(lambda: _TcpClient(self),
+                                                   self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        for client in self.clients:
+            client.transport.close()
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def publish(self):
+
+        """Sends the changes to the world since the last call to every
+        client. Call once per tick, from the thread that runs the event
+        loop."""
+
+        encoder = self.encoder
+        delta = encoder.capture()
+
+        for client in self.clients:
+            transport = client.transport
+            if transport.get_write_buffer_size() > MAX_BUFFERED:
+                # Too far behind, so it will need to start again
+                client.needs_keyframe = True
+                self.skipped_frames += 1
+                continue
+            if client.needs_keyframe:
+                client.needs_keyframe = False
+                frame = encoder.get_keyframe()
+            else:
+                frame = delta
+            transport.writelines((_size.pack(len(frame)), frame))
+
+        if self.transport is not None:
+            self._publish_udp(delta)
+
+    def _publish_udp(self, delta):
+
+        encoder = self.encoder
+        transport = self.transport
+        now = time.monotonic()
+        keyframe_due = encoder.tick % self.keyframe_interval == 0
+        for address, client in list(self.udp_clients.items()):
+            last_seen, needs_keyframe = client
+            if now - last_seen > CLIENT_TIMEOUT:
+                del self.udp_clients[address]
+                continue
+            if transport.get_write_buffer_size() > MAX_BUFFERED:
+                client[1] = True
+                self.skipped_frames += 1
+                continue
+            if needs_keyframe or keyframe_due:
+                client[1] = False
+                frame = encoder.get_keyframe()
+            else:
+                frame = delta
+            parts = (len(frame) + MAX_DATAGRAM - 1) // MAX_DATAGRAM
+            for part in range(parts):
+                chunk = frame[part * MAX_DATAGRAM:(part + 1) * MAX_DATAGRAM]
+                transport.sendto(_fragment_header.pack(encoder.tick, part, parts) + chunk,
+                                 address)
+
+
+class ReplicaWorld(World):
+
+    """A World that shows the state sent by a ReplicationServer. It is only
+    drawn, never processed."""
+
+    def __init__(self, images):
+
+        World.__init__(self)
+        self.images = images
+        self.assets = []
+        self.types = ENTITY_TYPES
+        self.quantum = float(QUANTUM)
+        self.tick_seconds = TICK_SECONDS
+
+        self.replicas = {}
+        self.moving = {}
+        self.tick = None
+        self.tick_time = None
+
+    def set_entity_location(self, entity, location):
+
+        # Nothing looks entities up by location
+        entity._location = location
+
+    def apply(self, frame):
+
+        """Applies a frame from the server. Returns False if the frame is a
+        delta that does not follow on from the last frame, in which case a
+        keyframe is needed."""
+
+        kind, tick = _frame_header.unpack_from(frame)
+        offset = _frame_header.size
+        if kind == KEYFRAME:
+            self._apply_keyframe(frame, offset)
+        elif kind == DELTA:
+            if self.tick is None or tick != self.tick + 1:
+                return False
+            self._apply_delta(frame, offset)
+        else:
+            raise ValueError("Unknown frame type %i" % kind)
+        self.tick = tick
+        self.tick_time = time.monotonic()
+        return True
+
+    def _read(self, frame, offset, dtype, count):
+
+        end = offset + dtype.itemsize * count
+        return numpy.frombuffer(frame, dtype, count, offset), end
+
+    def _apply_keyframe(self, frame, offset):
+
+        size, = _size.unpack_from(frame, offset)
+        offset += _size.size
+        table = json.loads(frame[offset:offset + size].decode("utf-8"))
+        offset += size
+        self.assets = [get_named_image(self.images, name) for name in table["assets"]]
+        self.types = table["types"]
+        self.quantum = float(table["quantum"])
+        self.tick_seconds = table["tick_seconds"]
+
+        width, height = struct.unpack_from("<HH", frame, offset)
+        offset += 4
+        size, = _size.unpack_from(frame, offset)
+        offset += _size.size
+        pixels = zlib.decompress(frame[offset:offset + size])
+        offset += size
+        self.background = pygame.image.fromstring(pixels, (width, height), "RGB").convert()
+
+        for entity in list(self.replicas.values()):
+            World.remove_entity(self, entity)
+        self.replicas = {}
+        self.moving = {}
+
+        count, = _size.unpack_from(frame, offset)
+        spawned, offset = self._read(frame, offset + _size.size, SPAWN_DTYPE, count)
+        self._spawn(spawned)
+
+    def _apply_delta(self, frame, offset):
+
+        counts = _delta_counts.unpack_from(frame, offset)
+        offset += _delta_counts.size
+        spawned, offset = self._read(frame, offset, SPAWN_DTYPE, counts[0])
+        removed, offset = self._read(frame, offset, REMOVE_DTYPE, counts[1])
+        moved, offset = self._read(frame, offset, MOVE_DTYPE, counts[2])
+        looks, offset = self._read(frame, offset, LOOK_DTYPE, counts[3])
+        stamps, offset = self._read(frame, offset, STAMP_DTYPE, counts[4])
+
+        # Everything that was moving has finished the move
+        for entity in self.moving:
+            entity.location = Vector2.from_floats(*entity.target)
+        self.moving = moving = {}
+
+        replicas = self.replicas
+        for key in removed.tolist():
+            entity = replicas.pop(key, None)
+            if entity is not None:
+                World.remove_entity(self, entity)
+
+        self._spawn(spawned)
+
+        scale = 1. / self.quantum
+        for key, x, y in moved.tolist():
+            entity = replicas.get(key)
+            if entity is not None:
+                entity.previous = entity.target
+                entity.target = (x * scale, y * scale)
+                moving[entity] = None
+
+        for key, image, carry, health in looks.tolist():
+            entity = replicas.get(key)
+            if entity is not None:
+                self._set_look(entity, image, carry, health)
+
+        assets = self.assets
+        for image, x, y in stamps.tolist():
+            self.stamp(assets[image], (x, y))
+
+    def _spawn(self, records):
+
+        assets = self.assets
+        types = self.types
+        classes = dict(zip(ENTITY_TYPES, ENTITY_CLASSES))
+        scale = 1. / self.quantum
+        for key, type_code, image, carry, health, x, y in records.tolist():
+            entity = classes[types[type_code]](self, assets[image])
+            self._set_look(entity, image, carry, health)
+            entity.target = entity.previous = (x * scale, y * scale)
+            entity.location = Vector2.from_floats(*entity.target)
+            self.replicas[key] = entity
+            self.add_entity(entity)
+
+    def _set_look(self, entity, image, carry, health):
+
+        assets = self.assets
+        entity.image = assets[image]
+        if hasattr(entity, "carry_image"):
+            entity.carry(assets[carry] if carry != -1 else None)
+        if hasattr(entity, "health"):
+            entity.health = health
+
+    def get_alpha(self, now=None):
+
+        """Returns how far through the current tick the world is drawn, from
+        0 to 1, going by the time since the last frame arrived."""
+
+        if self.tick_time is None:
+            return 1.
+        if now is None:
+            now = time.monotonic()
+        return min(max((now - self.tick_time) / self.tick_seconds, 0.), 1.)
+
+    def interpolate(self, alpha=None):
+
+        """Moves the entities that moved on the last tick between where they
+        were and where they are now. Drawing is one tick behind the server,
+        so that there is always somewhere to move to."""
+
+        if alpha is None:
+            alpha = self.get_alpha()
+        for entity in self.moving:
+            x, y = entity.previous
+            target_x, target_y = entity.target
+            entity.location = Vector2.from_floats(x + (target_x - x) * alpha,
+                                                   y + (target_y - y) * alpha)
+
+
+class _UdpClient(asyncio.DatagramProtocol):
+
+    def __init__(self, client):
+
+        self.client = client
+        self.transport = None
+        self.parts = {}
+        self.frame_no = None
+
+    def connection_made(self, transport):
+
+        self.transport = transport
+        transport.sendto(HELLO)
+
+    def datagram_received(self, data, address):
+
+        frame_no, part, part_count = _fragment_header.unpack_from(data)
+        chunk = data[_fragment_header.size:]
+        if part_count == 1:
+            self.client.receive(chunk)
+            return
+
+        # Parts of an older frame that never arrived in full are dropped
+        if frame_no != self.frame_no:
+            if self.frame_no is not None and self.parts:
+                self.transport.sendto(SEND_KEYFRAME)
+            self.frame_no = frame_no
+            self.parts = {}
+        self.parts[part] = chunk
+        if len(self.parts) == part_count:
+            frame = b"".join(self.parts[part] for part in range(part_count))
+            self.parts = {}
+            self.client.receive(frame)
+
+    def connection_lost(self, exc):
+
+        self.client.closed.set()
+
+
+class ReplicationClient(object):
+
+    def __init__(self, images, host="127.0.0.1", port=PORT, udp=False):
+
+        """Creates a client that rebuilds a world streamed by a
+        ReplicationServer, in self.world.
+
+        images -- Dictionary of the images the entities use, by name
+        host -- Address of the server
+        port -- Port of the server
+        udp -- If True, connect over UDP, otherwise TCP
+
+        """
+
+        self.world = ReplicaWorld(images)
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.reader = None
+        self.writer = None
+        self.transport = None
+        self.closed = asyncio.Event()
+        self.frame_count = 0
+        self.byte_count = 0
+
+    async def connect(self):
+
+        loop = asyncio.get_running_loop()
+        if self.udp:
+            self.transport, protocol = await loop.create_datagram_endpoint(
+                lambda: _UdpClient(self), remote_addr=(self.host, self.port))
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def receive(self, frame):
+
+        self.frame_count += 1
+        self.byte_count += len(frame)
+        if not self.world.apply(frame) and self.transport is not None:
+            self.transport.sendto(SEND_KEYFRAME)
+
+    async def run(self):
+
+        """Receives frames until the connection is closed."""
+
+        if self.udp:
+            while not self.closed.is_set():
+                # Keep the server from forgetting this client
+                try:
+                    await asyncio.wait_for(self.closed.wait(), HELLO_SECONDS)
+                except asyncio.TimeoutError:
+                    self.transport.sendto(HELLO)
+            return
+
+        reader = self.reader
+        try:
+            while True:
+                size, = _size.unpack(await reader.readexactly(_size.size))
+                self.receive(await reader.readexactly(size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed.set()
+
+    def close(self):
+
+        if self.writer is not None:
+            self.writer.close()
+        if self.transport is not None:
+            self.transport.sendto(GOODBYE)
+            self.transport.close()
+        self.closed.set()
+
+
+def load_images():
+
+    path = os.path.dirname(os.path.abspath(__file__))
+    images = {}
+    for name in ("ant", "leaf", "spider"):
+        images[name] = pygame.image.load(os.path.join(path, name + ".png")).convert_alpha()
+    return images
+
+
+async def serve(options):
+
+    """Simulates a world in real time, and streams it to clients."""
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    images = load_images()
+
+    world = World()
+    add_ants(world, images["ant"], options.ants)
+    server = ReplicationServer(world, images, port=options.port, udp=options.udp)
+    await server.start()
+    print("Serving on port %i over %s" % (server.port, "UDP" if options.udp else "TCP"))
+
+    next_tick = time.monotonic()
+    try:
+        while True:
+            # SDL turns Ctrl+C and SIGTERM in to QUIT events
+            if any(event.type == QUIT for event in pygame.event.get()):
+                return
+            spawn_entities(world, images["leaf"], images["spider"])
+            world.process(TICK_SECONDS * 1000.)
+            server.publish()
+            next_tick += TICK_SECONDS
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0.))
+    finally:
+        server.close()
+
+
+async def spectate(options):
+
+    """Draws a world streamed from a server in a window."""
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    pygame.display.set_caption("Ants (spectating)")
+    client = ReplicationClient(load_images(), port=options.port, udp=options.udp)
+    await client.connect()
+    receiver = asyncio.ensure_future(client.run())
+
+    world = client.world
+    try:
+        while not client.closed.is_set():
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    return
+            if world.tick is not None:
+                world.interpolate()
+                world.render(screen)
+                pygame.display.update()
+            await asyncio.sleep(1. / 60.)
+    finally:
+        client.close()
+        await receiver
+        pygame.quit()
+
+
+def main(args=None):
+
+    parser = ArgumentParser(description="Streams an ants world to spectators.")
+    parser.add_argument("mode", choices=("server", "client"))
+    parser.add_argument("--port", type=int, default=PORT,
+                        help="port to serve on or connect to (default %(default)s)")
+    parser.add_argument("--udp", action="store_true",
+                        help="use UDP rather than TCP")
+    parser.add_argument("--ants", type=int, default=100,
+                        help="number of ants to serve (default %(default)s)")
+    options = parser.parse_args(args)
+
+    if options.mode == "server":
+        asyncio.run(serve(options))
+    else:
+        asyncio.run(spectate(options))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,633 @@
+"""A sharded ants World, where the screen is split in to vertical strips and
+each strip is simulated by its own worker process.
+
+    world = ShardedWorld(shard_count=4, seed=1)
+    add_ants(world, ant_image, 10000)
+    while True:
+        spawn_entities(world, leaf_image, spider_image)
+        world.process(time_passed)
+        world.render(screen)
+    world.close()
+
+The ShardedWorld in the main process owns no entities. Entities added to it
+are packed in to records and sent to the shard that owns their location.
+Once per tick every shard thinks and moves its own entities, then:
+
+  * entities that have moved out of the shard's strip migrate to the shard
+    that owns their new location
+  * leaves and spiders within halo_width of an edge are sent to the
+    neighbouring shard as read-only halo copies, so that get_close_entity
+    sees across the edge
+  * changes to halo entities (picking up a leaf, biting a spider) are sent
+    to the owning shard as requests, and the owner replies if the ant should
+    carry something, or that the entity has gone. An ant only asks for one
+    thing to be picked up at a time, and does not change state until it is
+    told that it has it. An ant that is waiting for an answer stays in the
+    shard that asked, even if it walks over the edge, until the answer comes
+
+The shards talk to the main process over pipes, and messages are passed on
+at the start of the next tick. Halo copies are therefore one tick old, and a
+request made on one tick is answered two ticks later.
+
+"""
+
+import os
+import random
+import traceback
+import multiprocessing
+
+import pygame
+
+from gameobjects.vector2 import Vector2
+
+from ants_game import (World, EntityRegistry, Ant, Leaf, Spider, ANT_STATES,
+                       DrawList, get_sprite_metrics, LAYER_CARRIED,
+                       SCREEN_SIZE, NEST_POSITION, NEST_SIZE)
+
+# Entities closer than this to the edge of a shard are copied to its neighbour
+HALO_WIDTH = 100
+
+# Only the types of entity that the ants look for need halo copies
+HALO_NAMES = ("leaf", "spider")
+
+
+def load_images():
+
+    path = os.path.dirname(os.path.abspath(__file__))
+    images = {}
+    for name in ("ant", "leaf", "spider"):
+        filename = os.path.join(path, name + ".png")
+        images[name] = pygame.image.load(filename).convert_alpha()
+    images["spider_dead"] = pygame.transform.flip(images["spider"], 0, 1)
+    return images
+
+
+def get_shard(x, shard_count):
+
+    """Returns the number of the shard that owns an x coordinate."""
+
+    shard_no = int(x * shard_count // SCREEN_SIZE[0])
+    return min(max(shard_no, 0), shard_count - 1)
+
+
+def pack_entity(entity, image_names):
+
+    """Returns a tuple of the values needed to recreate an entity in
+    another process."""
+
+    x, y = entity.location
+    dest_x, dest_y = entity.destination
+    state = entity.brain.active_state
+    return ( entity.name,
+             entity.id,
+             x, y,
+             dest_x, dest_y,
+             entity.speed,
+             state.name if state is not None else None,
+             getattr(entity, "health", 0),
+             image_names.get(getattr(entity, "carry_image", None)),
+             getattr(entity, "leaf_id", None),
+             getattr(entity, "spider_id", None),
+             getattr(entity, "got_kill", False) )
+
+
+def unpack_entity(world, record):
+
+    """Creates an entity from a record made by pack_entity."""
+
+    name, entity_id, x, y, dest_x, dest_y, speed, state, health, \
+        carry, leaf_id, spider_id, got_kill = record
+
+    images = world.images
+    if name == "ant":
+        entity = Ant(world, images["ant"])
+        entity.brain.active_state = ANT_STATES.get(state)
+        if carry is not None:
+            entity.carry(images[carry])
+        entity.leaf_id = leaf_id
+        entity.spider_id = spider_id
+        entity.got_kill = got_kill
+    elif name == "leaf":
+        entity = Leaf(world, images["leaf"])
+    elif name == "spider":
+        entity = Spider(world, images["spider"])
+        entity.dead_image = images["spider_dead"]
+        entity.health = health
+        if health <= 0:
+            entity.image = entity.dead_image
+    else:
+        raise ValueError("Unknown entity type %r" % name)
+
+    entity.id = entity_id
+    entity.location = Vector2(x, y)
+    entity.destination = Vector2(dest_x, dest_y)
+    entity.speed = speed
+    return entity
+
+
+class ShardRegistry(EntityRegistry):
+
+    """An EntityRegistry with ids that are unique across every shard, so
+    that an entity keeps its id when it migrates. Ids are never reused.
+    Halo entities can be found with get, but are not in the packed list."""
+
+    def __init__(self, shard_no, shard_count):
+
+        EntityRegistry.__init__(self)
+        self.by_id = {}
+        self.next_id = shard_no
+        self.id_step = shard_count
+
+    def add(self, entity):
+
+        if entity.id is None:
+            entity.id = self.next_id
+            self.next_id += self.id_step
+        self.by_id[entity.id] = entity
+
+        if self.locks:
+            self.added.append(entity)
+        else:
+            entity.dense_index = len(self.dense)
+            self.dense.append(entity)
+        return entity.id
+
+    def remove(self, entity):
+
+        if self.by_id.get(entity.id) is not entity:
+            raise KeyError("Entity is not in the registry")
+        del self.by_id[entity.id]
+
+        if self.locks:
+            self.removed.append(entity)
+        else:
+            self._remove_dense(entity)
+
+    def add_halo(self, entity):
+
+        self.by_id.setdefault(entity.id, entity)
+
+    def remove_halo(self, entity):
+
+        if self.by_id.get(entity.id) is entity:
+            del self.by_id[entity.id]
+
+    def get(self, entity_id):
+
+        return self.by_id.get(entity_id)
+
+    def is_alive(self, entity):
+
+        return self.by_id.get(entity.id) is entity
+
+
+class ShardWorld(World):
+
+    """The World simulated by one shard process."""
+
+    def __init__(self, shard_no, shard_count, images, halo_width=HALO_WIDTH):
+
+        World.__init__(self)
+        self.entities = ShardRegistry(shard_no, shard_count)
+
+        self.shard_no = shard_no
+        self.shard_count = shard_count
+        self.images = images
+        self.image_names = dict((image, name) for name, image in images.items())
+        self.halo_width = halo_width
+
+        width = SCREEN_SIZE[0]
+        self.left = width * shard_no / float(shard_count)
+        self.right = width * (shard_no + 1) / float(shard_count)
+
+        self.halos = []
+        self.outbox = {}
+        self.drops = []
+        # Id of the halo entity that an ant has asked to pick up, by ant id
+        self.pick_ups = {}
+        # Number of requests that an ant is waiting for answers to, by ant id
+        self.waiting = {}
+
+    def defer(self, entity, method, *args):
+
+        if getattr(entity, "halo", False):
+            # The entity belongs to another shard, so ask that shard to
+            # make the change
+            actor = getattr(method, "__self__", None)
+            actor_id = None
+            if actor is not entity and actor is not self:
+                actor_id = actor.id
+            if method.__name__ == "pick_up":
+                # Wait for the answer before asking again
+                if actor_id in self.pick_ups:
+                    return True
+                self.pick_ups[actor_id] = entity.id
+            if actor_id is not None:
+                self.waiting[actor_id] = self.waiting.get(actor_id, 0) + 1
+            self.send(entity.halo_shard,
+                      ("request", method.__name__, self.shard_no, actor_id, entity.id,
+                       args[1:]))
+            return True
+
+        if method.__name__ == "drop" and entity.carry_image is not None:
+            # Leaves dropped at the nest are drawn by the main process too
+            x, y = entity.location
+            self.drops.append((self.image_names.get(entity.carry_image), x, y))
+        return World.defer(self, entity, method, *args)
+
+    def send(self, shard_no, message):
+
+        self.outbox.setdefault(shard_no, []).append(message)
+
+    def step(self, time_passed_seconds, inbox):
+
+        """Handles the messages for this shard, simulates one tick and
+        returns (outbox, drops, entity counts)."""
+
+        self.receive(inbox)
+
+        self.entities.lock()
+        try:
+            self.think()
+            self.move(time_passed_seconds)
+        finally:
+            self.entities.unlock()
+
+        self.send_entities()
+
+        outbox = self.outbox
+        drops = self.drops
+        self.outbox = {}
+        self.drops = []
+        return outbox, drops, self.get_entity_counts()
+
+    def receive(self, inbox):
+
+        # Halos are replaced every tick
+        for entity in self.halos:
+            self.entities.remove_halo(entity)
+            self.spatial_index.remove(entity)
+        self.halos = []
+
+        for message in inbox:
+            kind = message[0]
+            if kind == "entity":
+                self.add_entity(unpack_entity(self, message[1]))
+            elif kind == "halo":
+                self.add_halos(message[1], message[2])
+            elif kind == "request":
+                self.handle_request(*message[1:])
+            elif kind == "carry":
+                self.handle_carry(*message[1:])
+            elif kind == "denied":
+                self.handle_denied(*message[1:])
+            elif kind == "done":
+                self.handle_done(*message[1:])
+            else:
+                raise ValueError("Unknown message %r" % kind)
+
+    def add_halos(self, shard_no, records):
+
+        for record in records:
+            if self.entities.get(record[1]) is not None:
+                continue
+            entity = unpack_entity(self, record)
+            entity.halo = True
+            entity.halo_shard = shard_no
+            self.entities.add_halo(entity)
+            self.spatial_index.insert(entity)
+            self.halos.append(entity)
+
+    def handle_request(self, name, shard_no, actor_id, target_id, args):
+
+        target = self.entities.get(target_id)
+        if target is None or getattr(target, "halo", False):
+            # Picked up or killed by another ant, or moved to another shard
+            if actor_id is not None:
+                self.send(shard_no, ("denied", actor_id, target_id))
+            return
+
+        if name == "pick_up":
+            new_state_name, = args
+            self.send(shard_no, ("carry", actor_id, self.image_names.get(target.image),
+                                 False, new_state_name))
+            self.remove_entity(target)
+        elif name == "bite":
+            target.bitten()
+            if target.health <= 0:
+                self.send(shard_no, ("carry", actor_id, self.image_names.get(target.image),
+                                     True, None))
+                self.remove_entity(target)
+            else:
+                self.send(shard_no, ("done", actor_id))
+        elif name == "bitten":
+            target.bitten()
+        elif name == "remove_entity":
+            self.remove_entity(target)
+        else:
+            raise ValueError("Unknown request %r" % name)
+
+    def handle_done(self, ant_id):
+
+        # Every request an ant makes is answered once
+        waiting = self.waiting.get(ant_id, 0) - 1
+        if waiting > 0:
+            self.waiting[ant_id] = waiting
+        else:
+            self.waiting.pop(ant_id, None)
+
+    def handle_carry(self, ant_id, image_name, got_kill, new_state_name):
+
+        self.handle_done(ant_id)
+        self.pick_ups.pop(ant_id, None)
+        ant = self.entities.get(ant_id)
+        if ant is None or getattr(ant, "halo", False):
+            return
+        ant.carry(self.images.get(image_name))
+        if got_kill:
+            ant.got_kill = True
+        if new_state_name is not None:
+            ant.brain.set_state(new_state_name)
+
+    def handle_denied(self, ant_id, target_id):
+
+        self.handle_done(ant_id)
+        self.pick_ups.pop(ant_id, None)
+        ant = self.entities.get(ant_id)
+        if ant is None or getattr(ant, "halo", False):
+            return
+        # Forget the target, so the ant goes back to exploring
+        if ant.leaf_id == target_id:
+            ant.leaf_id = None
+        if ant.spider_id == target_id:
+            ant.spider_id = None
+
+    def send_entities(self):
+
+        shard_no = self.shard_no
+        shard_count = self.shard_count
+        image_names = self.image_names
+        left_edge = self.left + self.halo_width
+        right_edge = self.right - self.halo_width
+
+        left_halo = []
+        right_halo = []
+        for entity in list(self.entities.values()):
+            x = entity.location.x
+            if left_edge <= x < right_edge:
+                continue
+            owner = get_shard(x, shard_count)
+            if owner != shard_no:
+                # Answers come back to this shard, so the ant has to wait
+                if entity.id in self.waiting:
+                    continue
+                self.send(owner, ("entity", pack_entity(entity, image_names)))
+                self.remove_entity(entity)
+            elif entity.name not in HALO_NAMES:
+                continue
+            elif x < left_edge:
+                left_halo.append(pack_entity(entity, image_names))
+            elif x >= right_edge:
+                right_halo.append(pack_entity(entity, image_names))
+
+        if shard_no > 0:
+            self.send(shard_no - 1, ("halo", shard_no, left_halo))
+        if shard_no < shard_count - 1:
+            self.send(shard_no + 1, ("halo", shard_no, right_halo))
+
+    def get_entity_counts(self):
+
+        counts = {}
+        for entity in self.entities.values():
+            counts[entity.name] = counts.get(entity.name, 0) + 1
+        return counts
+
+    def get_render_records(self):
+
+        records = []
+        image_names = self.image_names
+        for entity in self.entities.values():
+            x, y = entity.location
+            records.append(( image_names.get(entity.image), x, y, entity.layer,
+                             getattr(entity, "health", None),
+                             image_names.get(getattr(entity, "carry_image", None)) ))
+        return records
+
+
+def run_shard(connection, shard_no, shard_count, seed, halo_width):
+
+    """The main loop of a shard process."""
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    random.seed("%i:%i" % (seed, shard_no))
+
+    world = ShardWorld(shard_no, shard_count, load_images(), halo_width)
+    while True:
+        message = connection.recv()
+        command = message[0]
+        try:
+            if command == "step":
+                result = world.step(message[1], message[2])
+            elif command == "render":
+                result = world.get_render_records()
+            elif command == "close":
+                break
+            else:
+                raise ValueError("Unknown command %r" % command)
+        except Exception:
+            # Hand the error to the main process, which is waiting for us
+            connection.send(("error", traceback.format_exc()))
+            break
+        connection.send(("ok", result))
+    connection.close()
+    pygame.quit()
+
+
+class ShardedWorld(object):
+
+    def __init__(self, shard_count=2, seed=0, halo_width=HALO_WIDTH):
+
+        """Starts the shard processes.
+
+        shard_count -- Number of shards (and processes)
+        seed -- Seed for the random number generators of the shards
+        halo_width -- Width of the strip at each edge of a shard that is
+        copied to the neighbouring shard
+
+        """
+
+        # Shards are started fresh rather than forked from a process that
+        # may have a window open
+        context = multiprocessing.get_context("spawn")
+        self.shard_count = shard_count
+        self.connections = []
+        self.processes = []
+        for shard_no in range(shard_count):
+            connection, shard_connection = context.Pipe()
+            process = context.Process(target=run_shard,
+                                      args=(shard_connection, shard_no, shard_count,
+                                            seed, halo_width))
+            process.daemon = True
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        self.inboxes = [[] for shard_no in range(shard_count)]
+        self.entity_counts = {}
+        self.drops = []
+        self.background = None
+        self.images = None
+        self.draw_list = DrawList()
+
+    def _receive(self, connection):
+
+        status, result = connection.recv()
+        if status == "error":
+            self.close()
+            raise RuntimeError("A shard failed:\n" + result)
+        return result
+
+    def close(self):
+
+        for connection, process in zip(self.connections, self.processes):
+            if process.is_alive():
+                connection.send(("close",))
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    # Entities are only created in the main process, to be sent to a shard
+
+    def add_entity(self, entity):
+
+        x, y = entity.location
+        record = pack_entity(entity, {})
+        self.inboxes[get_shard(x, self.shard_count)].append(("entity", record))
+
+    def set_entity_location(self, entity, location):
+
+        entity._location = location
+
+    def set_entity_destination(self, entity, destination):
+
+        entity._destination = destination
+
+    def set_entity_speed(self, entity, speed):
+
+        entity._speed = speed
+
+    def state_changed(self, entity, old_state, new_state):
+        pass
+
+    def defer(self, entity, method, *args):
+
+        return False
+
+    def get_random(self, entity=None):
+
+        return random
+
+    def process(self, time_passed):
+
+        # Every shard steps at the same time
+        time_passed_seconds = time_passed / 1000.0
+        for shard_no, connection in enumerate(self.connections):
+            connection.send(("step", time_passed_seconds, self.inboxes[shard_no]))
+        self.inboxes = [[] for shard_no in range(self.shard_count)]
+
+        # Messages are passed on in shard order, so the result does not
+        # depend on which shard finishes first
+        entity_counts = {}
+        for connection in self.connections:
+            outbox, drops, counts = self._receive(connection)
+            for shard_no, messages in sorted(outbox.items()):
+                self.inboxes[shard_no].extend(messages)
+            self.drops.extend(drops)
+            for name, count in counts.items():
+                entity_counts[name] = entity_counts.get(name, 0) + count
+        self.entity_counts = entity_counts
+
+    def get_entity_counts(self):
+
+        """Returns the number of entities of each type, including those
+        that are on their way to another shard."""
+
+        counts = dict(self.entity_counts)
+        for inbox in self.inboxes:
+            for message in inbox:
+                if message[0] == "entity":
+                    name = message[1][0]
+                    counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def render(self, surface):
+
+        if self.background is None:
+            self.images = load_images()
+            self.background = pygame.surface.Surface(SCREEN_SIZE).convert()
+            self.background.fill((255, 255, 255))
+            pygame.draw.circle(self.background, (200, 255, 200), NEST_POSITION, int(NEST_SIZE))
+
+        images = self.images
+        for image_name, x, y in self.drops:
+            image = images[image_name]
+            w, h = image.get_size()
+            self.background.blit(image, (x-w, y-h/2))
+        self.drops = []
+
+        for connection in self.connections:
+            connection.send(("render",))
+        surface.blit(self.background, (0, 0))
+        draw_list = self.draw_list
+        for connection in self.connections:
+            for image_name, x, y, layer, health, carry_name in self._receive(connection):
+                image = images[image_name]
+                w, h, half_w, half_h = get_sprite_metrics(image)
+                draw_list.add(image, (x-half_w, y-half_h), layer)
+                if health is not None:
+                    draw_list.fill( (255, 0, 0), (x - 12, y + half_h, 25, 4))
+                    draw_list.fill( (0, 255, 0), (x - 12, y + half_h, max(health, 0), 4))
+                if carry_name is not None:
+                    carry_image = images[carry_name]
+                    w, h, half_w, half_h = get_sprite_metrics(carry_image)
+                    draw_list.add(carry_image, (x-w, y-half_h), LAYER_CARRIED)
+        draw_list.flush(surface)
+
+
+def run(shard_count=4, ant_count=1000):
+
+    from pygame.locals import QUIT
+    from ants_game import add_ants, spawn_entities
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+
+    world = ShardedWorld(shard_count)
+    images = load_images()
+    add_ants(world, images["ant"], ant_count)
+
+    clock = pygame.time.Clock()
+    try:
+        while True:
+
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    return
+
+            time_passed = clock.tick(30)
+
+            spawn_entities(world, images["leaf"], images["spider"])
+
+            world.process(time_passed)
+            world.render(screen)
+
+            pygame.display.update()
+    finally:
+        world.close()
+        pygame.quit()
+
+if __name__ == "__main__":
+    run()
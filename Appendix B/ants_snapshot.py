@@ -0,0 +1,376 @@
+"""Saves the ants World to a compact binary snapshot, and loads it back.
+
+    images = {"ant": ant_image, "leaf": leaf_image, "spider": spider_image}
+    save(world, images, "ants.snapshot")
+    world = load("ants.snapshot", images)
+
+Pickling a World would also pickle every pygame Surface it refers to, so a
+snapshot stores images as the names they have in the images dictionary.
+An image that is not in the dictionary, but is the dead version of one that
+is (see ants_game.get_dead_image), is stored as that name with "_dead" on the end.
+
+A snapshot is made of sections, each one prefixed with its length:
+
+  * a JSON table of the names used in the snapshot (entity types, state
+    names and images) and the size of the background
+  * one packed record per entity, with the fields in ENTITY_DTYPE, written
+    and read as a single NumPy array
+  * the generation of every slot and the list of free slots, so that the
+    loaded entities keep their ids and old ids still resolve to None
+  * the background, with the leaves the ants have dropped on it, as one
+    block of zlib compressed RGB pixels
+  * the pheromone field, if the world has one (see ants_pheromones): the
+    values of its cells and the gradients from its last update, as 64 bit
+    floats, with its settings and tick count in the table. The section is
+    empty for a world without a field
+
+A world with a pheromone field is loaded with one, even if make_world does
+not give it one. Snapshots of version 1, which had no pheromone section,
+can still be loaded.
+
+Requires NumPy. Sharded worlds are not supported.
+
+"""
+
+import os
+import json
+import zlib
+import struct
+from itertools import chain
+
+import numpy
+import pygame
+
+from gameobjects.vector2 import Vector2
+
+from ants_game import World, Ant, Leaf, Spider, ANT_STATES, get_image_names, \
+                      get_named_image
+from ants_pheromones import PheromoneField
+
+MAGIC = b"ANTS"
+VERSION = 2
+
+_header = struct.Struct("<4sH")
+_section_size = struct.Struct("<I")
+
+# zlib level for the background, the lowest is quickest and the background
+# is mostly one color anyway
+COMPRESSION_LEVEL = 1
+
+# An id of -1 is None
+ENTITY_DTYPE = numpy.dtype([ ("type", "<u1"),
+                             ("state", "<i2"),
+                             ("image", "<i2"),
+                             ("carry", "<i2"),
+                             ("id", "<i8"),
+                             ("location", "<f8", (2,)),
+                             ("destination", "<f8", (2,)),
+                             ("speed", "<f8"),
+                             ("health", "<i4"),
+                             ("leaf_id", "<i8"),
+                             ("spider_id", "<i8"),
+                             ("got_kill", "<u1"),
+                             ("trail_strength", "<f8") ])
+
+ENTITY_CLASSES = {"ant": Ant, "leaf": Leaf, "spider": Spider}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _NameTable(object):
+
+    # Gives each name a small integer, in the order they are first seen
+
+    def __init__(self):
+        self.names = []
+        self.indices = {None: -1}
+
+    def index(self, name):
+        try:
+            return self.indices[name]
+        except KeyError:
+            index = self.indices[name] = len(self.names)
+            self.names.append(name)
+            return index
+
+
+def _get_image(images, name):
+
+    try:
+        return get_named_image(images, name)
+    except KeyError:
+        raise SnapshotError("No image for asset %r" % name)
+
+
+def _id_or_none(entity_id):
+
+    return -1 if entity_id is None else entity_id
+
+
+def _pack_vectors(vectors):
+
+    # NumPy reads a flat stream of floats much quicker than a list of pairs
+    values = numpy.fromiter(chain.from_iterable(vector.as_tuple() for vector in vectors),
+                            dtype=float)
+    return values.reshape(-1, 2)
+
+
+def _dump_pheromones(pheromones):
+
+    # Returns the settings for the table and the cells of the section
+    if pheromones is None:
+        return None, b""
+    settings = { "size": pheromones.get_size(),
+                 "cell_size": pheromones.cell_size,
+                 "diffusion": pheromones.diffusion,
+                 "update_evaporation": pheromones.update_evaporation,
+                 "interval": pheromones.interval,
+                 "tick_no": pheromones.tick_no }
+    cells = numpy.array([ pheromones.values,
+                          pheromones.gradient_x,
+                          pheromones.gradient_y ], dtype="<f8")
+    return settings, cells.tobytes()
+
+
+def _load_pheromones(world, settings, data):
+
+    width, height = settings["size"]
+    try:
+        cells = numpy.frombuffer(data, dtype="<f8").reshape(3, height, width)
+    except ValueError:
+        raise SnapshotError("Pheromone field is the wrong size")
+
+    pheromones = world.pheromones
+    if pheromones is None:
+        pheromones = world.pheromones = PheromoneField(settings["cell_size"])
+    if pheromones.get_size() != (width, height) or \
+       pheromones.cell_size != settings["cell_size"]:
+        raise SnapshotError("The world's pheromone field does not match the snapshot")
+
+    pheromones.diffusion = settings["diffusion"]
+    pheromones.update_evaporation = settings["update_evaporation"]
+    pheromones.interval = settings["interval"]
+    pheromones.tick_no = settings["tick_no"]
+    pheromones.values[...] = cells[0]
+    pheromones.gradient_x = cells[1].tolist()
+    pheromones.gradient_y = cells[2].tolist()
+
+
+def dumps(world, images):
+
+    """Returns a snapshot of a world as bytes. Call between ticks.
+
+    world -- A World or ArrayWorld
+    images -- Dictionary of the images the entities use, by name
+
+    """
+
+    entities = world.entities
+    if entities.locks:
+        raise SnapshotError("Can not snapshot a world in the middle of a tick")
+
+    image_names = get_image_names(images)
+    types = _NameTable()
+    states = _NameTable()
+    assets = _NameTable()
+
+    def get_asset(image):
+        if image is None:
+            return -1
+        try:
+            return assets.index(image_names[image])
+        except KeyError:
+            raise SnapshotError("An entity has an image that is not in images")
+
+    def get_state(entity):
+        state = entity.brain.active_state
+        return states.index(state.name if state is not None else None)
+
+    # The records are filled a column at a time, which is quicker than
+    # building a tuple for every entity
+    entity_list = list(entities.values())
+    packed = numpy.zeros(len(entity_list), dtype=ENTITY_DTYPE)
+    if entity_list:
+        type_index = types.index
+        packed["type"] = [type_index(entity.name) for entity in entity_list]
+        packed["state"] = [get_state(entity) for entity in entity_list]
+        packed["image"] = [get_asset(entity.image) for entity in entity_list]
+        packed["carry"] = [get_asset(getattr(entity, "carry_image", None))
+                           for entity in entity_list]
+        packed["id"] = [entity.id for entity in entity_list]
+        if hasattr(world, "slot_entities"):
+            # An ArrayWorld already has these in arrays
+            slots = [entity.slot for entity in entity_list]
+            packed["location"] = world.locations[slots]
+            packed["destination"] = world.destinations[slots]
+            packed["speed"] = world.speeds[slots]
+        else:
+            packed["location"] = _pack_vectors(entity.location for entity in entity_list)
+            packed["destination"] = _pack_vectors(entity.destination for entity in entity_list)
+            packed["speed"] = [entity.speed for entity in entity_list]
+        packed["health"] = [getattr(entity, "health", 0) for entity in entity_list]
+        packed["leaf_id"] = [_id_or_none(getattr(entity, "leaf_id", None))
+                             for entity in entity_list]
+        packed["spider_id"] = [_id_or_none(getattr(entity, "spider_id", None))
+                               for entity in entity_list]
+        packed["got_kill"] = [getattr(entity, "got_kill", False) for entity in entity_list]
+        packed["trail_strength"] = [getattr(entity, "trail_strength", 0.)
+                                    for entity in entity_list]
+
+    background = world.background
+    pixels = pygame.image.tostring(background, "RGB")
+    pheromone_settings, pheromone_data = _dump_pheromones(world.pheromones)
+
+    table = { "types": types.names,
+              "states": states.names,
+              "assets": assets.names,
+              "background_size": background.get_size(),
+              "pheromones": pheromone_settings }
+
+    sections = [ json.dumps(table).encode("utf-8"),
+                 packed.tobytes(),
+                 numpy.array(entities.generations, dtype="<u4").tobytes(),
+                 numpy.array(entities.free_slots, dtype="<u4").tobytes(),
+                 zlib.compress(pixels, COMPRESSION_LEVEL),
+                 pheromone_data ]
+
+    chunks = [_header.pack(MAGIC, VERSION)]
+    for section in sections:
+        chunks.append(_section_size.pack(len(section)))
+        chunks.append(section)
+    return b"".join(chunks)
+
+
+def _read_sections(data):
+
+    if len(data) < _header.size:
+        raise SnapshotError("Not an ants snapshot")
+    magic, version = _header.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not an ants snapshot")
+    if version not in (1, VERSION):
+        raise SnapshotError("Unsupported snapshot version %i" % version)
+
+    sections = []
+    view = memoryview(data)
+    offset = _header.size
+    while offset < len(data):
+        size, = _section_size.unpack_from(data, offset)
+        offset += _section_size.size
+        if offset + size > len(data):
+            raise SnapshotError("Snapshot is truncated")
+        sections.append(view[offset:offset + size])
+        offset += size
+    # Version 1 has no pheromone section
+    if version == 1 and len(sections) == 5:
+        sections.append(b"")
+    if len(sections) != 6:
+        raise SnapshotError("Snapshot is truncated")
+    return sections
+
+
+def loads(data, images, make_world=World):
+
+    """Creates a world from a snapshot made by dumps.
+
+    data -- The snapshot, as bytes
+    images -- Dictionary of the images the entities use, by name
+    make_world -- Callable that returns a new, empty world
+
+    """
+
+    table_data, entity_data, generation_data, free_data, background_data, \
+        pheromone_data = _read_sections(data)
+
+    table = json.loads(bytes(table_data).decode("utf-8"))
+    type_names = table["types"]
+    state_names = table["states"]
+    asset_images = [_get_image(images, name) for name in table["assets"]]
+
+    records = numpy.frombuffer(entity_data, dtype=ENTITY_DTYPE)
+    generations = numpy.frombuffer(generation_data, dtype="<u4")
+    free_slots = numpy.frombuffer(free_data, dtype="<u4")
+
+    world = make_world()
+    pixels = zlib.decompress(background_data)
+    size = tuple(table["background_size"])
+    world.background = pygame.image.fromstring(pixels, size, "RGB").convert()
+
+    pheromone_settings = table.get("pheromones")
+    if pheromone_settings is not None:
+        _load_pheromones(world, pheromone_settings, pheromone_data)
+
+    entity_ids = records["id"].tolist()
+    world.entities.restore(generations.tolist(), free_slots.tolist(), entity_ids)
+
+    # Whole columns are turned in to lists at once, which is much quicker
+    # than reading the records one field at a time
+    columns = zip( records["type"].tolist(),
+                   records["state"].tolist(),
+                   records["image"].tolist(),
+                   records["carry"].tolist(),
+                   entity_ids,
+                   records["location"].tolist(),
+                   records["destination"].tolist(),
+                   records["speed"].tolist(),
+                   records["health"].tolist(),
+                   records["leaf_id"].tolist(),
+                   records["spider_id"].tolist(),
+                   records["got_kill"].tolist(),
+                   records["trail_strength"].tolist() )
+
+    for type_index, state, image, carry, entity_id, location, destination, \
+            speed, health, leaf_id, spider_id, got_kill, trail_strength in columns:
+
+        name = type_names[type_index]
+        entity_class = ENTITY_CLASSES.get(name)
+        if entity_class is None:
+            raise SnapshotError("Unknown entity type %r" % name)
+        entity = entity_class(world, asset_images[image])
+
+        if name == "ant":
+            if state != -1:
+                entity.brain.active_state = ANT_STATES[state_names[state]]
+            if carry != -1:
+                entity.carry(asset_images[carry])
+            entity.leaf_id = leaf_id if leaf_id != -1 else None
+            entity.spider_id = spider_id if spider_id != -1 else None
+            entity.got_kill = bool(got_kill)
+            entity.trail_strength = trail_strength
+        elif name == "spider":
+            entity.health = health
+            if health <= 0:
+                # Made with its dead image
+                entity.dead_image = entity.image
+
+        entity.location = Vector2.from_floats(*location)
+        entity.destination = Vector2.from_floats(*destination)
+        entity.speed = speed
+        world.add_entity(entity)
+        if entity.id != entity_id:
+            raise SnapshotError("Snapshot ids do not match its slots")
+
+    return world
+
+
+def save(world, images, filename):
+
+    """Writes a snapshot of a world to a file. The file is replaced in one
+    step, so a checkpoint is never left half written."""
+
+    data = dumps(world, images)
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as snapshot_file:
+        snapshot_file.write(data)
+    os.replace(temp_filename, filename)
+
+
+def load(filename, images, make_world=World):
+
+    """Creates a world from a snapshot file written by save."""
+
+    with open(filename, "rb") as snapshot_file:
+        data = snapshot_file.read()
+    return loads(data, images, make_world)
@@ -0,0 +1,5 @@
+
+
+( WRAP_REPEAT,
+  WRAP_CLAMP,
+  WRAP_ERROR ) = list(range(3))
@@ -0,0 +1,103 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import random
+import unittest
+
+import pygame
+
+from ants_game import World, ThinkScheduler, add_ants, spawn_entities
+from ants_parallel import ThinkPool
+from ants_random import RandomService
+
+PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def setUpModule():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def tearDownModule():
+    pygame.quit()
+
+
+def load_images():
+    load = lambda name: pygame.image.load(os.path.join(PATH, name)).convert_alpha()
+    return load("ant.png"), load("leaf.png"), load("spider.png")
+
+
+def get_state(world):
+    return [ (entity.id, entity.name, tuple(entity.location), tuple(entity.destination),
+              entity.speed, getattr(entity, "health", None),
+              entity.brain.active_state and entity.brain.active_state.name,
+              getattr(entity, "carry_image", None) is not None)
+             for entity in sorted(world.entities.values(), key=lambda entity: entity.id) ]
+
+
+def simulate(think_pool, ants=200, ticks=300, seed=5):
+    ant_image, leaf_image, spider_image = load_images()
+    random.seed(seed)
+    world = World(random_service=RandomService(seed), think_pool=think_pool)
+    add_ants(world, ant_image, ants)
+    states = []
+    for tick in range(ticks):
+        spawn_entities(world, leaf_image, spider_image)
+        world.process(1000. / 30.)
+        states.append(get_state(world))
+    return world, states
+
+
+class CountingScheduler(ThinkScheduler):
+
+    def __init__(self, budget=None):
+        ThinkScheduler.__init__(self, budget)
+        self.counts = []
+
+    def get_thinkers(self):
+        thinkers = ThinkScheduler.get_thinkers(self)
+        self.counts.append(len(thinkers))
+        return thinkers
+
+
+class TestThinkPool(unittest.TestCase):
+
+    def test_scheduled(self):
+        # Entities that think in the pool are scheduled to think again
+        ant_image, leaf_image, spider_image = load_images()
+        random.seed(1)
+        scheduler = CountingScheduler()
+        pool = ThinkPool(batch_size=16, seed=1, executor=None)
+        world = World(think_scheduler=scheduler, think_pool=pool)
+        add_ants(world, ant_image, 50)
+        for tick in range(40):
+            spawn_entities(world, leaf_image, spider_image)
+            world.process(1000. / 30.)
+        pool.close()
+        # Ants think at least every 4 ticks
+        self.assertTrue(sum(scheduler.counts[-20:]) >= 50 * 5)
+
+    def test_matches_serial(self):
+        # With a random service the pool gives the same world as thinking
+        # one entity at a time, on every tick
+        serial_world, serial_states = simulate(None)
+        pool = ThinkPool(batch_size=64, seed=1, executor=None)
+        pooled_world, pooled_states = simulate(pool)
+        pool.close()
+        for tick, (serial_state, pooled_state) in enumerate(zip(serial_states, pooled_states)):
+            self.assertEqual(serial_state, pooled_state, "differs on tick %i" % tick)
+        self.assertEqual(pygame.image.tostring(serial_world.background, "RGB"),
+                         pygame.image.tostring(pooled_world.background, "RGB"))
+
+        # Leaves were delivered, and only by ants that picked one up
+        delivering = [ carrying for state in pooled_states
+                       for entity_id, name, location, destination, speed, health,
+                           state_name, carrying in state
+                       if state_name == "delivering" ]
+        self.assertTrue(delivering)
+        self.assertTrue(all(delivering))
+
+
+if __name__ == "__main__":
+    unittest.main()
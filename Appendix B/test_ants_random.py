@@ -0,0 +1,93 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import random
+import unittest
+
+import pygame
+
+from ants_game import World, add_ants, spawn_entities
+from ants_parallel import ThinkPool
+from ants_random import RandomService
+
+PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def setUpModule():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def tearDownModule():
+    pygame.quit()
+
+
+def load_images():
+    load = lambda name: pygame.image.load(os.path.join(PATH, name)).convert_alpha()
+    return load("ant.png"), load("leaf.png"), load("spider.png")
+
+
+def entity_state(entity):
+    state = entity.brain.active_state
+    return state.name if state is not None else None
+
+
+def simulate(seed, think_pool=None, ants=100, ticks=200):
+    # Returns a repr of every entity on every tick, and the background
+    ant_image, leaf_image, spider_image = load_images()
+    # Leaves and spiders are spawned with the random module
+    random.seed(0)
+    world = World(random_service=RandomService(seed), think_pool=think_pool)
+    add_ants(world, ant_image, ants)
+    states = []
+    for tick in range(ticks):
+        spawn_entities(world, leaf_image, spider_image)
+        world.process(1000. / 30.)
+        states.append(repr([ (entity.id, tuple(entity.location), tuple(entity.destination),
+                              entity.speed, entity_state(entity))
+                             for entity in world.entities.values() ]))
+    return states, pygame.image.tostring(world.background, "RGB")
+
+
+class TestRandomStream(unittest.TestCase):
+
+    def test_ranges(self):
+        stream = RandomService(1, block_size=16).get_stream(3)
+        values = [stream.randint(-2, 2) for i in range(1000)]
+        self.assertEqual(set(values), set(range(-2, 3)))
+        for i in range(1000):
+            self.assertTrue(0. <= stream.random() < 1.)
+            self.assertTrue(5. <= stream.uniform(5., 6.) < 6.)
+        integers = stream.integers(1, 3, 100)
+        self.assertTrue(integers.min() >= 1 and integers.max() <= 3)
+        points = stream.points(100, 640, 480)
+        self.assertEqual(points.shape, (100, 2))
+        self.assertTrue((points < (640, 480)).all())
+
+    def test_keys(self):
+        service = RandomService(1)
+        draw = lambda stream: [stream.random() for i in range(200)]
+        self.assertEqual(draw(service.get_stream(3)), draw(RandomService(1).get_stream(3)))
+        self.assertNotEqual(draw(service.get_stream(3)), draw(service.get_stream(4)))
+        self.assertNotEqual(draw(service.get_stream(3)), draw(RandomService(2).get_stream(3)))
+        self.assertNotEqual(draw(service.get_stream(3)), draw(service.spawn(0).get_stream(3)))
+
+
+class TestDeterminism(unittest.TestCase):
+
+    def test_replay(self):
+        states, background = simulate(1)
+        self.assertEqual(simulate(1), (states, background))
+        self.assertNotEqual(simulate(2)[0], states)
+
+    def test_think_pool(self):
+        states, background = simulate(1)
+        for batch_size in (7, 64):
+            pooled = simulate(1, ThinkPool(batch_size=batch_size, seed=batch_size,
+                                           executor=None))
+            self.assertEqual(pooled, (states, background))
+
+
+if __name__ == "__main__":
+    unittest.main()
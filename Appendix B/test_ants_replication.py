@@ -0,0 +1,91 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import time
+import random
+import asyncio
+import unittest
+from math import floor
+
+import pygame
+
+from ants_game import World, SCREEN_SIZE, add_ants, spawn_entities
+from ants_replication import (ReplicationServer, ReplicationClient, QUANTUM,
+                              TICK_SECONDS, load_images)
+
+
+def setUpModule():
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+
+
+def tearDownModule():
+    pygame.quit()
+
+
+async def wait_for(condition, timeout=5.):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise AssertionError("Timed out")
+        await asyncio.sleep(0.001)
+
+
+def get_positions(world):
+    # Where the client should have each entity, by the id that is sent
+    positions = {}
+    for entity in world.entities.values():
+        x, y = entity.location
+        positions[entity.id & 0xFFFFFFFF] = (floor(x * QUANTUM + 0.5) / QUANTUM,
+                                             floor(y * QUANTUM + 0.5) / QUANTUM)
+    return positions
+
+
+class TestLoopback(unittest.TestCase):
+
+    async def replicate(self, udp, ticks=60):
+        images = load_images()
+        random.seed(3)
+        world = World()
+        add_ants(world, images["ant"], 100)
+        server = ReplicationServer(world, images, port=0, udp=udp)
+        await server.start()
+        client = ReplicationClient(images, port=server.port, udp=udp)
+        await client.connect()
+        receiver = asyncio.ensure_future(client.run())
+        try:
+            await wait_for(lambda: server.clients or server.udp_clients)
+            for tick in range(ticks):
+                spawn_entities(world, images["leaf"], images["spider"])
+                world.process(TICK_SECONDS * 1000.)
+                if tick == ticks // 2:
+                    # A leaf dropped on the nest, sent in a delta
+                    world.stamp(images["leaf"], (300.5, 220.25))
+                server.publish()
+                await wait_for(lambda: client.world.tick == server.encoder.tick)
+
+                replicas = client.world.replicas
+                positions = get_positions(world)
+                self.assertEqual(set(replicas), set(positions))
+                for key, position in positions.items():
+                    self.assertEqual(replicas[key].target, position)
+        finally:
+            client.close()
+            server.close()
+            await receiver
+
+        self.assertEqual(pygame.image.tostring(client.world.background, "RGB"),
+                         pygame.image.tostring(world.background, "RGB"))
+        self.assertNotEqual(client.world.background.get_at((306, 230)),
+                            World().background.get_at((306, 230)))
+
+    def test_tcp(self):
+        asyncio.run(self.replicate(False))
+
+    def test_udp(self):
+        asyncio.run(self.replicate(True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import unittest
+
+import pygame
+
+from gameobjects.vector2 import Vector2
+
+from ants_game import Ant, Leaf
+from ants_sharded import ShardWorld, load_images
+
+
+def setUpModule():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def tearDownModule():
+    pygame.quit()
+
+
+class TestHaloRequests(unittest.TestCase):
+
+    def setUp(self):
+        images = load_images()
+        self.requester = ShardWorld(0, 2, images)
+        self.owner = ShardWorld(1, 2, images)
+
+        # A leaf just over the edge of the owner's strip, and away from the
+        # nest, with a halo copy in the requester
+        self.leaf = Leaf(self.owner, images["leaf"])
+        self.leaf.location = Vector2(322, 30)
+        self.owner.add_entity(self.leaf)
+
+        self.ants = []
+        for y in (30, 31):
+            ant = Ant(self.requester, images["ant"])
+            ant.location = Vector2(318, y)
+            self.requester.add_entity(ant)
+            ant.leaf_id = self.leaf.id
+            ant.brain.set_state("seeking")
+            self.ants.append(ant)
+
+    def step_owner(self, inbox):
+        outbox, drops, counts = self.owner.step(0., inbox)
+        return outbox.get(0, [])
+
+    def step_requester(self, inbox):
+        outbox, drops, counts = self.requester.step(0., inbox)
+        return outbox.get(1, [])
+
+    def get_messages(self, messages, kind):
+        return [message for message in messages if message[0] == kind]
+
+    def test_pick_up(self):
+        halo = self.step_owner([])
+        requests = self.step_requester(halo)
+        self.assertEqual(len(self.get_messages(requests, "request")), 2)
+        for ant in self.ants:
+            self.assertEqual(ant.brain.active_state.name, "seeking")
+
+        # The halo copy is still there, but the ants wait for an answer
+        self.assertEqual(self.get_messages(self.step_requester(halo), "request"), [])
+
+        replies = self.step_owner(requests)
+        self.assertEqual(len(self.get_messages(replies, "carry")), 1)
+        self.assertEqual(len(self.get_messages(replies, "denied")), 1)
+        self.assertEqual(self.owner.entities.get(self.leaf.id), None)
+
+        self.step_requester(replies)
+        winner, loser = self.ants
+        if loser.carry_image is not None:
+            winner, loser = loser, winner
+        self.assertEqual(winner.brain.active_state.name, "delivering")
+        self.assertTrue(winner.carry_image is not None)
+        self.assertEqual(loser.brain.active_state.name, "exploring")
+        self.assertEqual(loser.leaf_id, None)
+        self.assertEqual(self.requester.pick_ups, {})
+
+    def test_target_gone(self):
+        halo = self.step_owner([])
+        requests = self.step_requester(halo)
+        self.owner.remove_entity(self.leaf)
+
+        replies = self.step_owner(requests)
+        self.assertEqual(len(self.get_messages(replies, "denied")), 2)
+        self.step_requester(replies)
+        for ant in self.ants:
+            self.assertEqual(ant.brain.active_state.name, "exploring")
+            self.assertEqual(ant.carry_image, None)
+
+    def run_shards(self, ticks, inboxes):
+        # Passes messages on as ShardedWorld.process does
+        worlds = (self.requester, self.owner)
+        for tick in range(ticks):
+            outboxes = [world.step(1. / 30., inbox)[0]
+                        for world, inbox in zip(worlds, inboxes)]
+            inboxes = [[], []]
+            for outbox in outboxes:
+                for shard_no, messages in sorted(outbox.items()):
+                    inboxes[shard_no].extend(messages)
+        return inboxes
+
+    def get_ant(self, ant_id, inboxes):
+        # Returns the state name and carried image name of an ant, which is
+        # in a shard or on its way to one
+        for world in (self.requester, self.owner):
+            ant = world.entities.get(ant_id)
+            if ant is not None:
+                return (ant.brain.active_state.name,
+                        world.image_names.get(ant.carry_image))
+        for message in self.get_messages(inboxes[0] + inboxes[1], "entity"):
+            record = message[1]
+            if record[1] == ant_id:
+                return record[7], record[9]
+        self.fail("Lost ant %i" % ant_id)
+
+    def test_pick_up_moving(self):
+        # The ants ask for the leaf, then walk over the edge to it before
+        # the answer comes
+        for ant in self.ants:
+            ant.destination = self.leaf.location
+            ant.speed = 160.
+        inboxes = self.run_shards(6, [self.step_owner([]), []])
+        self.assertTrue(self.ants[0].location.x >= 320)
+        self.assertEqual(self.owner.entities.get(self.leaf.id), None)
+
+        ants = sorted(self.get_ant(ant.id, inboxes) for ant in self.ants)
+        self.assertEqual(ants, [("delivering", "leaf"), ("exploring", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import random
+import unittest
+
+import pygame
+
+from ants_game import World, add_ants, spawn_entities
+from ants_arrays import ArrayWorld
+from ants_pheromones import PheromoneField
+import ants_snapshot
+from ants_snapshot import SnapshotError
+
+PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def setUpModule():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def tearDownModule():
+    pygame.quit()
+
+
+def load_images():
+    load = lambda name: pygame.image.load(os.path.join(PATH, name)).convert_alpha()
+    return {"ant": load("ant.png"), "leaf": load("leaf.png"), "spider": load("spider.png")}
+
+
+def get_state(world):
+    entities = []
+    for entity in sorted(world.entities.values(), key=lambda entity: entity.id):
+        state = entity.brain.active_state
+        entities.append(( entity.id, entity.name, tuple(entity.location),
+                          tuple(entity.destination), float(entity.speed),
+                          state.name if state is not None else None,
+                          getattr(entity, "health", None),
+                          getattr(entity, "carry_image", None) is not None,
+                          getattr(entity, "trail_strength", None) ))
+    pheromones = world.pheromones
+    if pheromones is not None:
+        pheromones = ( pheromones.values.tolist(), pheromones.gradient_x,
+                       pheromones.gradient_y, pheromones.tick_no )
+    return ( repr(entities), pheromones,
+             pygame.image.tostring(world.background, "RGB") )
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def simulate(self, world, images, ticks):
+        for tick in range(ticks):
+            spawn_entities(world, images["leaf"], images["spider"])
+            world.process(1000. / 30.)
+
+    def round_trip(self, make_world, load_world):
+        images = load_images()
+        random.seed(2)
+        world = make_world()
+        add_ants(world, images["ant"], 200)
+        self.simulate(world, images, 300)
+
+        loaded = ants_snapshot.loads(ants_snapshot.dumps(world, images), images,
+                                     load_world)
+        self.assertEqual(get_state(loaded), get_state(world))
+
+        # The loaded world carries on exactly as the original does
+        random_state = random.getstate()
+        self.simulate(world, images, 100)
+        random.setstate(random_state)
+        self.simulate(loaded, images, 100)
+        self.assertEqual(get_state(loaded), get_state(world))
+        return world, loaded
+
+    def test_world(self):
+        self.round_trip(World, World)
+
+    def test_array_world(self):
+        self.round_trip(ArrayWorld, ArrayWorld)
+
+    def test_pheromones(self):
+        make_world = lambda: World(pheromones=PheromoneField(interval=2))
+        world, loaded = self.round_trip(make_world, World)
+        self.assertTrue(world.pheromones.values.any())
+        self.assertEqual(loaded.pheromones.interval, 2)
+
+        make_world = lambda: ArrayWorld(pheromones=PheromoneField())
+        self.round_trip(make_world, ArrayWorld)
+
+    def test_pheromone_mismatch(self):
+        images = load_images()
+        data = ants_snapshot.dumps(World(pheromones=PheromoneField()), images)
+        make_world = lambda: World(pheromones=PheromoneField(cell_size=20))
+        self.assertRaises(SnapshotError, ants_snapshot.loads, data, images, make_world)
+
+    def test_bad_data(self):
+        images = load_images()
+        world = World()
+        add_ants(world, images["ant"], 1)
+        spawn_entities(world, images["leaf"], images["spider"])
+        data = ants_snapshot.dumps(world, images)
+        self.assertRaises(SnapshotError, ants_snapshot.loads, b"NOPE" + data[4:], images)
+        self.assertRaises(SnapshotError, ants_snapshot.loads, data[:-10], images)
+        self.assertRaises(SnapshotError, ants_snapshot.loads, data, {"leaf": images["leaf"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,15 @@ __all__ = [
 'matrix44',
 'color',
 'gametime',
-'grid'
+'grid',
+'vectorarray',
+'matrix44array',
+'transform',
+'quaternion',
+'quaternionarray',
+'frustum',
+'pool',
+'scalargrid'
 ]
 
 
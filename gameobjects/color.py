@@ -1,5 +1,6 @@
 from math import *
 from .util import format_number
+from array import array
 
 
 class ColorRGBA(object):
@@ -149,6 +150,39 @@ class ColorRGBA(object):
         return c
     __copy__ = copy
 
+
+    def use_buffer(self, typecode='d'):
+        """Stores the components in a contiguous typed array, which can be
+        read without conversion by anything that supports the buffer
+        protocol (PyOpenGL, NumPy, struct etc). Returns the color.
+
+        typecode -- 'd' for doubles or 'f' for floats
+
+        """
+
+        self._c = array(typecode, self._c)
+        return self
+
+    def is_buffered(self):
+        """Returns True if the color is backed by a typed buffer."""
+
+        return self._c.__class__ is not list
+
+    def get_buffer(self):
+        """Returns a memoryview of the 4 components. If the color is
+        backed by a buffer (see use_buffer) this is not a copy, and reflects
+        any changes to the color.
+
+        """
+
+        c = self._c
+        if c.__class__ is list:
+            c = array('d', c)
+        return memoryview(c)
+
+    def __buffer__(self, flags):
+        return self.get_buffer()
+
     def _get_r(self):
         return self._c[0]
     def _set_r(self, r):
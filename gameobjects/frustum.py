@@ -0,0 +1,187 @@
+from math import sqrt
+
+
+class Frustum(object):
+
+    """The six planes of a view frustum, extracted from a projection
+    multiplied by a view Matrix44. Used to skip objects that can not be seen.
+
+    Plane normals point in to the frustum, so a point is visible if it is on
+    the positive side of all six planes.
+
+    """
+
+    __slots__ = ('_planes',)
+
+    LEFT, RIGHT, BOTTOM, TOP, NEAR, FAR = range(6)
+
+
+    def __init__(self, matrix):
+        """Creates a frustum from a combined matrix.
+
+        matrix -- A Matrix44, typically projection * view (where view is the
+        inverse of the camera matrix)
+
+        """
+
+        self.set_matrix(matrix)
+
+
+    def set_matrix(self, matrix):
+        """Updates the planes from a new combined matrix."""
+
+        m0,  m1,  m2,  m3, \
+        m4,  m5,  m6,  m7, \
+        m8,  m9,  m10, m11, \
+        m12, m13, m14, m15 = matrix._m
+
+        # Matrix44 transforms row vectors, so the clip space coordinates are
+        # the dot products of a point with the columns of the matrix
+        planes = [ (m3 + m0,  m7 + m4,  m11 + m8,  m15 + m12),
+                   (m3 - m0,  m7 - m4,  m11 - m8,  m15 - m12),
+                   (m3 + m1,  m7 + m5,  m11 + m9,  m15 + m13),
+                   (m3 - m1,  m7 - m5,  m11 - m9,  m15 - m13),
+                   (m3 + m2,  m7 + m6,  m11 + m10, m15 + m14),
+                   (m3 - m2,  m7 - m6,  m11 - m10, m15 - m14) ]
+
+        normalised = []
+        for a, b, c, d in planes:
+            l = sqrt(a*a + b*b + c*c)
+            normalised.append( (a/l, b/l, c/l, d/l) )
+        self._planes = normalised
+
+
+    def get_planes(self):
+        """Returns a list of the six planes (left, right, bottom, top, near,
+        far) as tuples of (a, b, c, d), where a, b, c is the unit normal."""
+
+        return self._planes[:]
+    planes = property(get_planes, None, None, "The six planes of the frustum.")
+
+
+    def __repr__(self):
+
+        return "Frustum(%r)" % (self._planes,)
+
+
+    def contains_point(self, p):
+        """Returns True if a point is inside the frustum.
+
+        p -- A Vector3 or sequence of 3 values
+
+        """
+
+        x, y, z = p
+        for a, b, c, d in self._planes:
+            if a*x + b*y + c*z + d < 0.:
+                return False
+        return True
+
+
+    def __contains__(self, p):
+
+        return self.contains_point(p)
+
+
+    def intersects_sphere(self, sphere):
+        """Returns True if any part of a sphere may be inside the frustum.
+        Allows Sphere.intersects to be used with a frustum.
+
+        sphere -- A Sphere
+
+        """
+
+        x, y, z = sphere.position
+        neg_radius = -sphere.radius
+        for a, b, c, d in self._planes:
+            if a*x + b*y + c*z + d < neg_radius:
+                return False
+        return True
+
+
+    def intersects_aabb(self, box_min, box_max):
+        """Returns True if any part of an axis-aligned box may be inside the
+        frustum.
+
+        box_min -- Minimum x, y, z of the box
+        box_max -- Maximum x, y, z of the box
+
+        """
+
+        min_x, min_y, min_z = box_min
+        max_x, max_y, max_z = box_max
+        for a, b, c, d in self._planes:
+            # Test the corner that is furthest along the plane normal
+            x = max_x if a >= 0. else min_x
+            y = max_y if b >= 0. else min_y
+            z = max_z if c >= 0. else min_z
+            if a*x + b*y + c*z + d < 0.:
+                return False
+        return True
+
+
+    def _plane_array(self):
+
+        import numpy
+        return numpy.array(self._planes)
+
+
+    def spheres_visible(self, centres, radii):
+        """Tests many spheres at once, and returns a boolean array that is
+        True for the spheres that may be visible. Requires NumPy.
+
+        centres -- An (N, 3) array of sphere centres (or a Vector3Array)
+        radii -- An array of N radii, or a single radius for all spheres
+
+        """
+
+        import numpy
+        if hasattr(centres, 'array'):
+            centres = centres.array
+        planes = self._plane_array()
+        distances = numpy.matmul(centres, planes[:, :3].T)
+        distances += planes[:, 3]
+        radii = numpy.asarray(radii, dtype=float)
+        if radii.ndim:
+            radii = radii[:, numpy.newaxis]
+        return (distances >= -radii).all(axis=1)
+
+
+    def aabbs_visible(self, box_mins, box_maxs):
+        """Tests many axis-aligned boxes at once, and returns a boolean array
+        that is True for the boxes that may be visible. Requires NumPy.
+
+        box_mins -- An (N, 3) array of box minimums
+        box_maxs -- An (N, 3) array of box maximums
+
+        """
+
+        import numpy
+        box_mins = numpy.asarray(box_mins, dtype=float)
+        box_maxs = numpy.asarray(box_maxs, dtype=float)
+        planes = self._plane_array()
+        normals = planes[:, :3]
+
+        # Test the box centre, pushed out by the box extent along each normal
+        centres = (box_mins + box_maxs) * 0.5
+        extents = (box_maxs - box_mins) * 0.5
+        distances = numpy.matmul(centres, normals.T)
+        distances += planes[:, 3]
+        distances += numpy.matmul(extents, numpy.abs(normals).T)
+        return (distances >= 0.).all(axis=1)
+
+
+if __name__ == "__main__":
+
+    from math import radians
+    from .matrix44 import Matrix44
+    from .sphere import Sphere
+
+    projection = Matrix44.perspective_projection_fov(radians(60), 4./3., .1, 100.)
+    camera = Matrix44.translation(0, 0, 10)
+    frustum = Frustum(projection * camera.get_inverse())
+
+    print(frustum.contains_point((0, 0, 0)))
+    print(frustum.contains_point((0, 0, 20)))
+    print(Sphere((0, 0, 11), 2).intersects(frustum))
+    print(frustum.intersects_aabb((-1, -1, -1), (1, 1, 1)))
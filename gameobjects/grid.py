@@ -54,11 +54,7 @@ class Grid(object):
 
     def _make_wrap(self, wrap, edge):
 
-        if wrap == WRAP_NONE:
-            def do_wrap(value):
-                return value
-
-        elif wrap == WRAP_REPEAT:
+        if wrap == WRAP_REPEAT:
             def do_wrap(value):
                 return value % edge
 
@@ -3,10 +3,98 @@ from .util import format_number
 from .vector3 import Vector3
 
 from math import sin, cos, tan, sqrt, pi, radians
+from array import array
 
 #import psyco
 #psyco.full()
 
+# What is known about a matrix, used to pick the cheapest correct kernel.
+# Affine matrices have a right column of (0, 0, 0, 1), rigid matrices are
+# affine and contain only a rotation and a translation.
+_GENERAL, _AFFINE, _RIGID = list(range(3))
+
+
+def _like(m, values):
+
+    """Returns values as the same type of sequence as m, which is either a
+    list or a typed array."""
+
+    if m.__class__ is list:
+        return list(values)
+    return array(m.typecode, values)
+
+
+def _affine_product(m1, m2):
+
+    """Returns the components of the product of two affine matrices, as
+    Matrix44.__mul__ but without the terms that are always 0 or 1."""
+
+    m1_0,  m1_1,  m1_2,  m1_3, \
+    m1_4,  m1_5,  m1_6,  m1_7, \
+    m1_8,  m1_9,  m1_10, m1_11, \
+    m1_12, m1_13, m1_14, m1_15 = m1
+
+    m2_0,  m2_1,  m2_2,  m2_3, \
+    m2_4,  m2_5,  m2_6,  m2_7, \
+    m2_8,  m2_9,  m2_10, m2_11, \
+    m2_12, m2_13, m2_14, m2_15 = m2
+
+    return [ m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8,
+             m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9,
+             m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10,
+             0.0,
+
+             m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8,
+             m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9,
+             m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10,
+             0.0,
+
+             m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8,
+             m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9,
+             m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10,
+             0.0,
+
+             m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m1_12,
+             m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m1_13,
+             m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m1_14,
+             1.0 ]
+
+
+def _general_product(m1, m2):
+
+    """Returns the components of the product of two matrices."""
+
+    m1_0,  m1_1,  m1_2,  m1_3, \
+    m1_4,  m1_5,  m1_6,  m1_7, \
+    m1_8,  m1_9,  m1_10, m1_11, \
+    m1_12, m1_13, m1_14, m1_15 = m1
+
+    m2_0,  m2_1,  m2_2,  m2_3, \
+    m2_4,  m2_5,  m2_6,  m2_7, \
+    m2_8,  m2_9,  m2_10, m2_11, \
+    m2_12, m2_13, m2_14, m2_15 = m2
+
+    return [ m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8 + m2_3 * m1_12,
+             m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9 + m2_3 * m1_13,
+             m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10 + m2_3 * m1_14,
+             m2_0 * m1_3 + m2_1 * m1_7 + m2_2 * m1_11 + m2_3 * m1_15,
+
+             m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8 + m2_7 * m1_12,
+             m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9 + m2_7 * m1_13,
+             m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10 + m2_7 * m1_14,
+             m2_4 * m1_3 + m2_5 * m1_7 + m2_6 * m1_11 + m2_7 * m1_15,
+
+             m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8 + m2_11 * m1_12,
+             m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9 + m2_11 * m1_13,
+             m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10 + m2_11 * m1_14,
+             m2_8 * m1_3 + m2_9 * m1_7 + m2_10 * m1_11 + m2_11 * m1_15,
+
+             m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m2_15 * m1_12,
+             m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m2_15 * m1_13,
+             m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m2_15 * m1_14,
+             m2_12 * m1_3 + m2_13 * m1_7 + m2_14 * m1_11 + m2_15 * m1_15 ]
+
+
 class Matrix44Error(Exception):
 
     """Matrix44 Exception class"""
@@ -66,7 +154,7 @@ class Matrix44(object):
                   (0.0, 0.0, 1.0, 0.0),
                   (0.0, 0.0, 0.0, 1.0) )
 
-    __slots__ = ('_m',)
+    __slots__ = ('_m', '_kind')
 
     def __init__(self, *args):
 
@@ -82,11 +170,13 @@ class Matrix44(object):
 
         if not args:
             self._m = [1.,0.,0.,0., 0.,1.,0.,0., 0.,0.,1.,0., 0.,0.,0.,1.]
+            self._kind = _RIGID
             return
 
 
         elif len(args) == 4:
             self._m = [1.,0.,0.,0., 0.,1.,0.,0., 0.,0.,1.,0., 0.,0.,0.,1.]
+            self._kind = _RIGID
 
             row_0, row_1, row_2, row_3 = self._setters
             r1, r2, r3, r4 = args
@@ -114,19 +204,25 @@ class Matrix44(object):
 
     def _set_row_0(self, values):
         values = tuple(values)[:4]
-        self._m[0:len(values)] = list(map(float, values))
+        self._m[0:len(values)] = _like(self._m, map(float, values))
+        self._kind = self._get_affine_kind()
 
     def _set_row_1(self, values):
         values = tuple(values)[:4]
-        self._m[4:4+len(values)] = list(map(float, values))
+        self._m[4:4+len(values)] = _like(self._m, map(float, values))
+        self._kind = self._get_affine_kind()
 
     def _set_row_2(self, values):
         values = tuple(values)[:4]
-        self._m[8:8+len(values)] = list(map(float, values))
+        self._m[8:8+len(values)] = _like(self._m, map(float, values))
+        self._kind = self._get_affine_kind()
 
     def _set_row_3(self, values):
         values = tuple(values)[:4]
-        self._m[12:12+len(values)] = list(map(float, values))
+        self._m[12:12+len(values)] = _like(self._m, map(float, values))
+        # Changing the translation leaves a rigid matrix rigid
+        if self._kind != _RIGID or self._m[15] != 1.:
+            self._kind = self._get_affine_kind()
 
     _getters = (_get_row_0, _get_row_1, _get_row_2, _get_row_3)
     _setters = (_set_row_0, _set_row_1, _set_row_2, _set_row_3)
@@ -145,14 +241,95 @@ class Matrix44(object):
     translate = _row3
 
 
+    def _get_affine_kind(self):
+
+        m = self._m
+        if m[3] == 0. and m[7] == 0. and m[11] == 0. and m[15] == 1.:
+            return _AFFINE
+        return _GENERAL
+
+
+    def is_affine(self):
+        """Returns True if the matrix is known to be affine (has a right
+        column of (0, 0, 0, 1)), i.e. it is composed of rotations,
+        translations and scales."""
+
+        return self._kind != _GENERAL
+
+
+    def is_rigid(self):
+        """Returns True if the matrix is known to contain only a rotation and
+        a translation. Matrices are rigid if they were built only from
+        rotations and translations."""
+
+        return self._kind == _RIGID
+
+
+    def _set_components(self, values):
+
+        # A matrix backed by a buffer is updated in place, so that memoryviews
+        # and arrays that share the buffer see the new values
+        m = getattr(self, '_m', None)
+        if m is None or m.__class__ is list:
+            self._m = values
+        else:
+            m[:] = array(m.typecode, values)
+
+
+    def use_buffer(self, typecode='d'):
+
+        """Stores the components in a contiguous typed array, which can be
+        read without conversion by anything that supports the buffer
+        protocol (PyOpenGL, NumPy, struct etc). The matrix is updated in
+        place from then on, so views of the buffer stay current.
+        Returns the matrix.
+
+        typecode -- 'd' for doubles (glLoadMatrixd) or 'f' for floats
+        (glLoadMatrixf)
+
+        """
+
+        self._m = array(typecode, self._m)
+        return self
+
+
+    def is_buffered(self):
+        """Returns True if the matrix is backed by a typed buffer."""
+
+        return self._m.__class__ is not list
+
+
+    def get_buffer(self):
+
+        """Returns a memoryview of the 16 components. If the matrix is backed
+        by a buffer (see use_buffer) this is not a copy, and reflects any
+        changes to the matrix.
+
+        """
+
+        m = self._m
+        if m.__class__ is list:
+            m = array('d', m)
+        return memoryview(m)
+
+    def __buffer__(self, flags):
+
+        return self.get_buffer()
+
+
     def to_opengl(self):
 
         """Converts the matrix in to a list of values, suitable for using
         with glLoadMatrix*
+        If the matrix is backed by a buffer (see use_buffer), the buffer
+        itself is returned without a copy, and will change with the matrix.
 
         """
 
-        return self._m[:]
+        m = self._m
+        if m.__class__ is list:
+            return m[:]
+        return m
 
 
     def set(self, row1, row2, row3, row4):
@@ -199,6 +376,18 @@ class Matrix44(object):
         m._m = list(map(float, iterable))
         if len(m._m) != 16:
             raise ValueError("Iterable must have 16 values")
+        m._kind = m._get_affine_kind()
+        return m
+
+
+    @classmethod
+    def _from_float_sequence(cls, sequence, rigid=False):
+        m = cls.__new__(cls, object)
+        m._m = list(sequence)
+        if rigid:
+            m._kind = _RIGID
+        else:
+            m._kind = m._get_affine_kind()
         return m
 
 
@@ -208,6 +397,7 @@ class Matrix44(object):
 
         m = cls.__new__(cls, object)
         m._m = copy_Matrix44._m[:]
+        m._kind = copy_Matrix44._kind
         return m
 
 
@@ -221,6 +411,7 @@ class Matrix44(object):
 
         m = cls.__new__(cls, object)
         m._m = [0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0.,]
+        m._kind = _GENERAL
         return m
 
 
@@ -230,6 +421,7 @@ class Matrix44(object):
 
         m = cls.__new__(cls, object)
         m._m = [1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1., 0., 0., 0., 0., 1.]
+        m._kind = _RIGID
         return m
 
 
@@ -425,6 +617,11 @@ class Matrix44(object):
         except TypeError:
             raise TypeError( "Must be a number" )
 
+        if col == 3:
+            self._kind = self._get_affine_kind()
+        elif row != 3 and self._kind == _RIGID:
+            self._kind = _AFFINE
+
 
     def __getitem__(self, coord):
         """Gets an individual element in the Matrix44.
@@ -458,78 +655,31 @@ class Matrix44(object):
 
     def __mul__(self, rhs):
         """Returns the result of multiplying this Matrix44 by another, called
-        by the * (multiply) operator."""
-
-        m1_0,  m1_1,  m1_2,  m1_3, \
-        m1_4,  m1_5,  m1_6,  m1_7, \
-        m1_8,  m1_9,  m1_10, m1_11, \
-        m1_12, m1_13, m1_14, m1_15 = self._m
-
-        m2_0,  m2_1,  m2_2,  m2_3, \
-        m2_4,  m2_5,  m2_6,  m2_7, \
-        m2_8,  m2_9,  m2_10, m2_11, \
-        m2_12, m2_13, m2_14, m2_15 = rhs._m
-
-        retm =  [ m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8 + m2_3 * m1_12,
-                  m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9 + m2_3 * m1_13,
-                  m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10 + m2_3 * m1_14,
-                  m2_0 * m1_3 + m2_1 * m1_7 + m2_2 * m1_11 + m2_3 * m1_15,
-
-                  m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8 + m2_7 * m1_12,
-                  m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9 + m2_7 * m1_13,
-                  m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10 + m2_7 * m1_14,
-                  m2_4 * m1_3 + m2_5 * m1_7 + m2_6 * m1_11 + m2_7 * m1_15,
-
-                  m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8 + m2_11 * m1_12,
-                  m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9 + m2_11 * m1_13,
-                  m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10 + m2_11 * m1_14,
-                  m2_8 * m1_3 + m2_9 * m1_7 + m2_10 * m1_11 + m2_11 * m1_15,
-
-                  m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m2_15 * m1_12,
-                  m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m2_15 * m1_13,
-                  m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m2_15 * m1_14,
-                  m2_12 * m1_3 + m2_13 * m1_7 + m2_14 * m1_11 + m2_15 * m1_15 ]
+        by the * (multiply) operator. Uses a quicker calculation if both
+        matrices are affine."""
 
+        kind = min(self._kind, rhs._kind)
         ret = self.__new__(self.__class__, object)
-        ret._m = retm
+        if kind:
+            ret._m = _affine_product(self._m, rhs._m)
+        else:
+            ret._m = _general_product(self._m, rhs._m)
+        ret._kind = kind
 
         return ret
 
 
     def __imul__(self, rhs):
 
-        """Multiplies this Matrix44 by another, called by the *= operator."""
-
-        m1_0,  m1_1,  m1_2,  m1_3, \
-        m1_4,  m1_5,  m1_6,  m1_7, \
-        m1_8,  m1_9,  m1_10, m1_11, \
-        m1_12, m1_13, m1_14, m1_15 = self._m
-
-        m2_0,  m2_1,  m2_2,  m2_3, \
-        m2_4,  m2_5,  m2_6,  m2_7, \
-        m2_8,  m2_9,  m2_10, m2_11, \
-        m2_12, m2_13, m2_14, m2_15 = rhs._m
-
+        """Multiplies this Matrix44 by another, called by the *= operator.
+        Uses a quicker calculation if both matrices are affine."""
 
-        self._m = [ m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8 + m2_3 * m1_12,
-                    m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9 + m2_3 * m1_13,
-                    m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10 + m2_3 * m1_14,
-                    m2_0 * m1_3 + m2_1 * m1_7 + m2_2 * m1_11 + m2_3 * m1_15,
-
-                    m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8 + m2_7 * m1_12,
-                    m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9 + m2_7 * m1_13,
-                    m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10 + m2_7 * m1_14,
-                    m2_4 * m1_3 + m2_5 * m1_7 + m2_6 * m1_11 + m2_7 * m1_15,
-
-                    m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8 + m2_11 * m1_12,
-                    m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9 + m2_11 * m1_13,
-                    m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10 + m2_11 * m1_14,
-                    m2_8 * m1_3 + m2_9 * m1_7 + m2_10 * m1_11 + m2_11 * m1_15,
-
-                    m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m2_15 * m1_12,
-                    m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m2_15 * m1_13,
-                    m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m2_15 * m1_14,
-                    m2_12 * m1_3 + m2_13 * m1_7 + m2_14 * m1_11 + m2_15 * m1_15]
+        kind = min(self._kind, rhs._kind)
+        if kind:
+            self._set_components(_affine_product(self._m, rhs._m))
+        else:
+            self._set_components(_general_product(self._m, rhs._m))
+        self._kind = kind
 
         return self
 
@@ -538,42 +688,18 @@ class Matrix44(object):
         """Multiplies this matrix by another. Assumes that both matrices have
         a right column of (0, 0, 0, 1). This is true for matrices composed
         of rotations, translations and scales. fast_mul is approximately 25%
-        quicker than the *= operator.
+        quicker than the *= operator. The * and *= operators now do the
+        same automatically for matrices that are known to be affine.
 
         rhs -- A matrix
 
         """
 
-        m1_0,  m1_1,  m1_2,  m1_3, \
-        m1_4,  m1_5,  m1_6,  m1_7, \
-        m1_8,  m1_9,  m1_10, m1_11, \
-        m1_12, m1_13, m1_14, m1_15 = self._m
-
-        m2_0,  m2_1,  m2_2,  m2_3, \
-        m2_4,  m2_5,  m2_6,  m2_7, \
-        m2_8,  m2_9,  m2_10, m2_11, \
-        m2_12, m2_13, m2_14, m2_15 = rhs._m
-
-
-        self._m = [ m2_0 * m1_0 + m2_1 * m1_4 + m2_2 * m1_8,
-                    m2_0 * m1_1 + m2_1 * m1_5 + m2_2 * m1_9,
-                    m2_0 * m1_2 + m2_1 * m1_6 + m2_2 * m1_10,
-                    0.0,
-
-                    m2_4 * m1_0 + m2_5 * m1_4 + m2_6 * m1_8,
-                    m2_4 * m1_1 + m2_5 * m1_5 + m2_6 * m1_9,
-                    m2_4 * m1_2 + m2_5 * m1_6 + m2_6 * m1_10,
-                    0.0,
-
-                    m2_8 * m1_0 + m2_9 * m1_4 + m2_10 * m1_8,
-                    m2_8 * m1_1 + m2_9 * m1_5 + m2_10 * m1_9,
-                    m2_8 * m1_2 + m2_9 * m1_6 + m2_10 * m1_10,
-                    0.0,
-
-                    m2_12 * m1_0 + m2_13 * m1_4 + m2_14 * m1_8 + m1_12,
-                    m2_12 * m1_1 + m2_13 * m1_5 + m2_14 * m1_9 + m1_13,
-                    m2_12 * m1_2 + m2_13 * m1_6 + m2_14 * m1_10 + m1_14,
-                    1.0 ]
+        self._set_components(_affine_product(self._m, rhs._m))
+        if self._kind == _RIGID and rhs._kind == _RIGID:
+            self._kind = _RIGID
+        else:
+            self._kind = _AFFINE
 
         return self
 
@@ -692,9 +818,16 @@ class Matrix44(object):
         except IndexError:
             raise IndexError( "Column should be 0, 1, 2 or 3" )
 
+        if col_no == 3:
+            self._kind = self._get_affine_kind()
+        elif self._kind == _RIGID:
+            self._kind = _AFFINE
+
 
     def transform_vec3(self, v):
         """Transforms a vector and returns the result as a Vector3.
+        For matrices that are not affine (e.g. projections) the result is
+        divided by w.
 
         v -- Vector to transform
 
@@ -702,12 +835,20 @@ class Matrix44(object):
 
         m = self._m
         x, y, z = v
-        return Vector3.from_floats( x * m[0] + y * m[4] + z * m[8]  + m[12],
-                                    x * m[1] + y * m[5] + z * m[9]  + m[13],
-                                    x * m[2] + y * m[6] + z * m[10] + m[14] )
+        if self._kind:
+            return Vector3.from_floats( x * m[0] + y * m[4] + z * m[8]  + m[12],
+                                        x * m[1] + y * m[5] + z * m[9]  + m[13],
+                                        x * m[2] + y * m[6] + z * m[10] + m[14] )
+
+        w = x * m[3] + y * m[7] + z * m[11] + m[15]
+        return Vector3.from_floats( (x * m[0] + y * m[4] + z * m[8]  + m[12]) / w,
+                                    (x * m[1] + y * m[5] + z * m[9]  + m[13]) / w,
+                                    (x * m[2] + y * m[6] + z * m[10] + m[14]) / w )
 
     def transform(self, v):
         """Transforms a Vector3 and returns the result as a tuple.
+        For matrices that are not affine (e.g. projections) the result is
+        divided by w.
 
         v -- Vector to transform
 
@@ -715,9 +856,15 @@ class Matrix44(object):
 
         m = self._m
         x, y, z = v
-        return ( x * m[0] + y * m[4] + z * m[8]  + m[12],
-                 x * m[1] + y * m[5] + z * m[9]  + m[13],
-                 x * m[2] + y * m[6] + z * m[10] + m[14] )
+        if self._kind:
+            return ( x * m[0] + y * m[4] + z * m[8]  + m[12],
+                     x * m[1] + y * m[5] + z * m[9]  + m[13],
+                     x * m[2] + y * m[6] + z * m[10] + m[14] )
+
+        w = x * m[3] + y * m[7] + z * m[11] + m[15]
+        return ( (x * m[0] + y * m[4] + z * m[8]  + m[12]) / w,
+                 (x * m[1] + y * m[5] + z * m[9]  + m[13]) / w,
+                 (x * m[2] + y * m[6] + z * m[10] + m[14]) / w )
 
 
     def transform4(self, v):
@@ -734,8 +881,28 @@ class Matrix44(object):
                  x * m[2] + y * m[6] + z * m[10] + w * m[14] )
 
 
+    def _iter_transform_general(self, points):
+
+        # As iter_transform, with the divide by w needed by matrices that
+        # are not affine
+        m_0,  m_1,  m_2,  m_3, \
+        m_4,  m_5,  m_6,  m_7, \
+        m_8,  m_9,  m_10, m_11, \
+        m_12, m_13, m_14, m_15 = self._m
+
+        for x, y, z in points:
+
+            w = x * m_3 + y * m_7 + z * m_11 + m_15
+            yield ( (x * m_0 + y * m_4 + z * m_8  + m_12) / w,
+                    (x * m_1 + y * m_5 + z * m_9  + m_13) / w,
+                    (x * m_2 + y * m_6 + z * m_10 + m_14) / w )
+
+
     def transform_sequence(self, points):
 
+        if not self._kind:
+            return list(self._iter_transform_general(points))
+
         m_0,  m_1,  m_2,  m_3, \
         m_4,  m_5,  m_6,  m_7, \
         m_8,  m_9,  m_10, m_11, \
@@ -749,6 +916,10 @@ class Matrix44(object):
 
     def transform_sequence_vec3(self, points):
 
+        if not self._kind:
+            return [ Vector3.from_floats(x, y, z)
+                     for x, y, z in self._iter_transform_general(points) ]
+
         m_0,  m_1,  m_2,  m_3, \
         m_4,  m_5,  m_6,  m_7, \
         m_8,  m_9,  m_10, m_11, \
@@ -769,6 +940,11 @@ class Matrix44(object):
 
         """
 
+        if not self._kind:
+            for x, y, z in self._iter_transform_general(points):
+                yield Vector3.from_floats(x, y, z)
+            return
+
         m_0,  m_1,  m_2,  m_3, \
         m_4,  m_5,  m_6,  m_7, \
         m_8,  m_9,  m_10, m_11, \
@@ -789,6 +965,11 @@ class Matrix44(object):
 
         """
 
+        if not self._kind:
+            for point in self._iter_transform_general(points):
+                yield point
+            return
+
         m_0, m_1, m_2, m_3, \
         m_4, m_5, m_6, m_7, \
         m_8, m_9, m_10, m_11, \
@@ -823,6 +1004,85 @@ class Matrix44(object):
                     x * m_2 + y * m_6 + z * m_10 + w * m_14 )
 
 
+    def _as_array(self):
+
+        import numpy
+        return numpy.array(self._m).reshape(4, 4)
+
+
+    def transform_array(self, points, out=None):
+        """Transforms an array of points and returns the result as an (N, 3)
+        array. As with transform, the result is divided by w for matrices
+        that are not affine. Requires NumPy.
+
+        points -- An (N, 3) array of points
+        out -- Optional (N, 3) float array to write the result in to
+
+        """
+
+        if not self._kind:
+            return self.project_array(points, out=out)
+
+        import numpy
+        m = self._as_array()
+        points = numpy.asarray(points)
+        out = numpy.matmul(points, m[:3, :3], out=out)
+        out += m[3, :3]
+        return out
+
+
+    def transform_array4(self, points, out=None):
+        """Transforms an array of 4d points by the full matrix and returns
+        the result as an (N, 4) array. Requires NumPy.
+
+        points -- An (N, 4) array of points
+        out -- Optional (N, 4) float array to write the result in to
+
+        """
+
+        import numpy
+        return numpy.matmul(numpy.asarray(points), self._as_array(), out=out)
+
+
+    def project_array(self, points, viewport=None, out=None):
+        """Transforms an array of points by the full matrix (typically a
+        projection multiplied by a view matrix) and applies the perspective
+        divide, in a single pass. Requires NumPy.
+
+        If a viewport is given, x and y are also mapped to screen
+        coordinates (with y increasing downwards, as used by pygame). Points
+        with w <= 0 are behind the viewer, and should be discarded by the
+        caller.
+
+        points -- An (N, 3) array of points, or (N, 4) with w components
+        viewport -- Optional (x, y, width, height) of the screen area
+        out -- Optional (N, 3) float array to write the result in to
+
+        """
+
+        import numpy
+        m = self._as_array()
+        points = numpy.asarray(points)
+        if points.shape[-1] == 4:
+            clip = numpy.matmul(points, m)
+        else:
+            clip = numpy.matmul(points, m[:3])
+            clip += m[3]
+
+        out = numpy.divide(clip[:, :3], clip[:, 3:], out=out)
+
+        if viewport is not None:
+            x, y, width, height = viewport
+            half_width = width / 2.
+            half_height = height / 2.
+            out[:, 0] *= half_width
+            out[:, 0] += x + half_width
+            out[:, 1] *= -half_height
+            out[:, 1] += y + half_height
+
+        return out
+
+
     def rotate_vec3(self, v):
         """Rotates a Vector3 and returns the result.
         The translation part of the Matrix44 is ignored.
@@ -868,17 +1128,19 @@ class Matrix44(object):
     def make_identity(self):
         """Makes an identity Matrix44."""
 
-        self._m = [1., 0., 0., 0.,
-                   0., 1., 0., 0.,
-                   0., 0., 1., 0.,
-                   0., 0., 0., 1.]
+        self._set_components([1., 0., 0., 0.,
+                              0., 1., 0., 0.,
+                              0., 0., 1., 0.,
+                              0., 0., 0., 1.])
+        self._kind = _RIGID
         return self
 
 
     def make_copy(self, other):
         """Makes a copy of another Matrix44."""
 
-        self._m = other._m[:]
+        self._set_components(other._m[:])
+        self._kind = other._kind
         return self
 
 
@@ -893,20 +1155,22 @@ class Matrix44(object):
         if scale_z is None:
             scale_z = scale_x
 
-        self._m =   [float(scale_x), 0.,             0.,             0.,
-                     0.,             float(scale_y), 0.,             0.,
-                     0.,             0.,             float(scale_z), 0.,
-                     0.,             0.,             0.,             1.]
+        self._set_components([float(scale_x), 0.,             0.,             0.,
+                              0.,             float(scale_y), 0.,             0.,
+                              0.,             0.,             float(scale_z), 0.,
+                              0.,             0.,             0.,             1.])
+        self._kind = _AFFINE
         return self
 
 
     def make_translation(self, x, y, z):
         """Makes a translation Matrix44."""
 
-        self._m =   [1.,       0.,       0.,       0.,
-                     0.,       1.,       0.,       0.,
-                     0.,       0.,       1.,       0.,
-                     float(x), float(y), float(z), 1.]
+        self._set_components([1.,       0.,       0.,       0.,
+                              0.,       1.,       0.,       0.,
+                              0.,       0.,       1.,       0.,
+                              float(x), float(y), float(z), 1.])
+        self._kind = _RIGID
         return self
 
 
@@ -916,10 +1180,11 @@ class Matrix44(object):
         cos_a = cos(angle)
         sin_a = sin(angle)
 
-        self._m =  [1.,  0.,      0.,     0.,
-                    0.,  cos_a,   sin_a,  0.,
-                    0., -sin_a,   cos_a,  0.,
-                    0.,  0.,      0.,     1.]
+        self._set_components([1.,  0.,      0.,     0.,
+                              0.,  cos_a,   sin_a,  0.,
+                              0., -sin_a,   cos_a,  0.,
+                              0.,  0.,      0.,     1.])
+        self._kind = _RIGID
         return self
 
     def make_y_rotation(self, angle):
@@ -928,10 +1193,11 @@ class Matrix44(object):
         cos_a = cos(angle)
         sin_a = sin(angle)
 
-        self._m =  [ cos_a,  0., -sin_a,  0.,
-                     0.,     1.,  0.,     0.,
-                     sin_a,  0.,  cos_a,  0.,
-                     0.,     0.,  0.,     1.]
+        self._set_components([ cos_a,  0., -sin_a,  0.,
+                               0.,     1.,  0.,     0.,
+                               sin_a,  0.,  cos_a,  0.,
+                               0.,     0.,  0.,     1.])
+        self._kind = _RIGID
         return self
 
 
@@ -941,10 +1207,11 @@ class Matrix44(object):
         cos_a = cos(angle)
         sin_a = sin(angle)
 
-        self._m =  [  cos_a,   sin_a,  0.,  0.,
-                     -sin_a,   cos_a,  0.,  0.,
-                      0.,      0.,     1.,  0.,
-                      0.,      0.,     0.,  1.]
+        self._set_components([  cos_a,   sin_a,  0.,  0.,
+                               -sin_a,   cos_a,  0.,  0.,
+                                0.,      0.,     1.,  0.,
+                                0.,      0.,     0.,  1.])
+        self._kind = _RIGID
         return self
 
 
@@ -961,10 +1228,15 @@ class Matrix44(object):
         omc = 1. - c
         x, y, z = axis
 
-        self._m = [x*x*omc+c,   y*x*omc+z*s, x*z*omc-y*s, 0.,
-                   x*y*omc-z*s, y*y*omc+c,   y*z*omc+x*s, 0.,
-                   x*z*omc+y*s, y*z*omc-x*s, z*z*omc+c,   0.,
-                   0.,          0.,          0.,          1.]
+        self._set_components([x*x*omc+c,   y*x*omc+z*s, x*z*omc-y*s, 0.,
+                              x*y*omc-z*s, y*y*omc+c,   y*z*omc+x*s, 0.,
+                              x*z*omc+y*s, y*z*omc-x*s, z*z*omc+c,   0.,
+                              0.,          0.,          0.,          1.])
+        # Only rigid if the axis is a unit vector
+        if abs(x*x + y*y + z*z - 1.) < 1e-9:
+            self._kind = _RIGID
+        else:
+            self._kind = _AFFINE
         return self
 
 
@@ -994,10 +1266,11 @@ class Matrix44(object):
     #     | -ADE+BF   ADF+BE   AC  0 |
     #     |  0        0        0   1 |
 
-        self._m = [ cy*cz,  sxsy*cz+cx*sz,  -cxsy*cz+sx*sz, 0.,
-                    -cy*sz, -sxsy*sz+cx*cz, cxsy*sz+sx*cz,  0.,
-                    sy,     -sx*cy,         cx*cy,          0.,
-                    0.,     0.,             0.,             1.]
+        self._set_components([ cy*cz,  sxsy*cz+cx*sz,  -cxsy*cz+sx*sz, 0.,
+                               -cy*sz, -sxsy*sz+cx*cz, cxsy*sz+sx*cz,  0.,
+                               sy,     -sx*cy,         cx*cy,          0.,
+                               0.,     0.,             0.,             1.])
+        self._kind = _RIGID
 
         return self
 
@@ -1014,10 +1287,11 @@ class Matrix44(object):
 
         """
 
-        self._m = [(2.*near)/(right-left),    0.,                        0.,                          0.,
-                   0.,                        (2.*near)/(top-bottom),    0.,                          0.,
-                   (right+left)/(right-left), (top+bottom)/(top-bottom), -((far+near)/(far-near)),   -1.,
-                   0.,                        0.,                        -((2.*far*near)/(far-near)), 0.]
+        self._set_components([(2.*near)/(right-left),    0.,                        0.,                          0.,
+                              0.,                        (2.*near)/(top-bottom),    0.,                          0.,
+                              (right+left)/(right-left), (top+bottom)/(top-bottom), -((far+near)/(far-near)),   -1.,
+                              0.,                        0.,                        -((2.*far*near)/(far-near)), 0.])
+        self._kind = _GENERAL
         return self
 
 
@@ -1056,10 +1330,15 @@ class Matrix44(object):
         m20, m21, m22, m23, \
         m30, m31, m32, m33 = self._m
 
-        self._m = [ m00, m10, m20, m30,
-                    m01, m11, m21, m31,
-                    m02, m12, m22, m32,
-                    m03, m13, m23, m33 ]
+        self._set_components([ m00, m10, m20, m30,
+                               m01, m11, m21, m31,
+                               m02, m12, m22, m32,
+                               m03, m13, m23, m33 ])
+
+        # The transpose of a rotation is a rotation, but a translation ends
+        # up in the right column
+        if self._get_affine_kind() == _GENERAL:
+            self._kind = _GENERAL
 
 
     def get_transpose(self):
@@ -1078,6 +1357,11 @@ class Matrix44(object):
                    m02, m12, m22, m32,
                    m03, m13, m23, m33 ]
 
+        if ret._get_affine_kind() == _GENERAL:
+            ret._kind = _GENERAL
+        else:
+            ret._kind = self._kind
+
         return ret
 
 
@@ -1118,7 +1402,20 @@ class Matrix44(object):
     def get_inverse(self):
 
         """Returns the inverse (matrix with the opposite effect) of this
-        matrix."""
+        matrix. Uses the quickest method that is correct for this matrix."""
+
+        kind = self._kind
+        if kind == _RIGID:
+            return self.get_inverse_rot_trans()
+        elif kind == _AFFINE:
+            return self.get_inverse_affine()
+        return self.get_inverse_general()
+
+
+    def get_inverse_affine(self):
+
+        """Returns the inverse of an affine Matrix44 (one with a right column
+        of (0, 0, 0, 1)). This is faster than get_inverse_general."""
 
         ret = self.__new__(self.__class__, object)
         i = self._m
@@ -1173,6 +1470,62 @@ class Matrix44(object):
         m[12] = - ( i12 * m[0] + i13 * m[4] + i14 * m[8] )
         m[13] = - ( i12 * m[1] + i13 * m[5] + i14 * m[9] )
         m[14] = - ( i12 * m[2] + i13 * m[6] + i14 * m[10] )
+        ret._kind = _AFFINE
+
+        return ret
+
+
+    def get_inverse_general(self):
+
+        """Returns the inverse of any invertible Matrix44, including
+        projections."""
+
+        i0,  i1,  i2,  i3, \
+        i4,  i5,  i6,  i7, \
+        i8,  i9,  i10, i11, \
+        i12, i13, i14, i15 = self._m
+
+        # 2x2 sub-determinants of the top and bottom halves
+        s0 = i0 * i5 - i4 * i1
+        s1 = i0 * i6 - i4 * i2
+        s2 = i0 * i7 - i4 * i3
+        s3 = i1 * i6 - i5 * i2
+        s4 = i1 * i7 - i5 * i3
+        s5 = i2 * i7 - i6 * i3
+
+        c5 = i10 * i15 - i14 * i11
+        c4 = i9 * i15 - i13 * i11
+        c3 = i9 * i14 - i13 * i10
+        c2 = i8 * i15 - i12 * i11
+        c1 = i8 * i14 - i12 * i10
+        c0 = i8 * i13 - i12 * i9
+
+        det = s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+        if det == 0.:
+            raise Matrix44Error("notivertable", "This Matrix44 can not be inverted")
+        det_1 = 1. / det
+
+        ret = self.__new__(self.__class__, object)
+        ret._m = [ ( i5 * c5 - i6 * c4 + i7 * c3) * det_1,
+                   (-i1 * c5 + i2 * c4 - i3 * c3) * det_1,
+                   ( i13 * s5 - i14 * s4 + i15 * s3) * det_1,
+                   (-i9 * s5 + i10 * s4 - i11 * s3) * det_1,
+
+                   (-i4 * c5 + i6 * c2 - i7 * c1) * det_1,
+                   ( i0 * c5 - i2 * c2 + i3 * c1) * det_1,
+                   (-i12 * s5 + i14 * s2 - i15 * s1) * det_1,
+                   ( i8 * s5 - i10 * s2 + i11 * s1) * det_1,
+
+                   ( i4 * c4 - i5 * c2 + i7 * c0) * det_1,
+                   (-i0 * c4 + i1 * c2 - i3 * c0) * det_1,
+                   ( i12 * s4 - i13 * s2 + i15 * s0) * det_1,
+                   (-i8 * s4 + i9 * s2 - i11 * s0) * det_1,
+
+                   (-i4 * c3 + i5 * c1 - i6 * c0) * det_1,
+                   ( i0 * c3 - i1 * c1 + i2 * c0) * det_1,
+                   (-i12 * s3 + i13 * s1 - i14 * s0) * det_1,
+                   ( i8 * s3 - i9 * s1 + i10 * s0) * det_1 ]
+        ret._kind = ret._get_affine_kind()
 
         return ret
 
@@ -1181,7 +1534,7 @@ class Matrix44(object):
 
         """Inverts this matrix."""
 
-        self._m[:] = self.get_inverse()._m
+        self._m[:] = _like(self._m, self.get_inverse()._m)
 
 
     def move(self, forward=None, right=None, up=None):
@@ -0,0 +1,399 @@
+import numpy
+
+from .matrix44 import Matrix44, Matrix44Error
+from .vectorarray import Vector3Array
+
+
+class Matrix44Array(object):
+
+    """A stack of N Matrix44s stored in a single (N, 4, 4) NumPy buffer.
+    Matrices use the same row-major layout as Matrix44 (the translation is in
+    the fourth row), so each element is interchangeable with a Matrix44.
+
+    """
+
+    __slots__ = ('_a',)
+
+
+    def __init__(self, matrices=(), dtype=float):
+        """Creates a matrix array from a sequence of Matrix44s (or sequences
+        of 16 values).
+
+        matrices -- Sequence of matrices
+        dtype -- NumPy data type of the buffer (defaults to float)
+
+        """
+
+        a = numpy.array([list(m) for m in matrices], dtype=dtype)
+        if a.size == 0:
+            a = a.reshape(0, 16)
+        if a.ndim != 2 or a.shape[1] != 16:
+            raise ValueError("Matrix44Array requires a sequence of 16 value matrices")
+        self._a = a.reshape(-1, 4, 4)
+
+
+    @classmethod
+    def from_array(cls, array, copy=False):
+        """Creates a matrix array that wraps an existing (N, 4, 4) array.
+
+        array -- A NumPy array
+        copy -- If True, the array is copied
+
+        """
+
+        a = numpy.asarray(array)
+        if a.dtype.kind != 'f':
+            a = a.astype(float)
+        elif copy:
+            a = a.copy()
+        if a.ndim != 3 or a.shape[1:] != (4, 4):
+            raise ValueError("Array must have a shape of (N, 4, 4)")
+        ma = cls.__new__(cls, object)
+        ma._a = a
+        return ma
+
+
+    @classmethod
+    def identity(cls, count, dtype=float):
+        """Creates an array of count identity matrices."""
+
+        a = numpy.zeros((count, 4, 4), dtype=dtype)
+        a[:, [0, 1, 2, 3], [0, 1, 2, 3]] = 1.
+        return cls.from_array(a)
+
+
+    @classmethod
+    def scale(cls, scale_x, scale_y=None, scale_z=None):
+        """Creates an array of scale matrices.
+
+        scale_x -- Array of x scales (used for all axis if scale_y and scale_z
+        are not given)
+
+        """
+
+        scale_x = numpy.atleast_1d(numpy.asarray(scale_x, dtype=float))
+        if scale_y is None:
+            scale_y = scale_x
+        if scale_z is None:
+            scale_z = scale_x
+        ma = cls.identity(len(scale_x))
+        a = ma._a
+        a[:, 0, 0] = scale_x
+        a[:, 1, 1] = scale_y
+        a[:, 2, 2] = scale_z
+        return ma
+
+
+    @classmethod
+    def translation(cls, positions):
+        """Creates an array of translation matrices.
+
+        positions -- An (N, 3) array (or a Vector3Array) of translations
+
+        """
+
+        if isinstance(positions, Vector3Array):
+            positions = positions.array
+        positions = numpy.asarray(positions, dtype=float)
+        ma = cls.identity(len(positions))
+        ma._a[:, 3, :3] = positions
+        return ma
+
+
+    @classmethod
+    def x_rotation(cls, angles):
+        """Creates an array of rotations about the x axis.
+
+        angles -- Array of angles (in radians)
+
+        """
+
+        angles = numpy.atleast_1d(numpy.asarray(angles, dtype=float))
+        cos_a = numpy.cos(angles)
+        sin_a = numpy.sin(angles)
+        ma = cls.identity(len(angles))
+        a = ma._a
+        a[:, 1, 1] = cos_a
+        a[:, 1, 2] = sin_a
+        a[:, 2, 1] = -sin_a
+        a[:, 2, 2] = cos_a
+        return ma
+
+
+    @classmethod
+    def y_rotation(cls, angles):
+        """Creates an array of rotations about the y axis.
+
+        angles -- Array of angles (in radians)
+
+        """
+
+        angles = numpy.atleast_1d(numpy.asarray(angles, dtype=float))
+        cos_a = numpy.cos(angles)
+        sin_a = numpy.sin(angles)
+        ma = cls.identity(len(angles))
+        a = ma._a
+        a[:, 0, 0] = cos_a
+        a[:, 0, 2] = -sin_a
+        a[:, 2, 0] = sin_a
+        a[:, 2, 2] = cos_a
+        return ma
+
+
+    @classmethod
+    def z_rotation(cls, angles):
+        """Creates an array of rotations about the z axis.
+
+        angles -- Array of angles (in radians)
+
+        """
+
+        angles = numpy.atleast_1d(numpy.asarray(angles, dtype=float))
+        cos_a = numpy.cos(angles)
+        sin_a = numpy.sin(angles)
+        ma = cls.identity(len(angles))
+        a = ma._a
+        a[:, 0, 0] = cos_a
+        a[:, 0, 1] = sin_a
+        a[:, 1, 0] = -sin_a
+        a[:, 1, 1] = cos_a
+        return ma
+
+
+    @classmethod
+    def xyz_rotation(cls, angles_x, angles_y, angles_z):
+        """Creates an array of rotations about each axis (see
+        Matrix44.xyz_rotation).
+
+        angles_x -- Array of angles of rotation, about x
+        angles_y -- Array of angles of rotation, about y
+        angles_z -- Array of angles of rotation, about z
+
+        """
+
+        angles_x, angles_y, angles_z = numpy.broadcast_arrays(
+            numpy.atleast_1d(numpy.asarray(angles_x, dtype=float)),
+            numpy.atleast_1d(numpy.asarray(angles_y, dtype=float)),
+            numpy.atleast_1d(numpy.asarray(angles_z, dtype=float)) )
+
+        cx = numpy.cos(angles_x)
+        sx = numpy.sin(angles_x)
+        cy = numpy.cos(angles_y)
+        sy = numpy.sin(angles_y)
+        cz = numpy.cos(angles_z)
+        sz = numpy.sin(angles_z)
+
+        sxsy = sx*sy
+        cxsy = cx*sy
+
+        ma = cls.identity(len(angles_x))
+        a = ma._a
+        a[:, 0, 0] = cy*cz
+        a[:, 0, 1] = sxsy*cz+cx*sz
+        a[:, 0, 2] = -cxsy*cz+sx*sz
+        a[:, 1, 0] = -cy*sz
+        a[:, 1, 1] = -sxsy*sz+cx*cz
+        a[:, 1, 2] = cxsy*sz+sx*cz
+        a[:, 2, 0] = sy
+        a[:, 2, 1] = -sx*cy
+        a[:, 2, 2] = cx*cy
+        return ma
+
+
+    def copy(self):
+        """Returns a copy of this matrix array."""
+
+        ma = self.__new__(self.__class__, object)
+        ma._a = self._a.copy()
+        return ma
+    __copy__ = copy
+
+
+    def _get_array(self):
+        return self._a
+    array = property(_get_array, None, None, "The underlying (N, 4, 4) NumPy array.")
+
+
+    def _get_translate(self):
+        return self._a[:, 3, :3]
+    def _set_translate(self, translate):
+        if isinstance(translate, Vector3Array):
+            translate = translate.array
+        self._a[:, 3, :3] = translate
+    translate = property(_get_translate, _set_translate, None, "(N, 3) view of the translations.")
+
+
+    def __repr__(self):
+
+        return "Matrix44Array(%r)" % self._a.reshape(-1, 16).tolist()
+
+
+    def __len__(self):
+
+        return len(self._a)
+
+
+    def __iter__(self):
+        """Iterates over the matrices, as Matrix44 copies."""
+
+        from_float_sequence = Matrix44._from_float_sequence
+        for values in self._a.reshape(-1, 16).tolist():
+            yield from_float_sequence(values)
+
+
+    def __getitem__(self, index):
+        """Retrieves a single matrix (as a Matrix44 copy) for an integer
+        index, or a new matrix array for a slice, index array or boolean mask.
+
+        """
+
+        if isinstance(index, (int, numpy.integer)):
+            try:
+                values = self._a[index].ravel().tolist()
+            except IndexError:
+                raise IndexError("Matrix index out of range")
+            return Matrix44._from_float_sequence(values)
+
+        ma = self.__new__(self.__class__, object)
+        ma._a = self._a[index]
+        return ma
+
+
+    def __setitem__(self, index, value):
+        """Sets one or more matrices in the array."""
+
+        if isinstance(value, Matrix44Array):
+            self._a[index] = value._a
+        elif isinstance(value, Matrix44):
+            self._a[index] = numpy.reshape(value._m, (4, 4))
+        else:
+            self._a[index] = value
+
+
+    def _operand(self, rhs):
+
+        if isinstance(rhs, Matrix44Array):
+            return rhs._a
+        if isinstance(rhs, Matrix44):
+            return numpy.reshape(rhs._m, (4, 4))
+        return numpy.asarray(rhs, dtype=self._a.dtype)
+
+
+    def __mul__(self, rhs):
+        """Returns the result of multiplying each matrix by a Matrix44, or by
+        the corresponding matrix in another matrix array. Has the same
+        meaning as Matrix44.__mul__."""
+
+        ma = self.__new__(self.__class__, object)
+        ma._a = numpy.matmul(self._operand(rhs), self._a)
+        return ma
+
+
+    def __rmul__(self, lhs):
+
+        ma = self.__new__(self.__class__, object)
+        ma._a = numpy.matmul(self._a, self._operand(lhs))
+        return ma
+
+
+    def __imul__(self, rhs):
+
+        numpy.matmul(self._operand(rhs), self._a.copy(), out=self._a)
+        return self
+
+
+    def fast_mul(self, rhs):
+        """Multiplies these matrices by another matrix (or matrix array) in
+        place. Assumes that all matrices have a right column of (0, 0, 0, 1),
+        see Matrix44.fast_mul.
+
+        rhs -- A Matrix44 or Matrix44Array
+
+        """
+
+        a = self._a
+        m2 = self._operand(rhs)
+
+        rot = a[:, :3, :3]
+        new_translate = numpy.matmul(m2[..., 3:, :3], rot)[:, 0] + a[:, 3, :3]
+        a[:, :3, :3] = numpy.matmul(m2[..., :3, :3], rot)
+        a[:, 3, :3] = new_translate
+        a[:, :3, 3] = 0.
+        a[:, 3, 3] = 1.
+        return self
+
+
+    def get_transpose(self):
+        """Returns a matrix array with the rows and columns of each matrix
+        swapped."""
+
+        ma = self.__new__(self.__class__, object)
+        ma._a = self._a.transpose(0, 2, 1).copy()
+        return ma
+
+
+    def get_inverse_rot_trans(self):
+        """Returns the inverse of matrices with only rotation and
+        translation, see Matrix44.get_inverse_rot_trans."""
+
+        a = self._a
+        ret = numpy.zeros_like(a)
+        rot_t = a[:, :3, :3].transpose(0, 2, 1)
+        ret[:, :3, :3] = rot_t
+        ret[:, 3, :3] = -numpy.einsum('nj,nij->ni', a[:, 3, :3], a[:, :3, :3])
+        ret[:, 3, 3] = 1.
+        return self.from_array(ret)
+
+
+    def get_inverse(self):
+        """Returns the general inverse of each matrix.
+
+        Raises a Matrix44Error if any of the matrices can not be inverted.
+
+        """
+
+        try:
+            inverse = numpy.linalg.inv(self._a)
+        except numpy.linalg.LinAlgError:
+            raise Matrix44Error("notivertable", "This Matrix44 can not be inverted")
+        return self.from_array(inverse)
+
+
+    def transform(self, points):
+        """Transforms one point by each matrix, and returns the result as a
+        Vector3Array.
+
+        points -- An (N, 3) array (or a Vector3Array) of points, or a single
+        point to be transformed by every matrix
+
+        """
+
+        if isinstance(points, Vector3Array):
+            points = points.array
+        points = numpy.asarray(points, dtype=float)
+        a = self._a
+        if points.ndim == 1:
+            result = numpy.matmul(points, a[:, :3, :3]) + a[:, 3, :3]
+        else:
+            result = numpy.einsum('ni,nij->nj', points, a[:, :3, :3]) + a[:, 3, :3]
+        return Vector3Array.from_array(result)
+
+
+    def to_opengl(self):
+        """Returns an (N, 16) array of values, each row suitable for using
+        with glLoadMatrix*."""
+
+        return self._a.reshape(-1, 16).copy()
+
+
+if __name__ == "__main__":
+
+    from math import radians
+
+    ma = Matrix44Array.xyz_rotation([radians(45), 0.], [radians(20), 0.], 0.)
+    ma.translate = [(1, 2, 3), (4, 5, 6)]
+    print(ma[0])
+    print(ma.get_inverse_rot_trans()[0])
+    print(ma[0].get_inverse_rot_trans())
+    print((ma * Matrix44.z_rotation(radians(32)))[0])
+    print(ma.transform((1, 0, 0)))
@@ -0,0 +1,190 @@
+from .vector2 import Vector2
+from .vector3 import Vector3
+from .matrix44 import Matrix44, _RIGID
+
+
+_IDENTITY = [1.,0.,0.,0., 0.,1.,0.,0., 0.,0.,1.,0., 0.,0.,0.,1.]
+
+
+class PoolError(Exception):
+
+    """Raised when a temporary object is used after its pool was recycled."""
+
+
+class _Recycled(object):
+
+    """Replaces the components of an object when the pool is recycled in
+    debug mode, so that any further use of the object raises a PoolError."""
+
+    __slots__ = ('_description',)
+
+    def __init__(self, description):
+        self._description = description
+
+    def _fail(self, *args):
+        raise PoolError("%s was used after its FramePool was recycled" % self._description)
+
+    __getitem__ = __setitem__ = __iter__ = __len__ = _fail
+    __eq__ = __ne__ = __contains__ = _fail
+
+    __hash__ = None
+
+
+class FramePool(object):
+
+    """A source of temporary Vector2, Vector3 and Matrix44 objects for use
+    in hot loops. Objects are handed out during a frame, then all of them
+    are reused by calling recycle() at the end of the frame, so no garbage
+    is created once the pool has grown to its working size.
+
+    Temporaries must not be kept past the end of the frame. Copy them if
+    they are needed for longer. Arithmetic operators still create new
+    objects, so use the in-place operators (+=, -=, *=, normalise() etc)
+    on pooled objects.
+
+    In debug mode, recycled objects are not reused. Their components are
+    replaced instead, so a reference that is used after recycle() raises a
+    PoolError rather than silently seeing another entity's values.
+
+    """
+
+    __slots__ = ('debug',
+                 '_vector2s', '_vector2_count',
+                 '_vector3s', '_vector3_count',
+                 '_matrices', '_matrix_count')
+
+
+    def __init__(self, debug=False):
+        """Creates an empty pool.
+
+        debug -- If True, catch temporaries that are used after recycle()
+
+        """
+
+        self.debug = debug
+        self._vector2s = []
+        self._vector2_count = 0
+        self._vector3s = []
+        self._vector3_count = 0
+        self._matrices = []
+        self._matrix_count = 0
+
+
+    def vector2(self, x=0., y=0.):
+        """Returns a temporary Vector2.
+
+        x -- x component
+        y -- y component
+
+        """
+
+        i = self._vector2_count
+        self._vector2_count = i + 1
+        pool = self._vector2s
+        if i < len(pool):
+            v = pool[i]
+            components = v._v
+            components[0] = float(x)
+            components[1] = float(y)
+            return v
+        v = Vector2.from_floats(float(x), float(y))
+        pool.append(v)
+        return v
+
+
+    def vector3(self, x=0., y=0., z=0.):
+        """Returns a temporary Vector3.
+
+        x -- x component
+        y -- y component
+        z -- z component
+
+        """
+
+        i = self._vector3_count
+        self._vector3_count = i + 1
+        pool = self._vector3s
+        if i < len(pool):
+            v = pool[i]
+            components = v._v
+            components[0] = float(x)
+            components[1] = float(y)
+            components[2] = float(z)
+            return v
+        v = Vector3.from_floats(float(x), float(y), float(z))
+        pool.append(v)
+        return v
+
+
+    def matrix44(self, copy_matrix=None):
+        """Returns a temporary Matrix44.
+
+        copy_matrix -- Matrix to copy, or None for an identity matrix
+
+        """
+
+        i = self._matrix_count
+        self._matrix_count = i + 1
+        pool = self._matrices
+        if i < len(pool):
+            m = pool[i]
+        else:
+            m = Matrix44()
+            pool.append(m)
+        if copy_matrix is None:
+            m._m[:] = _IDENTITY
+            m._kind = _RIGID
+        else:
+            m._m[:] = copy_matrix._m
+            m._kind = copy_matrix._kind
+        return m
+
+
+    def recycle(self):
+        """Reclaims every object handed out since the last call. Call once
+        per frame."""
+
+        if self.debug:
+            for v in self._vector2s[:self._vector2_count]:
+                v._v = _Recycled("A pooled Vector2")
+            for v in self._vector3s[:self._vector3_count]:
+                v._v = _Recycled("A pooled Vector3")
+            for m in self._matrices[:self._matrix_count]:
+                m._m = _Recycled("A pooled Matrix44")
+            self._vector2s = []
+            self._vector3s = []
+            self._matrices = []
+
+        self._vector2_count = 0
+        self._vector3_count = 0
+        self._matrix_count = 0
+
+
+    def get_counts(self):
+        """Returns the number of Vector2s, Vector3s and Matrix44s handed out
+        since the last recycle."""
+
+        return (self._vector2_count, self._vector3_count, self._matrix_count)
+
+
+    def __repr__(self):
+
+        return "FramePool(%i Vector2s, %i Vector3s, %i Matrix44s in use)" % self.get_counts()
+
+
+if __name__ == "__main__":
+
+    pool = FramePool(debug=True)
+
+    location = Vector2(10, 20)
+    heading = pool.vector2(100, 50)
+    heading -= location
+    heading.normalise()
+    location += heading * 5.
+    print(location, pool)
+
+    pool.recycle()
+    try:
+        print(heading)
+    except PoolError as e:
+        print(e)
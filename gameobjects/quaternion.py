@@ -0,0 +1,404 @@
+from math import sqrt, sin, cos, acos
+
+from .util import format_number
+from .vector3 import Vector3
+from .matrix44 import Matrix44
+
+
+class Quaternion(object):
+
+    """A rotation, stored as the four components of a unit quaternion.
+
+    Multiplying quaternions composes rotations in the same order as
+    multiplying Matrix44s, i.e. (q1 * q2).get_matrix44() is the same as
+    q1.get_matrix44() * q2.get_matrix44().
+
+    """
+
+    __slots__ = ('_q',)
+
+
+    def __init__(self, *args):
+        """Creates a Quaternion from 4 values (x, y, z, w) or a sequence of
+        4 values. No arguments results in the identity (no rotation).
+
+        """
+
+        if not args:
+            self._q = [0., 0., 0., 1.]
+        elif len(args) == 4:
+            self._q = list(map(float, args))
+        elif len(args) == 1:
+            x, y, z, w = args[0]
+            self._q = [float(x), float(y), float(z), float(w)]
+        else:
+            raise ValueError("Quaternion.__init__ takes 0, 1 or 4 parameters")
+
+
+    @classmethod
+    def from_floats(cls, x, y, z, w):
+        """Creates a Quaternion from individual float values.
+        Warning: There is no checking (for efficiency) here: x, y, z, w _must_
+        be floats.
+
+        """
+
+        q = cls.__new__(cls, object)
+        q._q = [x, y, z, w]
+        return q
+
+
+    @classmethod
+    def identity(cls):
+        """Creates an identity Quaternion (no rotation)."""
+
+        return cls.from_floats(0., 0., 0., 1.)
+
+
+    @classmethod
+    def from_axis_angle(cls, axis, angle):
+        """Creates a Quaternion that rotates about an axis.
+
+        axis -- A unit vector of the axis
+        angle -- Angle of rotation (in radians)
+
+        """
+
+        x, y, z = axis
+        half_angle = angle / 2.
+        s = sin(half_angle)
+        return cls.from_floats(x*s, y*s, z*s, cos(half_angle))
+
+
+    @classmethod
+    def x_rotation(cls, angle):
+        """Creates a Quaternion that rotates about the x axis."""
+
+        half_angle = angle / 2.
+        return cls.from_floats(sin(half_angle), 0., 0., cos(half_angle))
+
+
+    @classmethod
+    def y_rotation(cls, angle):
+        """Creates a Quaternion that rotates about the y axis."""
+
+        half_angle = angle / 2.
+        return cls.from_floats(0., sin(half_angle), 0., cos(half_angle))
+
+
+    @classmethod
+    def z_rotation(cls, angle):
+        """Creates a Quaternion that rotates about the z axis."""
+
+        half_angle = angle / 2.
+        return cls.from_floats(0., 0., sin(half_angle), cos(half_angle))
+
+
+    @classmethod
+    def xyz_rotation(cls, angle_x, angle_y, angle_z):
+        """Creates a Quaternion that does the same rotation as
+        Matrix44.xyz_rotation.
+
+        angle_x -- Angle of rotation, about x
+        angle_y -- Angle of rotation, about y
+        angle_z -- Angle of rotation, about z
+
+        """
+
+        return cls.x_rotation(angle_x) * \
+               cls.y_rotation(angle_y) * \
+               cls.z_rotation(angle_z)
+
+
+    @classmethod
+    def from_matrix44(cls, m):
+        """Creates a Quaternion from the rotation part of a Matrix44. The
+        matrix should not contain a scale.
+
+        m -- A Matrix44
+
+        """
+
+        m0,  m1,  m2,  m3, \
+        m4,  m5,  m6,  m7, \
+        m8,  m9,  m10, m11, \
+        m12, m13, m14, m15 = m._m
+
+        trace = m0 + m5 + m10
+        if trace > 0.:
+            s = 0.5 / sqrt(trace + 1.)
+            q = ( (m6 - m9) * s,
+                  (m8 - m2) * s,
+                  (m1 - m4) * s,
+                  0.25 / s )
+        elif m0 > m5 and m0 > m10:
+            s = 2. * sqrt(1. + m0 - m5 - m10)
+            q = ( 0.25 * s,
+                  (m4 + m1) / s,
+                  (m8 + m2) / s,
+                  (m6 - m9) / s )
+        elif m5 > m10:
+            s = 2. * sqrt(1. + m5 - m0 - m10)
+            q = ( (m4 + m1) / s,
+                  0.25 * s,
+                  (m9 + m6) / s,
+                  (m8 - m2) / s )
+        else:
+            s = 2. * sqrt(1. + m10 - m0 - m5)
+            q = ( (m8 + m2) / s,
+                  (m9 + m6) / s,
+                  0.25 * s,
+                  (m1 - m4) / s )
+
+        return cls.from_floats(*q)
+
+
+    def copy(self):
+        """Returns a copy of this quaternion."""
+
+        q = self.__new__(self.__class__, object)
+        q._q = self._q[:]
+        return q
+    __copy__ = copy
+
+
+    def _get_x(self):
+        return self._q[0]
+    x = property(_get_x, None, None, "x component.")
+
+    def _get_y(self):
+        return self._q[1]
+    y = property(_get_y, None, None, "y component.")
+
+    def _get_z(self):
+        return self._q[2]
+    z = property(_get_z, None, None, "z component.")
+
+    def _get_w(self):
+        return self._q[3]
+    w = property(_get_w, None, None, "w component.")
+
+
+    def __str__(self):
+
+        return "(%s)" % ", ".join(format_number(c) for c in self._q)
+
+
+    def __repr__(self):
+
+        x, y, z, w = self._q
+        return "Quaternion(%s, %s, %s, %s)" % (x, y, z, w)
+
+
+    def __len__(self):
+
+        return 4
+
+    def __iter__(self):
+
+        return iter(self._q[:])
+
+    def __getitem__(self, index):
+
+        try:
+            return self._q[index]
+        except IndexError:
+            raise IndexError("There are 4 values in this object, index should be 0, 1, 2 or 3!")
+
+
+    def __eq__(self, rhs):
+
+        x, y, z, w = self._q
+        xx, yy, zz, ww = rhs
+        return x==xx and y==yy and z==zz and w==ww
+
+    def __ne__(self, rhs):
+
+        return not self.__eq__(rhs)
+
+    __hash__ = None
+
+
+    def __mul__(self, rhs):
+        """Returns the composition of two rotations (rhs is applied first)."""
+
+        x1, y1, z1, w1 = self._q
+        x2, y2, z2, w2 = rhs._q
+        return self.from_floats( w1*x2 + x1*w2 + y1*z2 - z1*y2,
+                                 w1*y2 - x1*z2 + y1*w2 + z1*x2,
+                                 w1*z2 + x1*y2 - y1*x2 + z1*w2,
+                                 w1*w2 - x1*x2 - y1*y2 - z1*z2 )
+
+
+    def __imul__(self, rhs):
+        """Composes another rotation with this quaternion (rhs is applied
+        first)."""
+
+        self._q = (self * rhs)._q
+        return self
+
+
+    def __neg__(self):
+        """Returns the inverse rotation."""
+
+        return self.get_conjugate()
+
+
+    def get_conjugate(self):
+        """Returns the conjugate, which is the inverse rotation for a unit
+        quaternion."""
+
+        x, y, z, w = self._q
+        return self.from_floats(-x, -y, -z, w)
+    get_inverse = get_conjugate
+
+
+    def get_length(self):
+        """Returns the length of this quaternion (1 for a rotation)."""
+
+        x, y, z, w = self._q
+        return sqrt(x*x + y*y + z*z + w*w)
+
+
+    def normalise(self):
+        """Scales this quaternion to be length 1, which removes drift after
+        many compositions."""
+
+        q = self._q
+        x, y, z, w = q
+        l = sqrt(x*x + y*y + z*z + w*w)
+        try:
+            q[0] = x / l
+            q[1] = y / l
+            q[2] = z / l
+            q[3] = w / l
+        except ZeroDivisionError:
+            q[:] = [0., 0., 0., 1.]
+        return self
+    normalize = normalise
+
+
+    def get_normalised(self):
+
+        return self.copy().normalise()
+    get_normalized = get_normalised
+
+
+    def dot(self, other):
+        """Returns the dot product of this quaternion with another."""
+
+        x, y, z, w = self._q
+        xx, yy, zz, ww = other
+        return x*xx + y*yy + z*zz + w*ww
+
+
+    def rotate(self, v):
+        """Rotates a vector and returns the result as a tuple.
+
+        v -- Vector to rotate
+
+        """
+
+        x, y, z, w = self._q
+        vx, vy, vz = v
+
+        # t = 2 * cross(q.xyz, v)
+        tx = 2. * (y*vz - z*vy)
+        ty = 2. * (z*vx - x*vz)
+        tz = 2. * (x*vy - y*vx)
+
+        return ( vx + w*tx + y*tz - z*ty,
+                 vy + w*ty + z*tx - x*tz,
+                 vz + w*tz + x*ty - y*tx )
+
+
+    def rotate_vec3(self, v):
+        """Rotates a vector and returns the result as a Vector3.
+
+        v -- Vector to rotate
+
+        """
+
+        return Vector3.from_floats(*self.rotate(v))
+
+
+    def get_matrix44(self):
+        """Returns a rotation Matrix44 that does the same rotation."""
+
+        x, y, z, w = self._q
+
+        xx = x*x
+        yy = y*y
+        zz = z*z
+        xy = x*y
+        xz = x*z
+        yz = y*z
+        wx = w*x
+        wy = w*y
+        wz = w*z
+
+        return Matrix44._from_float_sequence(
+            [ 1.-2.*(yy+zz), 2.*(xy+wz),    2.*(xz-wy),    0.,
+              2.*(xy-wz),    1.-2.*(xx+zz), 2.*(yz+wx),    0.,
+              2.*(xz+wy),    2.*(yz-wx),    1.-2.*(xx+yy), 0.,
+              0.,            0.,            0.,            1. ], rigid=True)
+
+
+    def nlerp(self, other, i):
+        """Returns a normalised linear interpolation between this quaternion
+        and another. Cheaper than slerp, and close to it for small angles.
+
+        other -- Quaternion to interpolate to
+        i -- Interpolant, 0 to 1
+
+        """
+
+        x, y, z, w = self._q
+        xx, yy, zz, ww = other._q
+        if x*xx + y*yy + z*zz + w*ww < 0.:
+            xx, yy, zz, ww = -xx, -yy, -zz, -ww
+        return self.from_floats( x + (xx-x)*i,
+                                 y + (yy-y)*i,
+                                 z + (zz-z)*i,
+                                 w + (ww-w)*i ).normalise()
+
+
+    def slerp(self, other, i):
+        """Returns a spherical linear interpolation between this quaternion
+        and another (constant angular velocity).
+
+        other -- Quaternion to interpolate to
+        i -- Interpolant, 0 to 1
+
+        """
+
+        x, y, z, w = self._q
+        xx, yy, zz, ww = other._q
+        d = x*xx + y*yy + z*zz + w*ww
+        if d < 0.:
+            xx, yy, zz, ww = -xx, -yy, -zz, -ww
+            d = -d
+        if d > 0.9995:
+            return self.nlerp(other, i)
+
+        theta = acos(d)
+        sin_theta = sin(theta)
+        a = sin((1. - i) * theta) / sin_theta
+        b = sin(i * theta) / sin_theta
+        return self.from_floats( x*a + xx*b,
+                                 y*a + yy*b,
+                                 z*a + zz*b,
+                                 w*a + ww*b )
+
+
+if __name__ == "__main__":
+
+    from math import radians
+
+    q = Quaternion.xyz_rotation(radians(45), radians(20), radians(0))
+    print(q)
+    print(q.get_matrix44())
+    print(Matrix44.xyz_rotation(radians(45), radians(20), radians(0)))
+    print(Quaternion.from_matrix44(q.get_matrix44()))
+    print(q.rotate_vec3((1, 2, 3)))
+    print(Quaternion().slerp(q, .5))
@@ -0,0 +1,337 @@
+import numpy
+
+from .quaternion import Quaternion
+from .vectorarray import Vector3Array
+from .matrix44array import Matrix44Array
+
+
+class QuaternionArray(object):
+
+    """N rotations stored as quaternions in a single (N, 4) NumPy buffer,
+    in the same (x, y, z, w) order as Quaternion.
+
+    """
+
+    __slots__ = ('_a',)
+
+
+    def __init__(self, quaternions=(), dtype=float):
+        """Creates a quaternion array from a sequence of Quaternions (or
+        sequences of 4 values).
+
+        quaternions -- Sequence of quaternions
+        dtype -- NumPy data type of the buffer (defaults to float)
+
+        """
+
+        a = numpy.array([tuple(q) for q in quaternions], dtype=dtype)
+        if a.size == 0:
+            a = a.reshape(0, 4)
+        if a.ndim != 2 or a.shape[1] != 4:
+            raise ValueError("QuaternionArray requires a sequence of 4 value quaternions")
+        self._a = a
+
+
+    @classmethod
+    def from_array(cls, array, copy=False):
+        """Creates a quaternion array that wraps an existing (N, 4) array.
+
+        array -- A NumPy array
+        copy -- If True, the array is copied
+
+        """
+
+        a = numpy.asarray(array)
+        if a.dtype.kind != 'f':
+            a = a.astype(float)
+        elif copy:
+            a = a.copy()
+        if a.ndim != 2 or a.shape[1] != 4:
+            raise ValueError("Array must have a shape of (N, 4)")
+        qa = cls.__new__(cls, object)
+        qa._a = a
+        return qa
+
+
+    @classmethod
+    def identity(cls, count, dtype=float):
+        """Creates an array of count identity quaternions."""
+
+        a = numpy.zeros((count, 4), dtype=dtype)
+        a[:, 3] = 1.
+        return cls.from_array(a)
+
+
+    @classmethod
+    def from_axis_angle(cls, axes, angles):
+        """Creates an array of rotations about axes.
+
+        axes -- An (N, 3) array of unit axes, or a single axis
+        angles -- Array of angles (in radians)
+
+        """
+
+        if isinstance(axes, Vector3Array):
+            axes = axes.array
+        half_angles = numpy.atleast_1d(numpy.asarray(angles, dtype=float)) / 2.
+        axes = numpy.broadcast_to(numpy.asarray(axes, dtype=float),
+                                  (len(half_angles), 3))
+        a = numpy.empty((len(half_angles), 4))
+        a[:, :3] = axes * numpy.sin(half_angles)[:, numpy.newaxis]
+        a[:, 3] = numpy.cos(half_angles)
+        return cls.from_array(a)
+
+
+    @classmethod
+    def from_matrix44array(cls, ma):
+        """Creates an array of quaternions from the rotation part of each
+        matrix in a Matrix44Array (see Quaternion.from_matrix44).
+
+        ma -- A Matrix44Array
+
+        """
+
+        m = ma.array
+        m0, m1, m2 = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+        m4, m5, m6 = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+        m8, m9, m10 = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+
+        # Same branches as Quaternion.from_matrix44, chosen per matrix by
+        # the largest of the trace and the diagonal
+        trace = m0 + m5 + m10
+        branch = numpy.argmax(numpy.stack((trace, m0, m5, m10)), axis=0)
+        s = 2. * numpy.sqrt(numpy.maximum(1e-300, numpy.choose(branch, (
+                1. + trace,
+                1. + m0 - m5 - m10,
+                1. - m0 + m5 - m10,
+                1. - m0 - m5 + m10 ))))
+
+        a = numpy.empty((len(m), 4))
+        a[:, 0] = numpy.choose(branch, (m6 - m9, 0.25 * s * s, m4 + m1, m8 + m2))
+        a[:, 1] = numpy.choose(branch, (m8 - m2, m4 + m1, 0.25 * s * s, m9 + m6))
+        a[:, 2] = numpy.choose(branch, (m1 - m4, m8 + m2, m9 + m6, 0.25 * s * s))
+        a[:, 3] = numpy.choose(branch, (0.25 * s * s, m6 - m9, m8 - m2, m1 - m4))
+        a /= s[:, numpy.newaxis]
+        return cls.from_array(a)
+
+
+    def copy(self):
+        """Returns a copy of this quaternion array."""
+
+        qa = self.__new__(self.__class__, object)
+        qa._a = self._a.copy()
+        return qa
+    __copy__ = copy
+
+
+    def _get_array(self):
+        return self._a
+    array = property(_get_array, None, None, "The underlying (N, 4) NumPy array.")
+
+
+    def __repr__(self):
+
+        return "QuaternionArray(%r)" % self._a.tolist()
+
+
+    def __len__(self):
+
+        return len(self._a)
+
+
+    def __iter__(self):
+        """Iterates over the quaternions, as copies."""
+
+        for values in self._a.tolist():
+            yield Quaternion.from_floats(*values)
+
+
+    def __getitem__(self, index):
+        """Retrieves a single Quaternion (as a copy) for an integer index, or
+        a new quaternion array for a slice, index array or boolean mask.
+
+        """
+
+        if isinstance(index, (int, numpy.integer)):
+            try:
+                return Quaternion.from_floats(*self._a[index].tolist())
+            except IndexError:
+                raise IndexError("Quaternion index out of range")
+
+        qa = self.__new__(self.__class__, object)
+        qa._a = self._a[index]
+        return qa
+
+
+    def __setitem__(self, index, value):
+
+        self._a[index] = self._operand(value)
+
+
+    def _operand(self, rhs):
+
+        if isinstance(rhs, QuaternionArray):
+            return rhs._a
+        if isinstance(rhs, Quaternion):
+            return rhs._q
+        return numpy.asarray(rhs, dtype=self._a.dtype)
+
+
+    def __mul__(self, rhs):
+        """Returns the composition of each rotation with a Quaternion, or the
+        corresponding quaternion in another array (rhs is applied first)."""
+
+        a = self._a
+        b = numpy.asarray(self._operand(rhs), dtype=a.dtype)
+
+        x1, y1, z1, w1 = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+        x2, y2, z2, w2 = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+
+        ret = numpy.empty(numpy.broadcast_shapes(a.shape, b.shape))
+        ret[:, 0] = w1*x2 + x1*w2 + y1*z2 - z1*y2
+        ret[:, 1] = w1*y2 - x1*z2 + y1*w2 + z1*x2
+        ret[:, 2] = w1*z2 + x1*y2 - y1*x2 + z1*w2
+        ret[:, 3] = w1*w2 - x1*x2 - y1*y2 - z1*z2
+        return self.from_array(ret)
+
+
+    def __imul__(self, rhs):
+
+        self._a[:] = (self * rhs)._a
+        return self
+
+
+    def __neg__(self):
+
+        return self.get_conjugate()
+
+
+    def get_conjugate(self):
+        """Returns the inverse rotations."""
+
+        ret = self._a.copy()
+        ret[:, :3] *= -1.
+        return self.from_array(ret)
+    get_inverse = get_conjugate
+
+
+    def get_length(self):
+        """Returns an array of the lengths of the quaternions."""
+
+        a = self._a
+        return numpy.sqrt(numpy.einsum('ij,ij->i', a, a))
+
+
+    def normalise(self):
+        """Normalises all the quaternions in place."""
+
+        self._a /= self.get_length()[:, numpy.newaxis]
+        return self
+    normalize = normalise
+
+
+    def get_normalised(self):
+
+        return self.copy().normalise()
+    get_normalized = get_normalised
+
+
+    def rotate(self, vectors):
+        """Rotates one vector by each quaternion, and returns the result as a
+        Vector3Array.
+
+        vectors -- An (N, 3) array (or a Vector3Array), or a single vector to
+        be rotated by every quaternion
+
+        """
+
+        if isinstance(vectors, Vector3Array):
+            vectors = vectors.array
+        v = numpy.asarray(vectors, dtype=float)
+        u = self._a[:, :3]
+        w = self._a[:, 3:]
+        t = 2. * numpy.cross(u, v)
+        return Vector3Array.from_array(v + w * t + numpy.cross(u, t))
+
+
+    def get_matrix44array(self):
+        """Returns a Matrix44Array of rotation matrices."""
+
+        a = self._a
+        x, y, z, w = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+
+        m = numpy.zeros((len(a), 4, 4))
+        m[:, 0, 0] = 1. - 2.*(y*y + z*z)
+        m[:, 0, 1] = 2.*(x*y + w*z)
+        m[:, 0, 2] = 2.*(x*z - w*y)
+        m[:, 1, 0] = 2.*(x*y - w*z)
+        m[:, 1, 1] = 1. - 2.*(x*x + z*z)
+        m[:, 1, 2] = 2.*(y*z + w*x)
+        m[:, 2, 0] = 2.*(x*z + w*y)
+        m[:, 2, 1] = 2.*(y*z - w*x)
+        m[:, 2, 2] = 1. - 2.*(x*x + y*y)
+        m[:, 3, 3] = 1.
+        return Matrix44Array.from_array(m)
+
+
+    def _aligned(self, other):
+
+        a = self._a
+        b = numpy.broadcast_to(numpy.asarray(self._operand(other), dtype=a.dtype), a.shape)
+        d = numpy.einsum('ij,ij->i', a, b)
+        sign = numpy.where(d < 0., -1., 1.)
+        return b * sign[:, numpy.newaxis], d * sign
+
+
+    def nlerp(self, other, i):
+        """Returns normalised linear interpolations to another quaternion (or
+        array of quaternions).
+
+        other -- Quaternion or QuaternionArray to interpolate to
+        i -- Interpolant(s), 0 to 1
+
+        """
+
+        b, d = self._aligned(other)
+        i = numpy.asarray(i, dtype=float)
+        if i.ndim:
+            i = i[:, numpy.newaxis]
+        a = self._a
+        return self.from_array(a + (b - a) * i).normalise()
+
+
+    def slerp(self, other, i):
+        """Returns spherical linear interpolations to another quaternion (or
+        array of quaternions).
+
+        other -- Quaternion or QuaternionArray to interpolate to
+        i -- Interpolant(s), 0 to 1
+
+        """
+
+        b, d = self._aligned(other)
+        i = numpy.broadcast_to(numpy.asarray(i, dtype=float), d.shape)
+        a = self._a
+
+        theta = numpy.arccos(numpy.minimum(d, 1.))
+        sin_theta = numpy.sin(theta)
+        # Fall back to a linear interpolation where the angle is tiny
+        near = d > 0.9995
+        safe_sin = numpy.where(near, 1., sin_theta)
+        wa = numpy.where(near, 1. - i, numpy.sin((1. - i) * theta) / safe_sin)
+        wb = numpy.where(near, i, numpy.sin(i * theta) / safe_sin)
+
+        ret = self.from_array(a * wa[:, numpy.newaxis] + b * wb[:, numpy.newaxis])
+        if near.any():
+            ret.normalise()
+        return ret
+
+
+if __name__ == "__main__":
+
+    from math import radians
+
+    qa = QuaternionArray.from_axis_angle((0, 1, 0), [0., radians(90), radians(180)])
+    print(list(qa))
+    print(qa.rotate((1, 0, 0)))
+    print(qa.slerp(Quaternion(), .5).get_matrix44array()[1])
@@ -0,0 +1,252 @@
+import numpy
+
+from math import floor
+
+from .locals import WRAP_REPEAT, WRAP_CLAMP, WRAP_ERROR
+
+
+class ScalarGrid(object):
+
+    """A grid of numbers, with the same dimensions and wrap modes as a Grid,
+    stored in a single (height, width) NumPy array. Positions are in world
+    units and are divided by cell_size to find a cell.
+
+    Diffusion and evaporation update every cell in one vectorized pass. Edges
+    that wrap with WRAP_REPEAT diffuse in to the opposite edge, other edges
+    are closed, so diffusion never changes the total of the grid.
+
+    """
+
+    def __init__( self, width,
+                        height,
+                        x_wrap = WRAP_CLAMP,
+                        y_wrap = WRAP_CLAMP,
+                        cell_size = 1.,
+                        dtype = float ):
+
+        """Create a scalar grid, filled with zeros.
+
+        width -- Width of the grid, in cells.
+        height -- Height of the grid, in cells.
+        x_wrap -- How to handle out of range x coordinates
+        y_wrap -- How to handle out of range y coordinates
+        cell_size -- Size of a cell, in world units
+        dtype -- NumPy data type of the values (defaults to float)
+
+        """
+
+        for wrap in (x_wrap, y_wrap):
+            if wrap not in (WRAP_REPEAT, WRAP_CLAMP, WRAP_ERROR):
+                raise ValueError("Unknown wrap mode")
+
+        self.width = width
+        self.height = height
+        self.x_wrap = x_wrap
+        self.y_wrap = y_wrap
+        self.cell_size = float(cell_size)
+
+        self.values = numpy.zeros((height, width), dtype)
+
+        # Work buffers, so that updates do not allocate
+        self._padded = numpy.zeros((height + 2, width + 2), dtype)
+        self._sum = numpy.zeros((height, width), dtype)
+
+
+    @classmethod
+    def from_grid(cls, grid, cell_size=1., dtype=float):
+
+        """Creates a scalar grid with the dimensions and wrap modes of a Grid.
+
+        grid -- A Grid
+        cell_size -- Size of a cell, in world units
+        dtype -- NumPy data type of the values
+
+        """
+
+        return cls(grid.width, grid.height, grid.x_wrap, grid.y_wrap, cell_size, dtype)
+
+
+    def get_size(self):
+
+        """Retrieves the size of the grid as a tuple (width, height)."""
+
+        return self.width, self.height
+
+
+    def _wrap(self, value, edge, wrap):
+
+        if 0 <= value < edge:
+            return value
+        if wrap == WRAP_REPEAT:
+            return value % edge
+        if wrap == WRAP_CLAMP:
+            if value < 0:
+                return 0
+            return edge - 1
+        raise IndexError("coordinate out of range")
+
+
+    def _wrap_array(self, values, edge, wrap):
+
+        if wrap == WRAP_REPEAT:
+            return values % edge
+        if wrap == WRAP_CLAMP:
+            return numpy.clip(values, 0, edge - 1)
+        if len(values) and (values.min() < 0 or values.max() >= edge):
+            raise IndexError("coordinate out of range")
+        return values
+
+
+    def get_cell(self, position):
+
+        """Returns the (x, y) coordinate of the cell that contains a position.
+
+        position -- A position in world units
+
+        """
+
+        x, y = position
+        cell_size = self.cell_size
+        return ( self._wrap(int(floor(x / cell_size)), self.width, self.x_wrap),
+                 self._wrap(int(floor(y / cell_size)), self.height, self.y_wrap) )
+
+
+    def get(self, position):
+
+        """Returns the value of the cell that contains a position."""
+
+        x, y = self.get_cell(position)
+        return float(self.values[y, x])
+
+
+    def deposit(self, position, amount):
+
+        """Adds an amount to the cell that contains a position.
+
+        position -- A position in world units
+        amount -- Amount to add
+
+        """
+
+        x, y = self.get_cell(position)
+        self.values[y, x] += amount
+
+
+    def deposit_many(self, positions, amounts):
+
+        """Adds amounts to the cells that contain a number of positions.
+        Positions that share a cell all add to it.
+
+        positions -- Sequence of positions, or an (N, 2) array
+        amounts -- An amount for every position, or a single amount for all
+
+        """
+
+        positions = numpy.asarray(positions, dtype=float).reshape(-1, 2)
+        cells = numpy.floor_divide(positions, self.cell_size).astype(int)
+        xs = self._wrap_array(cells[:, 0], self.width, self.x_wrap)
+        ys = self._wrap_array(cells[:, 1], self.height, self.y_wrap)
+        numpy.add.at(self.values, (ys, xs), amounts)
+
+
+    def get_gradient(self, position):
+
+        """Returns the gradient at a position, as a tuple of the change in
+        value per world unit along x and y. Found from the four cells next to
+        the cell that contains the position, so it takes the same time for
+        any size of grid.
+
+        position -- A position in world units
+
+        """
+
+        x, y = self.get_cell(position)
+        width = self.width
+        height = self.height
+        x_wrap = self.x_wrap
+        y_wrap = self.y_wrap
+        wrap = self._wrap
+        values = self.values
+
+        # Out of range neighbours are the cell itself, as in diffusion
+        left = x if x == 0 and x_wrap != WRAP_REPEAT else wrap(x - 1, width, x_wrap)
+        right = x if x == width - 1 and x_wrap != WRAP_REPEAT else wrap(x + 1, width, x_wrap)
+        top = y if y == 0 and y_wrap != WRAP_REPEAT else wrap(y - 1, height, y_wrap)
+        bottom = y if y == height - 1 and y_wrap != WRAP_REPEAT else wrap(y + 1, height, y_wrap)
+
+        scale = 0.5 / self.cell_size
+        return ( float(values[y, right] - values[y, left]) * scale,
+                 float(values[bottom, x] - values[top, x]) * scale )
+
+
+    def _pad(self):
+
+        # Copies the values in to the middle of the padded buffer, and the
+        # cells that lie past each edge around it
+        values = self.values
+        padded = self._padded
+        padded[1:-1, 1:-1] = values
+        if self.x_wrap == WRAP_REPEAT:
+            padded[1:-1, 0] = values[:, -1]
+            padded[1:-1, -1] = values[:, 0]
+        else:
+            padded[1:-1, 0] = values[:, 0]
+            padded[1:-1, -1] = values[:, -1]
+        if self.y_wrap == WRAP_REPEAT:
+            padded[0] = padded[-2]
+            padded[-1] = padded[1]
+        else:
+            padded[0] = padded[1]
+            padded[-1] = padded[-2]
+        return padded
+
+
+    def get_gradients(self):
+
+        """Returns the gradient of every cell as two (height, width) arrays,
+        of the change in value per world unit along x and y."""
+
+        padded = self._pad()
+        scale = 0.5 / self.cell_size
+        gradient_x = (padded[1:-1, 2:] - padded[1:-1, :-2]) * scale
+        gradient_y = (padded[2:, 1:-1] - padded[:-2, 1:-1]) * scale
+        return gradient_x, gradient_y
+
+
+    def diffuse(self, rate):
+
+        """Moves part of the value of every cell to the cells next to it.
+
+        rate -- Fraction of each cell's value that is replaced by the mean of
+        the four cells next to it, from 0 to 1
+
+        """
+
+        padded = self._pad()
+        neighbours = self._sum
+        numpy.add(padded[:-2, 1:-1], padded[2:, 1:-1], out=neighbours)
+        neighbours += padded[1:-1, :-2]
+        neighbours += padded[1:-1, 2:]
+        neighbours *= rate * 0.25
+
+        values = self.values
+        values *= 1. - rate
+        values += neighbours
+
+
+    def evaporate(self, rate):
+
+        """Reduces every cell by a fraction of its value.
+
+        rate -- Fraction to remove, from 0 to 1
+
+        """
+
+        self.values *= 1. - rate
+
+
+    def clear(self):
+
+        """Resets every cell to zero."""
+
+        self.values.fill(0)
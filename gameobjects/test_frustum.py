@@ -0,0 +1,93 @@
+import unittest
+import random
+from math import radians, sqrt
+
+import numpy
+
+from .matrix44 import Matrix44
+from .frustum import Frustum
+from .sphere import Sphere
+
+class TestFrustum(unittest.TestCase):
+
+    def make_frustum(self):
+        # A 90 degree frustum looking down -z, from z = -1 to z = -10
+        projection = Matrix44.perspective_projection(-1, 1, 1, -1, 1, 10)
+        return Frustum(projection)
+
+    def make_camera_frustum(self):
+        projection = Matrix44.perspective_projection_fov(radians(60), 4./3., .1, 100.)
+        camera = Matrix44.y_rotation(radians(30)) * Matrix44.translation(0, 2, 10)
+        return Frustum(projection * camera.get_inverse())
+
+    def test_planes(self):
+        frustum = self.make_frustum()
+        r = 1. / sqrt(2.)
+        expected = [ ( r,  0., -r,  0.),
+                     (-r,  0., -r,  0.),
+                     ( 0.,  r, -r,  0.),
+                     ( 0., -r, -r,  0.),
+                     ( 0., 0., -1., -1.),
+                     ( 0., 0.,  1., 10.) ]
+        for plane, expected_plane in zip(frustum.planes, expected):
+            for a, b in zip(plane, expected_plane):
+                self.assertAlmostEqual(a, b)
+
+    def test_points(self):
+        frustum = self.make_frustum()
+        self.assertTrue((0, 0, -5) in frustum)
+        self.assertTrue(frustum.contains_point((0.9, -0.9, -1.)))
+        self.assertFalse(frustum.contains_point((0, 0, -0.5)))
+        self.assertFalse(frustum.contains_point((0, 0, -11)))
+        self.assertFalse(frustum.contains_point((3, 0, -2)))
+        self.assertFalse(frustum.contains_point((0, -3, -2)))
+
+    def test_spheres(self):
+        frustum = self.make_frustum()
+        self.assertTrue(frustum.intersects_sphere(Sphere((0, 0, -5), 1)))
+        self.assertTrue(frustum.intersects_sphere(Sphere((0, 0, 0), 1.5)))
+        self.assertFalse(frustum.intersects_sphere(Sphere((0, 0, 0), 0.5)))
+        self.assertTrue(frustum.intersects_sphere(Sphere((3, 0, -2), 1)))
+        self.assertFalse(frustum.intersects_sphere(Sphere((4, 0, -2), 1)))
+        self.assertFalse(frustum.intersects_sphere(Sphere((0, 0, -12), 1)))
+
+    def test_aabbs(self):
+        frustum = self.make_frustum()
+        self.assertTrue(frustum.intersects_aabb((-1, -1, -6), (1, 1, -4)))
+        self.assertTrue(frustum.intersects_aabb((-20, -20, -20), (20, 20, 20)))
+        self.assertTrue(frustum.intersects_aabb((2.5, 0, -3), (3.5, 1, -2)))
+        self.assertFalse(frustum.intersects_aabb((3.5, 0, -3), (4.5, 1, -2)))
+        self.assertFalse(frustum.intersects_aabb((-1, -1, -0.9), (1, 1, -0.5)))
+        self.assertFalse(frustum.intersects_aabb((-1, -1, -15), (1, 1, -11)))
+
+    def test_batch_spheres(self):
+        frustum = self.make_camera_frustum()
+        rng = random.Random(1)
+        centres = [(rng.uniform(-80, 80), rng.uniform(-80, 80), rng.uniform(-120, 40))
+                   for i in range(500)]
+        radii = [rng.uniform(0, 10) for i in range(500)]
+        visible = frustum.spheres_visible(numpy.array(centres), radii)
+        expected = [frustum.intersects_sphere(Sphere(centre, radius))
+                    for centre, radius in zip(centres, radii)]
+        self.assertEqual(visible.tolist(), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+
+        visible = frustum.spheres_visible(numpy.array(centres), 2.)
+        expected = [frustum.intersects_sphere(Sphere(centre, 2.)) for centre in centres]
+        self.assertEqual(visible.tolist(), expected)
+
+    def test_batch_aabbs(self):
+        frustum = self.make_camera_frustum()
+        rng = random.Random(2)
+        box_mins = numpy.array([(rng.uniform(-80, 80), rng.uniform(-80, 80),
+                                 rng.uniform(-120, 40)) for i in range(500)])
+        box_maxs = box_mins + numpy.array([(rng.uniform(0, 10), rng.uniform(0, 10),
+                                            rng.uniform(0, 10)) for i in range(500)])
+        visible = frustum.aabbs_visible(box_mins, box_maxs)
+        expected = [frustum.intersects_aabb(box_min, box_max)
+                    for box_min, box_max in zip(box_mins.tolist(), box_maxs.tolist())]
+        self.assertEqual(visible.tolist(), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+
+if __name__ == '__main__':
+    unittest.main()
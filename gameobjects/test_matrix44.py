@@ -0,0 +1,150 @@
+import unittest
+from math import radians
+
+import numpy
+
+from .matrix44 import Matrix44, _GENERAL, _AFFINE, _RIGID
+
+class TestMatrix44(unittest.TestCase):
+
+    def assertMatrixAlmostEqual(self, m1, m2):
+        for a, b in zip(m1, m2):
+            self.assertAlmostEqual(a, b)
+
+    def assertPointsAlmostEqual(self, points1, points2):
+        points1 = list(points1)
+        points2 = list(points2)
+        self.assertEqual(len(points1), len(points2))
+        for p1, p2 in zip(points1, points2):
+            self.assertMatrixAlmostEqual(p1, p2)
+
+    def projection(self):
+        m = Matrix44.perspective_projection_fov(radians(60), 4./3., 1., 100.)
+        m.translate = (1, 2, -3, 1)
+        return m
+
+    def test_kind_make(self):
+        self.assertEqual(Matrix44()._kind, _RIGID)
+        self.assertEqual(Matrix44.identity()._kind, _RIGID)
+        self.assertEqual(Matrix44.translation(1, 2, 3)._kind, _RIGID)
+        self.assertEqual(Matrix44.xyz_rotation(1, 2, 3)._kind, _RIGID)
+        self.assertEqual(Matrix44.rotation_about_axis((0, 1, 0), 1)._kind, _RIGID)
+        self.assertEqual(Matrix44.rotation_about_axis((0, 2, 0), 1)._kind, _AFFINE)
+        self.assertEqual(Matrix44.scale(2)._kind, _AFFINE)
+        self.assertEqual(Matrix44.blank()._kind, _GENERAL)
+        self.assertEqual(self.projection()._kind, _GENERAL)
+
+        m = Matrix44.scale(2)
+        m.make_x_rotation(1)
+        self.assertEqual(m._kind, _RIGID)
+        m.make_perspective_projection(-1, 1, 1, -1, 1, 10)
+        self.assertEqual(m._kind, _GENERAL)
+        m.make_identity()
+        self.assertEqual(m._kind, _RIGID)
+        m.make_copy(Matrix44.scale(3))
+        self.assertEqual(m._kind, _AFFINE)
+
+    def test_kind_rows(self):
+        m = Matrix44.xyz_rotation(1, 2, 3)
+        m.translate = (1, 2, 3)
+        self.assertEqual(m._kind, _RIGID)
+        m.right = (2, 0, 0)
+        self.assertEqual(m._kind, _AFFINE)
+        m.set_row(1, (0, 1, 0, 1))
+        self.assertEqual(m._kind, _GENERAL)
+        m.set_row(1, (0, 1, 0, 0))
+        self.assertEqual(m._kind, _AFFINE)
+        m.translate = (0, 0, 0, 2)
+        self.assertEqual(m._kind, _GENERAL)
+
+    def test_kind_columns(self):
+        m = Matrix44.translation(1, 2, 3)
+        m.set_column(0, (1, 0, 0, 5))
+        self.assertEqual(m._kind, _AFFINE)
+        m.set_column(3, (0, 0, -1, 0))
+        self.assertEqual(m._kind, _GENERAL)
+        m.set_column(3, (0, 0, 0, 1))
+        self.assertEqual(m._kind, _AFFINE)
+
+    def test_kind_setitem(self):
+        m = Matrix44()
+        m[3, 0] = 5
+        self.assertEqual(m._kind, _RIGID)
+        m[0, 1] = 0.5
+        self.assertEqual(m._kind, _AFFINE)
+        m[2, 3] = -1
+        self.assertEqual(m._kind, _GENERAL)
+        m[2, 3] = 0
+        self.assertEqual(m._kind, _AFFINE)
+
+    def test_kind_product(self):
+        rigid = Matrix44.translation(1, 2, 3) * Matrix44.z_rotation(1)
+        self.assertEqual(rigid._kind, _RIGID)
+        self.assertEqual((rigid * Matrix44.scale(2))._kind, _AFFINE)
+        self.assertEqual((rigid * self.projection())._kind, _GENERAL)
+
+    def test_inverse_general(self):
+        for m in (self.projection(),
+                  Matrix44.from_iter([2, 1, 0, 0.5, 0, 3, 1, 0,
+                                      1, 0, 4, 0.25, 1, 2, 3, 1])):
+            inverse = m.get_inverse_general()
+            expected = numpy.linalg.inv(numpy.array(list(m)).reshape(4, 4))
+            self.assertMatrixAlmostEqual(inverse, expected.ravel())
+            self.assertMatrixAlmostEqual(m * inverse, Matrix44())
+            self.assertMatrixAlmostEqual(m.get_inverse(), inverse)
+
+        m = Matrix44.scale(2, 3, 4) * Matrix44.translation(1, 2, 3)
+        self.assertMatrixAlmostEqual(m.get_inverse_general(), m.get_inverse_affine())
+
+    def test_transform_projective(self):
+        m = self.projection()
+        points = [(1, 2, -5), (-3, 0.5, -20), (0, 0, -1.5)]
+        expected = []
+        for x, y, z in points:
+            clip = numpy.dot((x, y, z, 1.), numpy.array(list(m)).reshape(4, 4))
+            expected.append(clip[:3] / clip[3])
+
+        self.assertPointsAlmostEqual(map(m.transform, points), expected)
+        self.assertPointsAlmostEqual(map(m.transform_vec3, points), expected)
+        self.assertPointsAlmostEqual(m.transform_sequence(points), expected)
+        self.assertPointsAlmostEqual(m.transform_sequence_vec3(points), expected)
+        self.assertPointsAlmostEqual(m.iter_transform(points), expected)
+        self.assertPointsAlmostEqual(m.iter_transform_vec3(points), expected)
+
+    def test_transform_affine(self):
+        m = Matrix44.scale(2) * Matrix44.translation(1, 2, 3)
+        points = [(1, 2, 3), (-1, 0, 4)]
+        expected = [(4, 8, 12), (0, 4, 14)]
+        self.assertPointsAlmostEqual(map(m.transform, points), expected)
+        self.assertPointsAlmostEqual(map(m.transform_vec3, points), expected)
+        self.assertPointsAlmostEqual(m.transform_sequence(points), expected)
+        self.assertPointsAlmostEqual(m.transform_sequence_vec3(points), expected)
+        self.assertPointsAlmostEqual(m.iter_transform(points), expected)
+        self.assertPointsAlmostEqual(m.iter_transform_vec3(points), expected)
+
+    def test_transform_array(self):
+        points = numpy.array([(1, 2, -5), (-3, 0.5, -20), (0, 0, -1.5)])
+        for m in (Matrix44.scale(2) * Matrix44.translation(1, 2, 3), self.projection()):
+            expected = [m.transform(point) for point in points.tolist()]
+            self.assertPointsAlmostEqual(m.transform_array(points), expected)
+            out = numpy.zeros((3, 3))
+            self.assertTrue(m.transform_array(points, out=out) is out)
+            self.assertPointsAlmostEqual(out, expected)
+
+    def test_project_array(self):
+        m = self.projection()
+        points = numpy.array([(1, 2, -5), (-3, 0.5, -20), (0, 0, -1.5)])
+        expected = [m.transform(point) for point in points.tolist()]
+        self.assertPointsAlmostEqual(m.project_array(points), expected)
+
+        points4 = numpy.hstack((points * 2., numpy.full((3, 1), 2.)))
+        self.assertPointsAlmostEqual(m.project_array(points4), expected)
+
+        screen = m.project_array(points, viewport=(10, 20, 640, 480))
+        for (x, y, z), (sx, sy, sz) in zip(expected, screen):
+            self.assertAlmostEqual(sx, 10 + (x + 1.) * 320.)
+            self.assertAlmostEqual(sy, 20 + (1. - y) * 240.)
+            self.assertAlmostEqual(sz, z)
+
+if __name__ == '__main__':
+    unittest.main()
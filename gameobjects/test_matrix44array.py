@@ -0,0 +1,47 @@
+import unittest
+from math import radians
+
+from .matrix44 import Matrix44
+from .matrix44array import Matrix44Array
+
+class TestMatrix44Array(unittest.TestCase):
+
+    def assertMatrixAlmostEqual(self, m1, m2):
+        for a, b in zip(m1, m2):
+            self.assertAlmostEqual(a, b)
+
+    def test_rotations(self):
+        angles = [radians(10), radians(45), radians(-80)]
+        for name in ('x_rotation', 'y_rotation', 'z_rotation'):
+            ma = getattr(Matrix44Array, name)(angles)
+            for m, angle in zip(ma, angles):
+                self.assertMatrixAlmostEqual(m, getattr(Matrix44, name)(angle))
+        ma = Matrix44Array.xyz_rotation(angles, angles, angles)
+        self.assertMatrixAlmostEqual(ma[1], Matrix44.xyz_rotation(*[angles[1]]*3))
+
+    def test_mul(self):
+        m = Matrix44.xyz_rotation(radians(45), radians(20), radians(0))
+        m.translate = (1, 2, 3)
+        r = Matrix44.z_rotation(radians(32))
+        ma = Matrix44Array([m, Matrix44()])
+        self.assertMatrixAlmostEqual((ma * r)[0], m * r)
+        n = m.copy()
+        n.fast_mul(r)
+        self.assertMatrixAlmostEqual(ma.fast_mul(r)[0], n)
+
+    def test_inverse(self):
+        m = Matrix44.xyz_rotation(radians(45), radians(20), radians(5))
+        m.translate = (1, 2, 3)
+        ma = Matrix44Array([m, m])
+        self.assertMatrixAlmostEqual(ma.get_inverse_rot_trans()[1],
+                                     m.get_inverse_rot_trans())
+        self.assertMatrixAlmostEqual(ma.get_inverse()[0], m.get_inverse())
+
+    def test_transform(self):
+        m = Matrix44.translation(1, 2, 3)
+        ma = Matrix44Array([m, Matrix44()])
+        self.assertEqual(list(ma.transform([(1, 1, 1), (2, 2, 2)])),
+                         [(2, 3, 4), (2, 2, 2)])
+
+if __name__ == '__main__':
+    unittest.main()
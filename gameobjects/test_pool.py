@@ -0,0 +1,50 @@
+import unittest
+
+from .pool import FramePool, PoolError
+from .vector2 import Vector2
+from .matrix44 import Matrix44
+
+
+class TestFramePool(unittest.TestCase):
+
+    def test_reuse(self):
+        pool = FramePool()
+        v1 = pool.vector2(1, 2)
+        v2 = pool.vector3(1, 2, 3)
+        m = pool.matrix44(Matrix44.translation(1, 2, 3))
+        self.assertEqual(v1, (1, 2))
+        self.assertEqual(v2, (1, 2, 3))
+        self.assertEqual(m.to_opengl(), Matrix44.translation(1, 2, 3).to_opengl())
+        self.assertTrue(m.is_rigid())
+        self.assertEqual(pool.get_counts(), (1, 1, 1))
+
+        pool.recycle()
+        self.assertEqual(pool.get_counts(), (0, 0, 0))
+        self.assertTrue(pool.vector2(3, 4) is v1)
+        self.assertEqual(v1, (3, 4))
+        self.assertTrue(pool.matrix44() is m)
+        self.assertEqual(m.to_opengl(), Matrix44().to_opengl())
+
+
+    def test_in_place(self):
+        pool = FramePool()
+        v = pool.vector2(4, 6)
+        v -= Vector2(1, 2)
+        v *= 2
+        self.assertTrue(v is pool._vector2s[0])
+        self.assertEqual(v, (6, 8))
+
+
+    def test_debug(self):
+        pool = FramePool(debug=True)
+        v = pool.vector2(1, 2)
+        m = pool.matrix44()
+        pool.recycle()
+        self.assertRaises(PoolError, lambda: v + (1, 1))
+        self.assertRaises(PoolError, lambda: v.x)
+        self.assertRaises(PoolError, lambda: m * m)
+        self.assertFalse(pool.vector2(1, 2) is v)
+
+
+if __name__ == '__main__':
+    unittest.main()
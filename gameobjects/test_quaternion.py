@@ -0,0 +1,39 @@
+import unittest
+from math import radians
+
+from .matrix44 import Matrix44
+from .quaternion import Quaternion
+
+class TestQuaternion(unittest.TestCase):
+
+    def assertSequenceAlmostEqual(self, s1, s2):
+        for a, b in zip(s1, s2):
+            self.assertAlmostEqual(a, b)
+
+    def test_matrix44(self):
+        angles = (radians(45), radians(20), radians(-70))
+        q = Quaternion.xyz_rotation(*angles)
+        m = Matrix44.xyz_rotation(*angles)
+        self.assertSequenceAlmostEqual(q.get_matrix44(), m)
+        self.assertSequenceAlmostEqual(Quaternion.from_matrix44(m), q)
+
+    def test_mul(self):
+        q1 = Quaternion.x_rotation(radians(30))
+        q2 = Quaternion.from_axis_angle((0, .6, .8), radians(100))
+        self.assertSequenceAlmostEqual((q1 * q2).get_matrix44(),
+                                       q1.get_matrix44() * q2.get_matrix44())
+
+    def test_rotate(self):
+        q = Quaternion.z_rotation(radians(90))
+        self.assertSequenceAlmostEqual(q.rotate_vec3((1, 0, 0)), (0, 1, 0))
+        self.assertSequenceAlmostEqual((-q).rotate((0, 1, 0)), (1, 0, 0))
+
+    def test_slerp(self):
+        q1 = Quaternion()
+        q2 = Quaternion.y_rotation(radians(90))
+        self.assertSequenceAlmostEqual(q1.slerp(q2, .5),
+                                       Quaternion.y_rotation(radians(45)))
+        self.assertSequenceAlmostEqual(q1.nlerp(q2, 1.), q2)
+
+if __name__ == '__main__':
+    unittest.main()
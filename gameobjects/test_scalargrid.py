@@ -0,0 +1,56 @@
+import unittest
+
+from .locals import WRAP_REPEAT, WRAP_CLAMP, WRAP_ERROR
+from .grid import Grid
+from .scalargrid import ScalarGrid
+
+class TestScalarGrid(unittest.TestCase):
+
+    def test_deposit(self):
+        field = ScalarGrid(4, 3, cell_size=10)
+        field.deposit((15, 25), 2.)
+        field.deposit_many([(15, 25), (0, 0), (100, -5)], [1., 3., 4.])
+        self.assertEqual(field.get((19, 21)), 3.)
+        self.assertEqual(field.get((0, 0)), 3.)
+        # Clamped to the top right cell
+        self.assertEqual(field.values[0, 3], 4.)
+        self.assertEqual(field.get_size(), (4, 3))
+
+    def test_wrap(self):
+        field = ScalarGrid(4, 3, WRAP_REPEAT, WRAP_ERROR)
+        field.deposit((-1, 0), 1.)
+        self.assertEqual(field.values[0, 3], 1.)
+        self.assertRaises(IndexError, field.deposit, (0, 3), 1.)
+        self.assertRaises(IndexError, field.deposit_many, [(0, -1)], 1.)
+
+    def test_diffuse(self):
+        for wrap in (WRAP_REPEAT, WRAP_CLAMP):
+            field = ScalarGrid(5, 5, wrap, wrap)
+            field.deposit((0, 2), 8.)
+            field.diffuse(0.5)
+            self.assertAlmostEqual(field.values.sum(), 8.)
+            self.assertEqual(field.values[2, 1], 1.)
+            self.assertEqual(field.values[2, 4], 1. if wrap == WRAP_REPEAT else 0.)
+        field.evaporate(0.25)
+        self.assertAlmostEqual(field.values.sum(), 6.)
+
+    def test_gradient(self):
+        field = ScalarGrid(5, 5, cell_size=2)
+        field.values[:] = [range(5)] * 5
+        self.assertEqual(field.get_gradient((4, 4)), (0.5, 0.))
+        # Closed edges take the difference to the edge cell itself
+        self.assertEqual(field.get_gradient((9, 0)), (0.25, 0.))
+        gradient_x, gradient_y = field.get_gradients()
+        self.assertEqual(gradient_x[2, 2], 0.5)
+        self.assertEqual(gradient_x[0, 4], 0.25)
+        self.assertFalse(gradient_y.any())
+
+    def test_from_grid(self):
+        grid = Grid(lambda x, y: None, 3, 2, WRAP_REPEAT, WRAP_CLAMP)
+        field = ScalarGrid.from_grid(grid, 8)
+        self.assertEqual(field.values.shape, (2, 3))
+        self.assertEqual((field.x_wrap, field.y_wrap), (WRAP_REPEAT, WRAP_CLAMP))
+        self.assertEqual(field.get_cell((-1, 100)), (2, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from math import radians
+
+from .transform import Transform
+
+class TestTransform(unittest.TestCase):
+
+    def assertMatrixAlmostEqual(self, m1, m2):
+        for a, b in zip(m1, m2):
+            self.assertAlmostEqual(a, b)
+
+    def test_hierarchy(self):
+        root = Transform(position=(1, 2, 3), rotation=(0, radians(90), 0))
+        child = Transform(position=(0, 0, 1), scale=2, parent=root)
+        expected = root.local_matrix * child.local_matrix
+        self.assertMatrixAlmostEqual(child.world_matrix, expected)
+        self.assertMatrixAlmostEqual(child.world_inverse, expected.get_inverse())
+
+    def test_cached(self):
+        root = Transform(position=(1, 2, 3))
+        child = Transform(parent=root)
+        world = child.world_matrix
+        version = child.version
+        self.assertTrue(child.world_matrix is world)
+        self.assertTrue(child.world_inverse is child.world_inverse)
+        self.assertEqual(child.version, version)
+
+        root.move((1, 0, 0))
+        self.assertEqual(child.get_world_position(), (2, 2, 3))
+        self.assertEqual(child.version, version + 1)
+
+    def test_reparent(self):
+        a = Transform(position=(1, 0, 0))
+        b = Transform(position=(0, 1, 0))
+        child = Transform(parent=a)
+        self.assertEqual(child.get_world_position(), (1, 0, 0))
+        child.parent = b
+        self.assertEqual(a.children, ())
+        self.assertEqual(child.get_world_position(), (0, 1, 0))
+        self.assertRaises(ValueError, a.set_parent, a)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from .vector3 import Vector3
+from .vector3 import Vector3, FrozenVector3
 
 class TestVector3(unittest.TestCase):
 
@@ -68,5 +68,28 @@ class TestVector3(unittest.TestCase):
         self.assertEqual(v1('yyy'), (2, 2, 2))
         self.assertEqual(v1('zyx'), (3, 2, 1))
 
+    def test_buffer(self):
+        v1 = Vector3(1, 2, 3).use_buffer()
+        view = v1.get_buffer()
+        v1 += (1, 1, 1)
+        v1.x = 5
+        self.assertEqual(view.tolist(), [5, 3, 4])
+        self.assertEqual(v1 * 2, (10, 6, 8))
+        self.assertEqual(Vector3(1, 2, 3).get_buffer().tolist(), [1, 2, 3])
+
+    def test_frozen(self):
+        v1 = FrozenVector3(1, 2, 3)
+        cache = {v1: 'a'}
+        self.assertEqual(cache[Vector3(1, 2, 3).get_frozen()], 'a')
+        self.assertEqual(cache[(1, 2, 3)], 'a')
+        self.assertTrue(isinstance(v1 + (1, 1, 1), FrozenVector3))
+        v2 = v1
+        v2 += (1, 1, 1)
+        self.assertEqual(v1, (1, 2, 3))
+        self.assertEqual(v2, (2, 3, 4))
+        self.assertRaises(TypeError, v1.normalise)
+        self.assertRaises(TypeError, setattr, v1, 'x', 5)
+        self.assertEqual(v1.get_mutable().normalise(), v1.get_normalised())
+
 if __name__ == '__main__':
     unittest.main()
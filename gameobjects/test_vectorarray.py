@@ -0,0 +1,46 @@
+import unittest
+
+from .vector2 import Vector2
+from .vector3 import Vector3
+from .vectorarray import Vector2Array, Vector3Array
+
+class TestVectorArray(unittest.TestCase):
+
+    def test_arithmetic(self):
+        va = Vector3Array([(1, 2, 3), (4, 5, 6)])
+        self.assertEqual(list(va + (1, 1, 1)), [(2, 3, 4), (5, 6, 7)])
+        self.assertEqual(list((1, 1, 1) - va), [(0, -1, -2), (-3, -4, -5)])
+        self.assertEqual(list(2 * va), [(2, 4, 6), (8, 10, 12)])
+        self.assertEqual(list(va * [2, 3]), [(2, 4, 6), (12, 15, 18)])
+        va += va
+        self.assertEqual(list(va / 2), [(1, 2, 3), (4, 5, 6)])
+
+    def test_getitem(self):
+        va = Vector2Array([(1, 2), (3, 4), (5, 6)])
+        v = va[1]
+        self.assertTrue(isinstance(v, Vector2))
+        self.assertEqual(v, (3, 4))
+        self.assertEqual(len(va[1:]), 2)
+        va[0] = Vector2(10, 20)
+        self.assertEqual(va[0], (10, 20))
+
+    def test_length(self):
+        va = Vector2Array([(3, 4), (0, 0)])
+        self.assertEqual(list(va.get_length()), [5., 0.])
+        va.normalise()
+        self.assertEqual(list(va), [(.6, .8), (0, 0)])
+        self.assertEqual(list(va.get_distance_to((0, 0))), [1., 0.])
+
+    def test_dot_cross(self):
+        va = Vector3Array([(1, 0, 0), (0, 1, 0)])
+        self.assertEqual(list(va.dot((1, 2, 3))), [1., 2.])
+        c = va.cross(Vector3(0, 0, 1))
+        self.assertEqual(list(c), [Vector3(1, 0, 0).cross((0, 0, 1)),
+                                   Vector3(0, 1, 0).cross((0, 0, 1))])
+
+    def test_swizzle(self):
+        va = Vector3Array([(1, 2, 3)])
+        self.assertEqual(va('zyx').tolist(), [[3, 2, 1]])
+
+if __name__ == '__main__':
+    unittest.main()
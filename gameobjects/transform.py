@@ -0,0 +1,234 @@
+from .matrix44 import Matrix44
+from .vector3 import Vector3
+
+
+class Transform(object):
+
+    """A node in a scene graph with a position, rotation and scale, and an
+    optional parent. Local and world matrices are calculated lazily, and only
+    recalculated when this node or one of its ancestors changes.
+
+    The matrices returned are cached, and should not be modified. Make a copy
+    if you need to change them.
+
+    """
+
+    def __init__(self, position=(0., 0., 0.),
+                       rotation=(0., 0., 0.),
+                       scale=(1., 1., 1.),
+                       parent=None):
+
+        """Creates a transform node.
+
+        position -- Position relative to the parent
+        rotation -- Angles of rotation about the x, y and z axis (in radians)
+        scale -- Scale on each axis, or a single value for a uniform scale
+        parent -- Parent Transform, or None for a root node
+
+        """
+
+        self._position = Vector3(position)
+        self._rotation = Vector3(rotation)
+        self._scale = Vector3(self._as_scale(scale))
+
+        self._parent = None
+        self._children = []
+
+        self._local = None
+        self._world = None
+        self._world_inverse = None
+        self._dirty = True
+
+        self.version = 0
+
+        if parent is not None:
+            self.set_parent(parent)
+
+
+    def _as_scale(self, scale):
+
+        if hasattr(scale, "__getitem__"):
+            return scale
+        return (scale, scale, scale)
+
+
+    def _invalidate_local(self):
+
+        self._local = None
+        self._invalidate_world()
+
+
+    def _invalidate_world(self):
+
+        # Children are clean until their parent is, so there is no need to
+        # walk a sub-tree that is already dirty
+        if self._dirty:
+            return
+        self._dirty = True
+        self._world_inverse = None
+        for child in self._children:
+            child._invalidate_world()
+
+
+    def get_position(self):
+        return self._position.copy()
+    def set_position(self, position):
+        self._position.set(*position)
+        self._invalidate_local()
+    position = property(get_position, set_position, None, "Position relative to the parent (a copy).")
+
+    def get_rotation(self):
+        return self._rotation.copy()
+    def set_rotation(self, rotation):
+        self._rotation.set(*rotation)
+        self._invalidate_local()
+    rotation = property(get_rotation, set_rotation, None, "Rotation about the x, y and z axis (a copy).")
+
+    def get_scale(self):
+        return self._scale.copy()
+    def set_scale(self, scale):
+        self._scale.set(*self._as_scale(scale))
+        self._invalidate_local()
+    scale = property(get_scale, set_scale, None, "Scale on each axis (a copy).")
+
+
+    def move(self, offset):
+        """Moves the node relative to its current position.
+
+        offset -- Vector to add to the position
+
+        """
+
+        self._position += offset
+        self._invalidate_local()
+
+
+    def rotate(self, angles):
+        """Adds angles to the current rotation.
+
+        angles -- Angles to add about the x, y and z axis (in radians)
+
+        """
+
+        self._rotation += angles
+        self._invalidate_local()
+
+
+    def get_parent(self):
+        return self._parent
+    def set_parent(self, parent):
+        """Attaches this node to a new parent (or detaches it if the parent
+        is None). The local transform is kept, so the node moves with its new
+        parent.
+
+        """
+
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor is self:
+                raise ValueError("A Transform can not be its own ancestor")
+            ancestor = ancestor._parent
+
+        if self._parent is not None:
+            self._parent._children.remove(self)
+        self._parent = parent
+        if parent is not None:
+            parent._children.append(self)
+        self._invalidate_world()
+    parent = property(get_parent, set_parent, None, "Parent Transform.")
+
+
+    def get_children(self):
+        """Returns a tuple of the child nodes."""
+
+        return tuple(self._children)
+    children = property(get_children, None, None, "Child nodes.")
+
+
+    def add_child(self, child):
+        """Attaches a node as a child of this node."""
+
+        child.set_parent(self)
+
+
+    def remove_child(self, child):
+        """Detaches a child node."""
+
+        if child._parent is not self:
+            raise ValueError("Not a child of this Transform")
+        child.set_parent(None)
+
+
+    def _has_scale(self):
+
+        return tuple(self._scale) != (1., 1., 1.)
+
+
+    def get_local_matrix(self):
+        """Returns the matrix relative to the parent."""
+
+        if self._local is None:
+            rx, ry, rz = self._rotation
+            local = Matrix44.xyz_rotation(rx, ry, rz)
+            if self._has_scale():
+                local *= Matrix44.scale(*self._scale)
+            local.translate = self._position
+            self._local = local
+        return self._local
+    local_matrix = property(get_local_matrix, None, None, "Local matrix.")
+
+
+    def get_world_matrix(self):
+        """Returns the matrix that transforms from this node's space to world
+        space."""
+
+        if self._dirty:
+            local = self.get_local_matrix()
+            parent = self._parent
+            if parent is None:
+                self._world = local
+            else:
+                self._world = parent.get_world_matrix().copy().fast_mul(local)
+            self._world_inverse = None
+            self._dirty = False
+            self.version += 1
+        return self._world
+    world_matrix = property(get_world_matrix, None, None, "World matrix.")
+
+
+    def get_world_inverse(self):
+        """Returns the inverse of the world matrix (e.g. a view matrix for a
+        camera node). Cached until the world matrix changes."""
+
+        world = self.get_world_matrix()
+        if self._world_inverse is None:
+            self._world_inverse = world.get_inverse()
+        return self._world_inverse
+    world_inverse = property(get_world_inverse, None, None, "Inverse of the world matrix.")
+
+
+    def get_world_position(self):
+        """Returns the position of this node in world space."""
+
+        return self.get_world_matrix().get_row_vec3(3)
+
+
+    def __repr__(self):
+
+        return "Transform(%s, %s, %s)" % (tuple(self._position),
+                                          tuple(self._rotation),
+                                          tuple(self._scale))
+
+
+if __name__ == "__main__":
+
+    from math import radians
+
+    tank = Transform(position=(10, 0, 5), rotation=(0, radians(90), 0))
+    turret = Transform(position=(0, 1, 0), parent=tank)
+
+    print(turret.world_matrix)
+    print(turret.get_world_position())
+    turret.rotate((0, radians(-90), 0))
+    print(turret.world_matrix)
+    print(turret.world_inverse)
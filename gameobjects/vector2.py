@@ -161,7 +161,7 @@ class Vector2(object):
     def __add__(self, rhs):
         x, y = self._v
         xx, yy = rhs
-        return Vector2.from_floats(x+xx, y+yy)
+        return self.from_floats(x+xx, y+yy)
 
 
     def __iadd__(self, rhs):
@@ -179,14 +179,14 @@ class Vector2(object):
     def __sub__(self, rhs):
         x, y = self._v
         xx, yy = rhs
-        return Vector2.from_floats(x-xx, y-yy)
+        return self.from_floats(x-xx, y-yy)
 
     def __rsub__(self, lhs):
         x, y = self._v
         xx, yy = lhs
         return self.from_floats(xx-x, yy-y)
 
-    def _isub__(self, rhs):
+    def __isub__(self, rhs):
 
         xx, yy = rhs
         v = self._v
@@ -200,9 +200,9 @@ class Vector2(object):
         x, y = self._v
         if hasattr(rhs, "__getitem__"):
             xx, yy = rhs
-            return Vector2.from_floats(x*xx, y*yy)
+            return self.from_floats(x*xx, y*yy)
         else:
-            return Vector2.from_floats(x*rhs, y*rhs)
+            return self.from_floats(x*rhs, y*rhs)
 
 
     def __imul__(self, rhs):
@@ -234,9 +234,9 @@ class Vector2(object):
         x, y = self._v
         if hasattr(rhs, "__getitem__"):
             xx, yy, = rhs
-            return Vector2.from_floats(x/xx, y/yy)
+            return self.from_floats(x/xx, y/yy)
         else:
-            return Vector2.from_floats(x/rhs, y/rhs)
+            return self.from_floats(x/rhs, y/rhs)
 
 
     def __idiv__(self, rhs):
@@ -265,7 +265,7 @@ class Vector2(object):
     def __neg__(self):
         """Return the negation of this vector."""
         x, y = self._v
-        return Vector2.from_floats(-x, -y)
+        return self.from_floats(-x, -y)
 
     def __pos__(self):
 
@@ -326,7 +326,7 @@ class Vector2(object):
     def get_normalised(self):
         x, y = self._v
         l = sqrt(x*x +y*y)
-        return Vector2.from_floats(x/l, y/l)
+        return self.from_floats(x/l, y/l)
     get_normalized = get_normalised
 
     def get_distance_to(self, p):
@@ -341,6 +341,88 @@ class Vector2(object):
         dy = yy-y
         return sqrt( dx*dx + dy*dy )
 
+    def get_frozen(self):
+        """Returns an immutable, hashable copy of this vector."""
+        return FrozenVector2._from_float_sequence(self._v)
+
+
+class FrozenVector2(Vector2):
+
+    """An immutable Vector2, which can be used as a dictionary key or in a
+    set. Hashes and compares equal to a tuple of the same values, so an
+    (x, y) tuple will find a FrozenVector2 key.
+
+    Arithmetic returns new FrozenVector2s, and the in-place operators
+    rebind the name (as they do for tuples).
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, x=0., y=0.):
+        if hasattr(x, "__getitem__"):
+            x, y = x
+        self._v = (float(x), float(y))
+
+    @classmethod
+    def from_floats(cls, x, y):
+        vec = cls.__new__(cls, object)
+        vec._v = (x, y)
+        return vec
+
+    @classmethod
+    def from_iter(cls, iterable):
+        next = iter(iterable).__next__
+        vec = cls.__new__(cls, object)
+        vec._v = (float(next()), float(next()))
+        return vec
+
+    @classmethod
+    def from_points(cls, p1, p2):
+        x, y = p1
+        xx, yy = p2
+        return cls.from_floats(float(xx-x), float(yy-y))
+
+    @classmethod
+    def _from_float_sequence(cls, sequence):
+        v = cls.__new__(cls, object)
+        v._v = tuple(sequence[:2])
+        return v
+
+    def copy(self):
+        """Returns this vector, as there is no need to copy it."""
+        return self
+
+    def get_frozen(self):
+        return self
+
+    def get_mutable(self):
+        """Returns a (mutable) Vector2 copy of this vector."""
+        return Vector2._from_float_sequence(self._v)
+
+    def __hash__(self):
+        return hash(self._v)
+
+    def __repr__(self):
+        x, y = self._v
+        return "FrozenVector2(%s, %s)" % (x, y)
+
+    def _immutable(self, *args):
+        raise TypeError("FrozenVector2 objects can not be modified")
+
+    x = property(Vector2.get_x, _immutable, None, "x component.")
+    y = property(Vector2.get_y, _immutable, None, "y component.")
+    length = property(Vector2._get_length, _immutable, None, "Length of the vector")
+
+    set_x = set_y = __setitem__ = _immutable
+    normalise = normalize = _immutable
+
+    __iadd__ = Vector2.__add__
+    __isub__ = Vector2.__sub__
+    __imul__ = Vector2.__mul__
+    __idiv__ = Vector2.__div__
+
+
 if __name__ == "__main__":
 
     v1 = Vector2(1, 2)
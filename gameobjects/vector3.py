@@ -1,5 +1,6 @@
 from math import *
 from .util import format_number
+from array import array
 
 class Vector3(object):
 
@@ -71,6 +72,39 @@ class Vector3(object):
 
     __copy__ = copy
 
+
+    def use_buffer(self, typecode='d'):
+        """Stores the components in a contiguous typed array, which can be
+        read without conversion by anything that supports the buffer
+        protocol (PyOpenGL, NumPy, struct etc). Returns the vector.
+
+        typecode -- 'd' for doubles or 'f' for floats
+
+        """
+
+        self._v = array(typecode, self._v)
+        return self
+
+    def is_buffered(self):
+        """Returns True if the vector is backed by a typed buffer."""
+
+        return self._v.__class__ is array
+
+    def get_buffer(self):
+        """Returns a memoryview of the 3 components. If the vector is
+        backed by a buffer (see use_buffer) this is not a copy, and reflects
+        any changes to the vector.
+
+        """
+
+        v = self._v
+        if v.__class__ is not array:
+            v = array('d', v)
+        return memoryview(v)
+
+    def __buffer__(self, flags):
+        return self.get_buffer()
+
     def _get_x(self):
         return self._v[0]
     def _set_x(self, x):
@@ -275,7 +309,7 @@ class Vector3(object):
         return self.from_floats(x-ox, y-oy, z-oz)
 
 
-    def _isub__(self, rhs):
+    def __isub__(self, rhs):
         """Subtracts another vector (or a collection of 3 numbers) from this
         vector.
 
@@ -631,6 +665,120 @@ class Vector3(object):
                  z*bx - bz*x,
                  x*by - bx*y )
 
+    def get_frozen(self):
+        """Returns an immutable, hashable copy of this vector."""
+
+        return FrozenVector3._from_float_sequence(self._v)
+
+
+class FrozenVector3(Vector3):
+
+    """An immutable Vector3, which can be used as a dictionary key or in a
+    set. Hashes and compares equal to a tuple of the same values, so an
+    (x, y, z) tuple will find a FrozenVector3 key.
+
+    Arithmetic returns new FrozenVector3s, and the in-place operators
+    rebind the name (as they do for tuples).
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args):
+        """Creates a FrozenVector3 from 3 numeric values or a list-like
+        object containing at least 3 values. No arguments result in a null
+        vector.
+
+        """
+        if len(args) == 3:
+            x, y, z = args
+        elif not args:
+            x = y = z = 0.
+        elif len(args) == 1:
+            x, y, z = args[0][:3]
+        else:
+            raise ValueError("FrozenVector3.__init__ takes 0, 1 or 3 parameters")
+        self._v = (float(x), float(y), float(z))
+
+
+    @classmethod
+    def from_points(cls, p1, p2):
+
+        ax, ay, az = p1
+        bx, by, bz = p2
+        return cls.from_floats(bx-ax, by-ay, bz-az)
+
+    @classmethod
+    def from_floats(cls, x, y, z):
+        """Creates a FrozenVector3 from individual float values.
+        Warning: There is no checking (for efficiency) here: x, y, z _must_ be
+        floats.
+
+        """
+        v = cls.__new__(cls, object)
+        v._v = (x, y, z)
+        return v
+
+    @classmethod
+    def from_iter(cls, iterable):
+        """Creates a FrozenVector3 from an iterable containing at least 3
+        values."""
+        next = iter(iterable).__next__
+        v = cls.__new__(cls, object)
+        v._v = ( float(next()), float(next()), float(next()) )
+        return v
+
+    @classmethod
+    def _from_float_sequence(cls, sequence):
+        v = cls.__new__(cls, object)
+        v._v = tuple(sequence[:3])
+        return v
+
+
+    def copy(self):
+        """Returns this vector, as there is no need to copy it."""
+
+        return self
+    __copy__ = copy
+
+    def get_frozen(self):
+
+        return self
+
+    def get_mutable(self):
+        """Returns a (mutable) Vector3 copy of this vector."""
+
+        return Vector3._from_float_sequence(self._v)
+
+
+    def __hash__(self):
+
+        return hash(self._v)
+
+    def __repr__(self):
+
+        x, y, z = self._v
+        return "FrozenVector3(%s, %s, %s)" % (x, y, z)
+
+
+    def _immutable(self, *args):
+        raise TypeError("FrozenVector3 objects can not be modified")
+
+    x = property(Vector3._get_x, _immutable, None, "x component.")
+    y = property(Vector3._get_y, _immutable, None, "y component.")
+    z = property(Vector3._get_z, _immutable, None, "z component.")
+    length = property(Vector3._get_length, _immutable, None, "Length of the vector")
+
+    set = __setitem__ = _immutable
+    scalar_mul = vector_mul = scalar_div = vector_div = _immutable
+    scale = set_length = normalise = normalize = _immutable
+    use_buffer = _immutable
+
+    __iadd__ = Vector3.__add__
+    __isub__ = Vector3.__sub__
+    __imul__ = Vector3.__mul__
+    __idiv__ = Vector3.__div__
+
 
 def distance3d_squared(p1, p2):
 
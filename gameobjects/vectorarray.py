@@ -0,0 +1,366 @@
+import numpy
+
+from .vector2 import Vector2
+from .vector3 import Vector3
+
+
+class _VectorArray(object):
+
+    """Base class for containers of N vectors in a single contiguous
+    (N, components) NumPy buffer. Operations apply to every vector in one
+    vectorized call, so no per-vector Python objects are created.
+
+    """
+
+    __slots__ = ('_a',)
+
+    _size = 0
+    _vector_class = None
+
+
+    def __init__(self, vectors=(), dtype=float):
+        """Creates a vector array from a sequence of vectors (or sequences of
+        values), or from an array with a shape of (N, components).
+
+        vectors -- Sequence of vectors
+        dtype -- NumPy data type of the buffer (defaults to float)
+
+        """
+
+        a = numpy.array(vectors, dtype=dtype)
+        if a.size == 0:
+            a = a.reshape(0, self._size)
+        if a.ndim != 2 or a.shape[1] != self._size:
+            raise ValueError("%s requires a sequence of %i value vectors" % \
+                             (self.__class__.__name__, self._size))
+        self._a = a
+
+
+    @classmethod
+    def from_array(cls, array, copy=False):
+        """Creates a vector array that wraps an existing (N, components)
+        array. The array is not copied unless copy is True (or it is not a
+        floating point array).
+
+        array -- A NumPy array
+        copy -- If True, the array is copied
+
+        """
+
+        a = numpy.asarray(array)
+        if a.dtype.kind != 'f':
+            a = a.astype(float)
+        elif copy:
+            a = a.copy()
+        if a.ndim != 2 or a.shape[1] != cls._size:
+            raise ValueError("Array must have a shape of (N, %i)" % cls._size)
+        va = cls.__new__(cls, object)
+        va._a = a
+        return va
+
+
+    @classmethod
+    def zeros(cls, count, dtype=float):
+        """Creates an array of count null vectors."""
+
+        va = cls.__new__(cls, object)
+        va._a = numpy.zeros((count, cls._size), dtype=dtype)
+        return va
+
+
+    def copy(self):
+        """Returns a copy of this vector array."""
+
+        va = self.__new__(self.__class__, object)
+        va._a = self._a.copy()
+        return va
+    __copy__ = copy
+
+
+    def _get_array(self):
+        return self._a
+    array = property(_get_array, None, None, "The underlying (N, components) NumPy array.")
+
+
+    def _get_x(self):
+        return self._a[:, 0]
+    def _set_x(self, x):
+        self._a[:, 0] = x
+    x = property(_get_x, _set_x, None, "x components (a view).")
+
+    def _get_y(self):
+        return self._a[:, 1]
+    def _set_y(self, y):
+        self._a[:, 1] = y
+    y = property(_get_y, _set_y, None, "y components (a view).")
+
+
+    def __str__(self):
+
+        return "[%s]" % ", ".join(str(v) for v in self)
+
+
+    def __repr__(self):
+
+        return "%s(%r)" % (self.__class__.__name__, self._a.tolist())
+
+
+    def __len__(self):
+
+        return len(self._a)
+
+
+    def __iter__(self):
+        """Iterates over the vectors, as copies."""
+
+        from_floats = self._vector_class.from_floats
+        for values in self._a.tolist():
+            yield from_floats(*values)
+
+
+    def __getitem__(self, index):
+        """Retrieves a single vector (as a copy) for an integer index, or a
+        new vector array for a slice, index array or boolean mask.
+
+        """
+
+        if isinstance(index, (int, numpy.integer)):
+            try:
+                return self._vector_class.from_floats(*self._a[index].tolist())
+            except IndexError:
+                raise IndexError("Vector index out of range")
+
+        va = self.__new__(self.__class__, object)
+        va._a = self._a[index]
+        return va
+
+
+    def __setitem__(self, index, value):
+        """Sets one or more vectors in the array."""
+
+        self._a[index] = self._operand(value)
+
+
+    def _operand(self, rhs):
+
+        if isinstance(rhs, _VectorArray):
+            return rhs._a
+        if hasattr(rhs, '_gameobjects_vector'):
+            return rhs.as_tuple()
+        rhs = numpy.asarray(rhs, dtype=self._a.dtype)
+        if rhs.ndim == 1 and len(rhs) != self._size:
+            # One scalar per vector
+            return rhs[:, numpy.newaxis]
+        return rhs
+
+
+    def _new(self, a):
+
+        va = self.__new__(self.__class__, object)
+        va._a = a
+        return va
+
+
+    def __add__(self, rhs):
+        return self._new(self._a + self._operand(rhs))
+    __radd__ = __add__
+
+    def __iadd__(self, rhs):
+        self._a += self._operand(rhs)
+        return self
+
+    def __sub__(self, rhs):
+        return self._new(self._a - self._operand(rhs))
+
+    def __rsub__(self, lhs):
+        return self._new(self._operand(lhs) - self._a)
+
+    def __isub__(self, rhs):
+        self._a -= self._operand(rhs)
+        return self
+
+    def __mul__(self, rhs):
+        """Multiplies by a scalar, a vector, one scalar per vector or another
+        vector array (component-wise). A 1D array with as many values as
+        there are components is treated as a vector, pass an (N, 1) array to
+        be explicit about per-vector scalars."""
+        return self._new(self._a * self._operand(rhs))
+    __rmul__ = __mul__
+
+    def __imul__(self, rhs):
+        self._a *= self._operand(rhs)
+        return self
+
+    def __truediv__(self, rhs):
+        return self._new(self._a / self._operand(rhs))
+    __div__ = __truediv__
+
+    def __rtruediv__(self, lhs):
+        return self._new(self._operand(lhs) / self._a)
+    __rdiv__ = __rtruediv__
+
+    def __itruediv__(self, rhs):
+        self._a /= self._operand(rhs)
+        return self
+    __idiv__ = __itruediv__
+
+    def __neg__(self):
+        return self._new(-self._a)
+
+    def __pos__(self):
+        return self.copy()
+
+
+    def __eq__(self, rhs):
+        """Returns a boolean array, True where the vectors are equal."""
+
+        return (self._a == self._operand(rhs)).all(axis=1)
+
+    def __ne__(self, rhs):
+
+        return (self._a != self._operand(rhs)).any(axis=1)
+
+    __hash__ = None
+
+
+    def __call__(self, keys):
+        """Swizzles every vector, returning an (N, len(keys)) array.
+
+        keys -- A string containing a list of component names
+
+        """
+
+        ord_x = ord('x')
+        return self._a[:, [ord(c) - ord_x for c in keys]]
+
+
+    def get_length_squared(self):
+        """Returns an array of the squared lengths of the vectors."""
+
+        a = self._a
+        return numpy.einsum('ij,ij->i', a, a)
+
+
+    def get_length(self):
+        """Returns an array of the lengths of the vectors."""
+
+        return numpy.sqrt(self.get_length_squared())
+    get_magnitude = get_length
+
+
+    def set_length(self, new_length):
+        """Scales every vector to a new length (a scalar or one length per
+        vector). Null vectors remain null.
+
+        new_length -- The new length(s)
+
+        """
+
+        self.normalise()
+        self._a *= self._operand(new_length)
+        return self
+
+    length = property(get_length, set_length, None, "Lengths of the vectors")
+
+
+    def normalise(self):
+        """Normalises all the vectors. Null vectors remain null."""
+
+        a = self._a
+        lengths = self.get_length()
+        lengths[lengths == 0.] = 1.
+        a /= lengths[:, numpy.newaxis]
+        return self
+    normalize = normalise
+
+
+    def get_normalised(self):
+        """Returns a new vector array with all the vectors normalised."""
+
+        return self.copy().normalise()
+    get_normalized = get_normalised
+
+
+    def get_distance_to_squared(self, p):
+        """Returns an array of the squared distances to a point, or to each
+        point in another vector array.
+
+        p -- A position, or a vector array of positions
+
+        """
+
+        d = self._a - self._operand(p)
+        return numpy.einsum('ij,ij->i', d, d)
+
+
+    def get_distance_to(self, p):
+        """Returns an array of the distances to a point, or to each point in
+        another vector array.
+
+        p -- A position, or a vector array of positions
+
+        """
+
+        return numpy.sqrt(self.get_distance_to_squared(p))
+
+
+    def dot(self, other):
+        """Returns an array of the dot products with a vector, or with each
+        vector in another vector array.
+
+        other -- A vector or vector array
+
+        """
+
+        return (self._a * self._operand(other)).sum(axis=1)
+
+
+class Vector2Array(_VectorArray):
+
+    """A contiguous array of 2D vectors with the Vector2 operator API."""
+
+    __slots__ = ()
+
+    _size = 2
+    _vector_class = Vector2
+
+
+class Vector3Array(_VectorArray):
+
+    """A contiguous array of 3D vectors with the Vector3 operator API."""
+
+    __slots__ = ()
+
+    _size = 3
+    _vector_class = Vector3
+
+
+    def _get_z(self):
+        return self._a[:, 2]
+    def _set_z(self, z):
+        self._a[:, 2] = z
+    z = property(_get_z, _set_z, None, "z components (a view).")
+
+
+    def cross(self, other):
+        """Returns the cross products with a vector, or with each vector in
+        another vector array, as a new Vector3Array.
+
+        other -- A vector or vector array
+
+        """
+
+        return self._new(numpy.cross(self._a, self._operand(other)))
+
+
+if __name__ == "__main__":
+
+    va = Vector3Array([(1, 2, 3), (4, 5, 6), (0, 0, 0)])
+    print(va)
+    print(va + (1, 1, 1))
+    print(va * 2)
+    print(va.get_length())
+    print(va.get_normalised())
+    print(va.cross((0, 0, 1)))
+    print(va('zyx'))
+    print(repr(va[1]))